@@ -0,0 +1,32 @@
+"""
+Admin API endpoints
+"""
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from core.profiling import find_profile, list_profiles, verify_profile_token
+
+router = APIRouter()
+
+
+async def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Admin endpoints take a token from ``python -m core.profiling admin``"""
+    # TODO: Replace with an admin role check once authentication is implemented
+    if not verify_profile_token(x_admin_token, "admin"):
+        raise HTTPException(status_code=403, detail="Invalid or expired admin token")
+
+
+@router.get("/profiles", dependencies=[Depends(require_admin_token)])
+async def get_profiles() -> Dict[str, List[Dict[str, Any]]]:
+    """List captured request profiles, newest first"""
+    return {"profiles": list_profiles()}
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_admin_token)])
+async def download_profile(profile_id: str):
+    """Download a profile in collapsed-stack format (flamegraph.pl, speedscope)"""
+    path = find_profile(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=path.name)
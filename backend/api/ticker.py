@@ -1,27 +1,86 @@
 """
 Ticker API endpoints
 """
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+from typing import Awaitable, Callable, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, BackgroundTasks, Request, Response
+from fastapi.responses import StreamingResponse
+from urllib.parse import urlencode
 from uuid import UUID
 
 from models.ticker import (
     TickerItem, TickerItemCreate, TickerFeedRequest,
-    TickerFeedResponse, TickerCategory, TickerEngagementCreate
+    TickerFeedResponse, TickerCategory, TickerEngagementCreate,
+    TickerEngagementBatch, ticker_items_json
+)
+from services.ticker_service import ticker_service, decode_feed_cursor
+from services.ticker_broadcaster import ticker_broadcaster
+from services.ticker_stream import parse_event_id, ticker_stream_relay
+from services.engagement_buffer import engagement_buffer
+from services.source_scheduler import source_scheduler
+from services.refresh_coordinator import refresh_coordinator
+from services.insight_pipeline import insight_pipeline
+from services.ticker_store import ticker_store
+from core.config import settings
+from core.leader import leader_election
+from core.responses import (
+    EncodedResponse, EncodedResponseCache, PreEncodedJSONResponse, etag_matches
 )
-from services.ticker_service import ticker_service
 from core.auth import get_current_user  # To be implemented
 
 router = APIRouter()
 
+# Encoded GET responses, reused while the item store's version is unchanged
+ticker_response_cache = EncodedResponseCache(settings.ticker_cache_entries)
+
+
+async def _conditional_response(
+    request: Request,
+    build: Callable[[], Awaitable[bytes]],
+    time_dependent: bool = False,
+    private: bool = False,
+    user_id: Optional[UUID] = None
+) -> Response:
+    """Serve the body from ``build`` with a strong ETag and Cache-Control
+    
+    While the item store is warm its version identifies the data, so a
+    repeat request is answered from the cache (or with a 304 when
+    If-None-Match matches) without touching the database or re-encoding.
+    Relevance-sorted bodies change as scores decay, so those are reused
+    for at most max-age seconds.
+    """
+    version = ticker_store.version if ticker_store.ready else None
+    key = f"{user_id}:{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+    entry = ticker_response_cache.get(key, version) if version is not None else None
+    
+    if entry is None:
+        ttl = settings.ticker_cache_max_age if time_dependent else None
+        entry = EncodedResponse(await build(), version, ttl)
+        if version is not None:
+            ticker_response_cache.put(key, entry)
+    
+    if private:
+        cache_control = f"private, max-age={settings.ticker_cache_max_age}"
+    else:
+        cache_control = (
+            f"public, max-age={settings.ticker_cache_max_age}, "
+            f"stale-while-revalidate={settings.ticker_cache_stale_seconds}"
+        )
+    headers = {"ETag": entry.etag, "Cache-Control": cache_control}
+    
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return PreEncodedJSONResponse(entry.body, headers=headers)
+
 
-@router.get("/feed", response_model=TickerFeedResponse)
+@router.get("/feed", response_model=TickerFeedResponse, response_class=PreEncodedJSONResponse)
 async def get_ticker_feed(
+    http_request: Request,
     limit: int = Query(default=50, ge=1, le=200),
     categories: Optional[List[TickerCategory]] = Query(default=None),
     priority_filter: Optional[int] = Query(default=None, ge=1, le=5),
     include_expired: bool = Query(default=False),
     sort_by: str = Query(default="relevance", regex="^(relevance|created_at|priority)$"),
+    cursor: Optional[str] = Query(default=None),
     # current_user = Depends(get_current_user)  # Uncomment when auth is implemented
 ):
     """
@@ -32,36 +91,45 @@ async def get_ticker_feed(
     - **priority_filter**: Only show items with priority <= this value
     - **include_expired**: Include expired items
     - **sort_by**: Sort by relevance, created_at, or priority
+    - **cursor**: `next_cursor` from the previous page (created_at and priority sorts only)
+    
+    Responses carry a strong ETag; send it back in If-None-Match to get a
+    304 while the feed is unchanged.
     """
+    if cursor:
+        try:
+            decode_feed_cursor(cursor, sort_by)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
     request = TickerFeedRequest(
         limit=limit,
         categories=categories,
         priority_filter=priority_filter,
         include_expired=include_expired,
-        sort_by=sort_by
+        sort_by=sort_by,
+        cursor=cursor
     )
     
     # Get user_id when auth is implemented
     user_id = None  # current_user.id
     
-    items = await ticker_service.get_ticker_feed(request, user_id)
+    async def build() -> bytes:
+        page = await ticker_service.get_ticker_feed_page(request, user_id)
+        return page.json_bytes()
     
-    return TickerFeedResponse(
-        items=items,
-        total_count=len(items),
-        has_more=len(items) == limit,
-        last_updated=items[0].created_at if items else None
-    )
+    return await _conditional_response(http_request, build, time_dependent=sort_by == "relevance")
 
 
-@router.get("/general", response_model=List[TickerItem])
+@router.get("/general", response_model=List[TickerItem], response_class=PreEncodedJSONResponse)
 async def get_general_events(
-    limit: int = Query(default=20, ge=1, le=100),
-    background_tasks: BackgroundTasks = BackgroundTasks()
+    http_request: Request,
+    limit: int = Query(default=20, ge=1, le=100)
 ):
     """
     Get general events from external sources.
-    Triggers background refresh if data is stale.
+    Serves stored items immediately; stale data triggers a single
+    background refresh that persists new items.
     """
     # Get cached general events
     request = TickerFeedRequest(
@@ -70,24 +138,29 @@ async def get_general_events(
         sort_by="created_at"
     )
     
-    items = await ticker_service.get_ticker_feed(request)
+    # Refresh in the background if the last refresh is older than 15 minutes;
+    # followers leave refreshes to the leader's scheduler
+    if leader_election.is_leader:
+        await refresh_coordinator.ensure_fresh(TickerCategory.GENERAL.value)
     
-    # Check if we need to refresh (if latest item is older than 15 minutes)
-    if not items or (items[0].created_at < datetime.now() - timedelta(minutes=15)):
-        background_tasks.add_task(ticker_service.fetch_general_events)
+    async def build() -> bytes:
+        return ticker_items_json(await ticker_service.get_ticker_feed(request))
     
-    return items
+    return await _conditional_response(http_request, build)
 
 
-@router.get("/insights", response_model=List[TickerItem])
+@router.get("/insights", response_model=List[TickerItem], response_class=PreEncodedJSONResponse)
 async def get_customized_insights(
+    http_request: Request,
     limit: int = Query(default=20, ge=1, le=100),
     # current_user = Depends(get_current_user)
 ):
     """
     Get AI-generated insights and suggestions for the current user.
+    
+    Insights are precomputed in the background and stored as the user's
+    personal ticker items; this only reads them.
     """
-    # For now, return cached insights
     request = TickerFeedRequest(
         limit=limit,
         categories=[TickerCategory.INSIGHTS],
@@ -97,15 +170,22 @@ async def get_customized_insights(
     # user_id = current_user.id
     user_id = None
     
-    items = await ticker_service.get_ticker_feed(request, user_id)
+    # Generate in the background if this user has nothing fresh yet; on a
+    # follower the leader's pipeline precomputes them
+    if user_id and leader_election.is_leader:
+        insight_pipeline.ensure(user_id)
     
-    # TODO: Trigger insight generation if needed
+    async def build() -> bytes:
+        return ticker_items_json(await ticker_service.get_ticker_feed(request, user_id))
     
-    return items
+    return await _conditional_response(
+        http_request, build, time_dependent=True, private=True, user_id=user_id
+    )
 
 
-@router.get("/performance", response_model=List[TickerItem])
+@router.get("/performance", response_model=List[TickerItem], response_class=PreEncodedJSONResponse)
 async def get_performance_updates(
+    http_request: Request,
     limit: int = Query(default=20, ge=1, le=100),
     # current_user = Depends(get_current_user)
 ):
@@ -121,9 +201,10 @@ async def get_performance_updates(
     # user_id = current_user.id
     user_id = None
     
-    items = await ticker_service.get_ticker_feed(request, user_id)
+    async def build() -> bytes:
+        return ticker_items_json(await ticker_service.get_ticker_feed(request, user_id))
     
-    return items
+    return await _conditional_response(http_request, build, private=True, user_id=user_id)
 
 
 @router.post("/refresh")
@@ -167,22 +248,46 @@ async def create_ticker_item(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.post("/engagement")
+@router.post("/engagement", status_code=202)
 async def track_engagement(
     engagement: TickerEngagementCreate,
     # current_user = Depends(get_current_user)
 ):
     """
     Track user engagement with ticker items.
+    
+    Events are buffered and written in bulk; repeated views of the same
+    item by the same user are collapsed.
     """
     # Ensure user can only track their own engagement
     # engagement.user_id = current_user.id
     
-    try:
-        # TODO: Implement engagement tracking
-        return {"status": "tracked"}
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    if not engagement_buffer.add(engagement):
+        raise HTTPException(status_code=503, detail="Engagement buffer is full, retry later")
+    
+    return {"status": "accepted"}
+
+
+@router.post("/engagement/batch", status_code=202)
+async def track_engagement_batch(
+    batch: TickerEngagementBatch,
+    # current_user = Depends(get_current_user)
+):
+    """
+    Track many engagement events in one request (up to 1000).
+    """
+    # Ensure user can only track their own engagement
+    # for event in batch.events: event.user_id = current_user.id
+    
+    accepted = engagement_buffer.add_many(batch.events)
+    if not accepted:
+        raise HTTPException(status_code=503, detail="Engagement buffer is full, retry later")
+    
+    return {
+        "status": "accepted",
+        "accepted": accepted,
+        "rejected": len(batch.events) - accepted
+    }
 
 
 @router.get("/stats")
@@ -213,56 +318,113 @@ async def get_ticker_stats(
     }
 
 
+@router.get("/sources/schedule")
+async def get_source_schedule(
+    # current_user = Depends(get_current_user)
+):
+    """
+    Get the source refresh schedule (admin only).
+    """
+    # TODO: Check admin privileges
+    # if current_user.role != "admin":
+    #     raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return {
+        "max_concurrency": source_scheduler.max_concurrency,
+        "source_timeout_seconds": source_scheduler.source_timeout,
+        "sources": source_scheduler.schedule()
+    }
+
+
+@router.get("/stream")
+async def ticker_stream(
+    categories: Optional[List[TickerCategory]] = Query(default=None),
+    priority_filter: Optional[int] = Query(default=None, ge=1, le=5),
+    last_event_id: Optional[str] = Header(default=None)
+):
+    """
+    Server-Sent Events stream of new ticker items.
+    
+    Each item is an ``item`` event whose id starts with the change's seq.
+    On reconnect the browser sends ``Last-Event-ID`` and the events after
+    it are replayed; a replay from the database may repeat events already
+    received, so clients drop ids they have seen. A ``reset`` event means
+    the gap was too old to replay and the feed should be reloaded.
+    Heartbeat comments keep idle connections open through proxies.
+    """
+    if not ticker_stream_relay.available:
+        raise HTTPException(status_code=503, detail="Ticker stream requires the database change feed")
+    
+    resume_from = None
+    if last_event_id:
+        try:
+            resume_from = parse_event_id(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    
+    # Subscribe before replaying so nothing published meanwhile is lost
+    subscriber = ticker_stream_relay.subscribe(categories, priority_filter)
+    return StreamingResponse(
+        ticker_stream_relay.stream(subscriber, resume_from),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 # WebSocket endpoint for real-time updates (optional)
 from fastapi import WebSocket, WebSocketDisconnect
 from datetime import datetime, timedelta
-import json
 
 
 @router.websocket("/ws")
-async def ticker_websocket(websocket: WebSocket):
+async def ticker_websocket(
+    websocket: WebSocket,
+    categories: Optional[List[TickerCategory]] = Query(default=None)
+):
     """
     WebSocket endpoint for real-time ticker updates.
+    
+    Updates come from the shared broadcaster; pass **categories** to only
+    receive items from those categories.
     """
     await websocket.accept()
+    subscriber = ticker_broadcaster.subscribe(categories)
+    
+    async def send_frames():
+        while True:
+            frame = await subscriber.queue.get()
+            if frame is None:
+                break
+            await websocket.send_text(frame)
+    
+    async def wait_for_disconnect():
+        while True:
+            await websocket.receive_text()
     
     try:
         # Send initial feed
-        request = TickerFeedRequest(limit=20, sort_by="created_at")
-        items = await ticker_service.get_ticker_feed(request)
+        await websocket.send_text(await ticker_broadcaster.initial_frame(subscriber))
         
-        await websocket.send_json({
-            "type": "initial",
-            "items": [item.model_dump(mode="json") for item in items]
-        })
+        sender = asyncio.create_task(send_frames())
+        receiver = asyncio.create_task(wait_for_disconnect())
+        done, pending = await asyncio.wait(
+            {sender, receiver}, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in pending:
+            task.cancel()
+        for task in done:
+            task.result()
         
-        # Keep connection alive and send updates
-        while True:
-            # Wait for 30 seconds
-            await asyncio.sleep(30)
-            
-            # Get new items created in last 30 seconds
-            request = TickerFeedRequest(limit=10, sort_by="created_at")
-            new_items = await ticker_service.get_ticker_feed(request)
-            
-            # Filter to only truly new items
-            cutoff_time = datetime.now() - timedelta(seconds=35)
-            new_items = [
-                item for item in new_items 
-                if item.created_at > cutoff_time
-            ]
-            
-            if new_items:
-                await websocket.send_json({
-                    "type": "update",
-                    "items": [item.model_dump(mode="json") for item in new_items]
-                })
+        if subscriber.dropped:
+            await websocket.close(code=1013)
                 
     except WebSocketDisconnect:
         logger.info("Ticker WebSocket disconnected")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         await websocket.close()
+    finally:
+        ticker_broadcaster.unsubscribe(subscriber)
 
 
 # Import required for background tasks
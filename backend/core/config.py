@@ -24,6 +24,14 @@ class Settings(BaseSettings):
     supabase_anon_key: str
     supabase_service_key: str
     
+    # Database - direct Postgres connection (optional, bypasses PostgREST)
+    # Use the session-mode connection string; transaction-mode poolers
+    # do not support prepared statements.
+    database_url: Optional[str] = None
+    db_pool_min_size: int = 2
+    db_pool_max_size: int = 10
+    db_command_timeout: float = 10.0
+    
     # DataForSEO
     dataforseo_login: str = "eca1d1f1229a0603"
     dataforseo_password: str
@@ -51,6 +59,85 @@ class Settings(BaseSettings):
     # CORS
     cors_origins: List[str] = ["http://localhost:3001", "http://localhost:3000"]
     
+    # Ticker WebSocket broadcasting
+    ticker_ws_poll_seconds: float = 30.0
+    ticker_ws_queue_size: int = 16
+    
+    # Ticker change capture (LISTEN/NOTIFY on the direct DATABASE_URL connection)
+    ticker_changes_enabled: bool = True
+    ticker_changes_keepalive_seconds: float = 60.0
+    ticker_changes_hole_grace_seconds: float = 30.0
+    ticker_changes_skipped_retention_seconds: float = 600.0
+    
+    # Ticker Server-Sent Events stream
+    ticker_stream_replay_size: int = 1000
+    ticker_stream_replay_max: int = 1000
+    ticker_stream_queue_size: int = 256
+    ticker_stream_heartbeat_seconds: float = 15.0
+    
+    # In-memory ticker item store
+    ticker_store_enabled: bool = True
+    ticker_store_sync_seconds: float = 5.0
+    ticker_store_reload_seconds: float = 900.0
+    ticker_store_max_items: int = 50000
+    
+    # Ticker HTTP caching (ETag / Cache-Control on read endpoints)
+    ticker_cache_max_age: int = 10
+    ticker_cache_stale_seconds: int = 30
+    ticker_cache_entries: int = 512
+    
+    # Ticker engagement write-behind buffer
+    engagement_flush_size: int = 500
+    engagement_flush_seconds: float = 2.0
+    engagement_buffer_max: int = 50000
+    
+    # Ticker source refresh scheduler
+    scheduler_enabled: bool = True
+    scheduler_max_concurrency: int = 4
+    scheduler_source_timeout: float = 60.0
+    scheduler_jitter_ratio: float = 0.1
+    scheduler_max_backoff_minutes: int = 720
+    
+    # Source fetchers: per-source deadline and circuit breaker
+    source_fetch_timeout: float = 30.0
+    source_breaker_failures: int = 3
+    source_breaker_window_failures: int = 5
+    source_breaker_window_seconds: float = 600.0
+    source_breaker_cooldown_seconds: float = 60.0
+    source_breaker_max_cooldown_seconds: float = 3600.0
+    
+    # Metrics (/metrics endpoint and hot-path instrumentation)
+    metrics_enabled: bool = True
+    
+    # Request profiling (signed X-Profile header or a sampled share of requests)
+    profiling_enabled: bool = True
+    profiling_sample_rate: float = 0.0
+    profiling_interval_seconds: float = 0.005
+    profiling_max_files: int = 200
+    
+    # Multi-worker mode: one leader (chosen by file lock) refreshes sources and
+    # syncs the store; every worker reads the feed from its mmap snapshot
+    workers: int = 1
+    worker_state_dir: str = "logs/workers"
+    leader_retry_seconds: float = 5.0
+    feed_snapshot_interval_seconds: float = 1.0
+    
+    # Ingestion seen-ID index (known source items are not fetched again)
+    seen_index_lru_size: int = 5000
+    seen_index_bloom_capacity: int = 100000
+    seen_index_error_rate: float = 0.001
+    seen_index_warm_rows: int = 50000
+    seen_index_path: str = "logs/seen_index.snapshot"
+    seen_index_snapshot_seconds: float = 300.0
+    
+    # Ticker insight precompute
+    insight_precompute_enabled: bool = True
+    insight_ttl_seconds: int = 3600
+    insight_analyzer_timeout: float = 10.0
+    insight_batch_interval_seconds: float = 900.0
+    insight_batch_concurrency: int = 4
+    insight_active_days: int = 7
+    
     # Logging
     log_level: str = "INFO"
     log_file: str = "logs/app.log"
@@ -1,15 +1,31 @@
 """
-Database configuration and Supabase client setup
+Database configuration, Supabase client and asyncpg pool setup
+
+Two data-access backends are available:
+
+* **postgres** - a lifespan-managed asyncpg pool, used when ``DATABASE_URL``
+  is configured. Queries run natively on the event loop and asyncpg caches
+  each distinct statement as a prepared statement per connection.
+* **supabase** - the supabase-py REST client. Its ``.execute()`` is blocking,
+  so queries are dispatched through :func:`execute_async` to a worker thread.
 """
+import asyncio
+import json
+from time import perf_counter
 from supabase import create_client, Client
-from typing import Optional
+from typing import Any, Optional
 from loguru import logger
+import asyncpg
 
 from core.config import settings
+from core.metrics import DB_QUERY_ERRORS, DB_QUERY_SECONDS, record_query, rest_query_labels
 
 # Global Supabase client
 _supabase_client: Optional[Client] = None
 
+# Global asyncpg pool (None when DATABASE_URL is not configured)
+_db_pool: Optional[asyncpg.Pool] = None
+
 
 def get_supabase() -> Client:
     """Get Supabase client instance"""
@@ -46,6 +62,83 @@ def init_supabase():
         raise
 
 
+async def _init_connection(conn: asyncpg.Connection):
+    """Decode JSON columns to Python objects on every pooled connection"""
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name,
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema="pg_catalog"
+        )
+    if settings.metrics_enabled:
+        conn.add_query_logger(record_query)
+
+
+async def init_db_pool() -> Optional[asyncpg.Pool]:
+    """Create the asyncpg pool if a direct database URL is configured"""
+    global _db_pool
+    
+    if not settings.database_url:
+        logger.info("DATABASE_URL not set, using Supabase REST backend")
+        return None
+    
+    if _db_pool is None:
+        try:
+            _db_pool = await asyncpg.create_pool(
+                dsn=settings.database_url,
+                min_size=settings.db_pool_min_size,
+                max_size=settings.db_pool_max_size,
+                command_timeout=settings.db_command_timeout,
+                init=_init_connection
+            )
+            logger.info(
+                f"Postgres pool created (min={settings.db_pool_min_size}, "
+                f"max={settings.db_pool_max_size})"
+            )
+        except Exception as e:
+            logger.error(f"Failed to create Postgres pool, falling back to Supabase REST: {e}")
+            _db_pool = None
+    
+    return _db_pool
+
+
+async def close_db_pool():
+    """Close the asyncpg pool on shutdown"""
+    global _db_pool
+    
+    if _db_pool is not None:
+        await _db_pool.close()
+        _db_pool = None
+        logger.info("Postgres pool closed")
+
+
+def get_db_pool() -> Optional[asyncpg.Pool]:
+    """Get the asyncpg pool, or None when the Supabase backend is active"""
+    return _db_pool
+
+
+def get_backend_name() -> str:
+    """Name of the active data-access backend"""
+    return "postgres" if _db_pool is not None else "supabase"
+
+
+async def execute_async(query) -> Any:
+    """Run a blocking supabase-py query builder off the event loop"""
+    if not settings.metrics_enabled:
+        return await asyncio.to_thread(query.execute)
+    
+    table, operation = rest_query_labels(query)
+    started = perf_counter()
+    try:
+        return await asyncio.to_thread(query.execute)
+    except Exception:
+        DB_QUERY_ERRORS.labels("supabase", table, operation).inc()
+        raise
+    finally:
+        DB_QUERY_SECONDS.labels("supabase", table, operation).observe(perf_counter() - started)
+
+
 # Database table names
 class Tables:
     """Database table name constants"""
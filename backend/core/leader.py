@@ -0,0 +1,112 @@
+"""
+Leader election between worker processes on one host, by file lock
+
+In multi-worker mode every worker races for an exclusive ``flock`` on the
+same file; the one holding it is the leader and runs the work that must
+happen once per host (source refreshes, store syncing, snapshot publishing).
+The kernel releases the lock when the leader exits, however it exits, and a
+follower's next attempt takes over.
+"""
+from typing import Awaitable, Callable, Optional
+from pathlib import Path
+import asyncio
+import fcntl
+import os
+
+from loguru import logger
+
+from core.config import settings
+
+
+class LeaderLock:
+    """Non-blocking exclusive lock on ``path``"""
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd: Optional[int] = None
+    
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+    
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        # The pid is informational; the lock itself is what counts
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+    
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class LeaderElection:
+    """Retries the lock until this worker leads, then runs ``on_elected`` once"""
+    
+    def __init__(self, lock: LeaderLock, retry_interval: float = settings.leader_retry_seconds):
+        self.lock = lock
+        self.retry_interval = retry_interval
+        self._elected = False
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def is_leader(self) -> bool:
+        """True when this worker runs the once-per-host work
+        
+        A single worker always does; with several, only the elected one and
+        only once its services have started.
+        """
+        return settings.workers <= 1 or (self._elected and self.lock.held)
+    
+    async def start(self, on_elected: Callable[[], Awaitable[None]]):
+        """Try once now and keep trying in the background if another worker leads"""
+        if await self._try(on_elected):
+            return
+        logger.info(f"Worker {os.getpid()} is a follower")
+        self._task = asyncio.create_task(self._run(on_elected))
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._elected = False
+        self.lock.release()
+    
+    # Private helper methods
+    
+    async def _run(self, on_elected: Callable[[], Awaitable[None]]):
+        while True:
+            await asyncio.sleep(self.retry_interval)
+            try:
+                if await self._try(on_elected):
+                    return
+            except Exception as e:
+                logger.error(f"Leader election failed: {e}")
+    
+    async def _try(self, on_elected: Callable[[], Awaitable[None]]) -> bool:
+        if not self.lock.try_acquire():
+            return False
+        logger.info(f"Worker {os.getpid()} is the leader")
+        await on_elected()
+        self._elected = True
+        return True
+
+
+# Global election instance
+leader_election = LeaderElection(LeaderLock(Path(settings.worker_state_dir) / "leader.lock"))
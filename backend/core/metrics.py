@@ -0,0 +1,384 @@
+"""
+Metrics - counters, gauges and histograms exposed in the Prometheus text format
+
+Recording is a dict lookup plus an in-place increment with no locks, so it
+is cheap enough to leave on in production. All recording happens on the
+event loop thread; values that are expensive or awkward to push (queue
+depths, connection counts) are gauges read by a callback at scrape time.
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+from time import perf_counter
+import math
+import re
+
+from core.config import settings
+
+
+# Latency buckets in seconds, 1 ms to 10 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Bound on distinct SQL statements remembered by describe_sql
+SQL_LABEL_CACHE_MAX = 2048
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# asyncpg resets a connection with this statement when it returns to the pool
+POOL_RESET_QUERY_PREFIX = "SELECT pg_advisory_unlock_all()"
+
+
+class _Metric:
+    """A named metric with one child per combination of label values"""
+    
+    kind = "untyped"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+    
+    def labels(self, *values: str):
+        """The child for these label values, created on first use"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+    
+    def samples(self) -> Iterable[Tuple[str, Tuple[Tuple[str, str], ...], float]]:
+        for values, child in list(self._children.items()):
+            yield from self._child_samples(tuple(zip(self.labelnames, values)), child)
+    
+    # Private helper methods
+    
+    def _new_child(self):
+        raise NotImplementedError
+    
+    def _child_samples(self, labels, child):
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+    
+    def __init__(self):
+        self.value = 0.0
+    
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonically increasing total"""
+    
+    kind = "counter"
+    
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+    
+    def _new_child(self):
+        return _CounterChild()
+    
+    def _child_samples(self, labels, child):
+        yield f"{self.name}_total", labels, child.value
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+    
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+    
+    def set(self, value: float):
+        self.value = value
+    
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+    
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+    
+    def set_function(self, function: Callable[[], float]):
+        """Read the value from ``function`` at scrape time instead"""
+        self.function = function
+    
+    def get(self) -> float:
+        if self.function is not None:
+            try:
+                return float(self.function())
+            except Exception:
+                return math.nan
+        return self.value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    
+    kind = "gauge"
+    
+    def set(self, value: float):
+        self.labels().set(value)
+    
+    def set_function(self, function: Callable[[], float]):
+        self.labels().set_function(function)
+    
+    def _new_child(self):
+        return _GaugeChild()
+    
+    def _child_samples(self, labels, child):
+        yield self.name, labels, child.get()
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum")
+    
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; cumulated when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+    
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+    
+    def time(self) -> "_Timer":
+        """Context manager observing the elapsed time of its block"""
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values over fixed buckets"""
+    
+    kind = "histogram"
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+    
+    def observe(self, value: float):
+        self.labels().observe(value)
+    
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+    
+    def _child_samples(self, labels, child):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), list(child.counts)):
+            cumulative += count
+            yield f"{self.name}_bucket", labels + (("le", _format_value(bound)),), cumulative
+        yield f"{self.name}_count", labels, cumulative
+        yield f"{self.name}_sum", labels, child.sum
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+    
+    def __init__(self, histogram: _HistogramChild):
+        self.histogram = histogram
+    
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.histogram.observe(perf_counter() - self.started)
+
+
+class MetricsRegistry:
+    """Metrics rendered together by the /metrics endpoint"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+    
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    rendered = ",".join(f'{key}="{_escape(label)}"' for key, label in labels)
+                    lines.append(f"{name}{{{rendered}}} {_format_value(value)}")
+                else:
+                    lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template
+    
+    The route is read from the endpoint the router stored in the scope, so
+    paths with parameters share one label and unknown paths collapse into
+    "unmatched" instead of growing the label set.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Dict[object, str] = {}
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        started = perf_counter()
+        status = 500
+        
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], self._route(scope), str(status)
+            ).observe(perf_counter() - started)
+    
+    # Private helper methods
+    
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            routes = getattr(scope.get("app"), "routes", ())
+            path = next((route.path for route in routes if getattr(route, "endpoint", None) is endpoint), "unmatched")
+            self._route_paths[endpoint] = path
+        return path
+
+
+# Registry and the application's metrics
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+DB_QUERY_SECONDS = registry.histogram(
+    "db_query_duration_seconds", "Database query latency by table and operation", ("backend", "table", "operation")
+)
+DB_QUERY_ERRORS = registry.counter(
+    "db_query_errors", "Database queries that raised", ("backend", "table", "operation")
+)
+HTTP_CLIENT_SECONDS = registry.histogram(
+    "http_client_request_duration_seconds", "Outbound HTTP latency by host", ("host", "status")
+)
+SOURCE_FETCH_SECONDS = registry.histogram(
+    "ticker_source_fetch_duration_seconds", "Time to fetch one ticker source", ("source", "outcome"),
+    buckets=DEFAULT_BUCKETS + (30.0, 60.0)
+)
+SOURCE_CIRCUIT_SKIPS = registry.counter(
+    "ticker_source_circuit_skips", "Source fetches skipped while the source's circuit breaker was open", ("source",)
+)
+INGESTED_ITEMS = registry.counter(
+    "ticker_ingested_items", "Items persisted by source refreshes", ("source", "result")
+)
+WEBSOCKET_CONNECTIONS = registry.gauge(
+    "ticker_websocket_connections", "Connected ticker WebSocket clients"
+)
+BROADCAST_LAG_SECONDS = registry.histogram(
+    "ticker_broadcast_lag_seconds", "Delay between an item's creation and its broadcast",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+QUEUE_DEPTH = registry.gauge(
+    "background_queue_depth", "Items waiting in a background queue", ("queue",)
+)
+
+
+def describe_sql(query: str) -> Tuple[str, str]:
+    """(table, operation) labels for a SQL statement, cached per statement text"""
+    labels = _sql_labels.get(query)
+    if labels is None:
+        labels = _parse_sql(query)
+        if len(_sql_labels) < SQL_LABEL_CACHE_MAX:
+            _sql_labels[query] = labels
+    return labels
+
+
+def record_query(record):
+    """asyncpg query logger: time every statement run on a pooled connection"""
+    if not settings.metrics_enabled or record.query.startswith(POOL_RESET_QUERY_PREFIX):
+        return
+    table, operation = describe_sql(record.query)
+    DB_QUERY_SECONDS.labels("postgres", table, operation).observe(record.elapsed)
+    if record.exception is not None:
+        DB_QUERY_ERRORS.labels("postgres", table, operation).inc()
+
+
+def rest_query_labels(query) -> Tuple[str, str]:
+    """(table, operation) labels for a supabase-py request builder"""
+    path = getattr(query, "path", "") or ""
+    if path.startswith("/rpc/"):
+        return path[len("/rpc/"):], "call"
+    method = getattr(query, "http_method", "")
+    return path.lstrip("/") or "unknown", _REST_OPERATIONS.get(method, method.lower() or "unknown")
+
+
+# Private helpers
+
+_sql_labels: Dict[str, Tuple[str, str]] = {}
+
+_REST_OPERATIONS = {"GET": "select", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+
+_SQL_OPERATION = re.compile(r"^\W*(\w+)")
+_SQL_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+(?:public\.)?(\w+)", re.IGNORECASE)
+_SQL_FUNCTION = re.compile(r"\bSELECT\s+(?:\*\s+FROM\s+)?(\w+)\s*\(", re.IGNORECASE)
+
+
+def _parse_sql(query: str) -> Tuple[str, str]:
+    match = _SQL_OPERATION.match(query)
+    operation = match.group(1).lower() if match else "unknown"
+    function = _SQL_FUNCTION.search(query)
+    if operation == "select" and function and function.group(1).lower() not in ("count", "coalesce", "max", "now"):
+        return function.group(1), "call"
+    table = _SQL_TABLE.search(query)
+    return (table.group(1) if table else "none"), operation
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value != value:
+        return "NaN"
+    if isinstance(value, int) or (isinstance(value, float) and value.is_integer()):
+        return str(int(value))
+    return repr(float(value))
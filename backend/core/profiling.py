@@ -0,0 +1,290 @@
+"""
+Profiling - opt-in sampling profiler for individual requests
+
+A request is profiled when it carries a valid signed ``X-Profile`` header or
+is picked by ``profiling_sample_rate``. While at least one profiled request
+is in flight, a daemon thread wakes every ``profiling_interval_seconds`` and
+records the stack of each profiled request's task:
+
+- when the task is running on the event loop, the loop thread's real stack
+  from the task's coroutine down, so CPU work such as validation, scoring
+  and serialization shows up with its callees;
+- when the task is suspended, its chain of awaiting coroutines ending in
+  ``<await Future>`` (or whatever it waits on), so time spent on database,
+  PostgREST or HTTP calls is attributed to the await that is blocked.
+
+Samples are wall-clock and folded into the collapsed-stack format
+(``frame;frame;frame count`` per line) read by flamegraph.pl, speedscope and
+inferno. Profiles are written under ``logs/profiles/``. Without a profiled
+request there is no sampler thread; the middleware only checks a header and
+draws a random number.
+"""
+from typing import Any, Dict, List, Optional
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+import asyncio
+import hashlib
+import hmac
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+
+from loguru import logger
+
+from core.config import settings
+
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_HEADER = b"x-profile-id"
+
+PROFILE_SUFFIX = ".collapsed"
+
+# Profile file names: <id>_<METHOD>_<path slug>_<duration>ms.collapsed
+PROFILE_ID_PATTERN = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}$")
+PROFILE_NAME_PATTERN = re.compile(
+    r"^(?P<id>\d{8}T\d{6}-[0-9a-f]{8})_(?P<method>[A-Z]+)_(?P<path>[\w.-]*)_(?P<duration_ms>\d+)ms\.collapsed$"
+)
+
+# Frames kept per sample; deeper stacks are truncated
+MAX_STACK_DEPTH = 128
+
+
+def profile_token(purpose: str = "profile", ttl_seconds: int = 3600) -> str:
+    """Signed token for ``X-Profile`` (purpose "profile") or the admin endpoints ("admin")"""
+    expires = int(time.time()) + ttl_seconds
+    return f"{expires}.{_sign(purpose, expires)}"
+
+
+def verify_profile_token(token: Optional[str], purpose: str = "profile") -> bool:
+    """True when ``token`` was signed with the secret key for ``purpose`` and has not expired"""
+    if not token:
+        return False
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _sign(purpose, int(expires)))
+
+
+def profile_dir() -> Path:
+    return Path(settings.log_file).parent / "profiles"
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Captured profiles, newest first"""
+    profiles = []
+    directory = profile_dir()
+    if not directory.is_dir():
+        return profiles
+    for path in directory.glob(f"*{PROFILE_SUFFIX}"):
+        match = PROFILE_NAME_PATTERN.match(path.name)
+        if match is None:
+            continue
+        stat = path.stat()
+        profiles.append({
+            "id": match["id"],
+            "name": path.name,
+            "method": match["method"],
+            "path": "/" + match["path"].replace(".", "/"),
+            "duration_ms": int(match["duration_ms"]),
+            "size": stat.st_size,
+            "created_at": datetime.fromtimestamp(stat.st_mtime, timezone.utc).isoformat()
+        })
+    profiles.sort(key=lambda profile: profile["id"], reverse=True)
+    return profiles
+
+
+def find_profile(profile_id: str) -> Optional[Path]:
+    """The file of a profile by id, or None for unknown or malformed ids"""
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    return next(profile_dir().glob(f"{profile_id}_*{PROFILE_SUFFIX}"), None)
+
+
+class ProfileSession:
+    """Samples collected for one request's task"""
+    
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.stacks: Counter = Counter()
+        self.samples = 0
+    
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class SamplingProfiler:
+    """Samples the stacks of registered tasks from a background thread"""
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._sessions: Dict[asyncio.Task, ProfileSession] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._labels: Dict[Any, str] = {}
+    
+    @property
+    def active(self) -> int:
+        return len(self._sessions)
+    
+    def begin(self) -> ProfileSession:
+        """Start sampling the current task; must be called on the event loop"""
+        task = asyncio.current_task()
+        session = ProfileSession(task)
+        with self._lock:
+            self._loop = asyncio.get_running_loop()
+            self._loop_thread_id = threading.get_ident()
+            self._sessions[task] = session
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        return session
+    
+    def end(self, session: ProfileSession):
+        with self._lock:
+            self._sessions.pop(session.task, None)
+    
+    # Private helper methods
+    
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                sessions = list(self._sessions.values())
+                if not sessions:
+                    # The next begin() starts a new thread
+                    self._thread = None
+                    return
+            try:
+                self._sample(sessions)
+            except Exception as e:  # a frame can vanish mid-walk; drop the sample
+                logger.debug(f"Profiler sample skipped: {e}")
+    
+    def _sample(self, sessions: List[ProfileSession]):
+        running = asyncio.current_task(self._loop)
+        for session in sessions:
+            if session.task is running:
+                frames = self._running_stack(session.task)
+            else:
+                frames = self._awaiting_stack(session.task)
+            if frames:
+                session.stacks[";".join(frames)] += 1
+                session.samples += 1
+    
+    def _running_stack(self, task: asyncio.Task) -> List[str]:
+        """Loop thread stack from the task's outermost coroutine to the leaf"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        root = task.get_coro().cr_frame
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(self._label(frame))
+            if frame is root:
+                break
+            frame = frame.f_back
+        labels.reverse()
+        return labels
+    
+    def _awaiting_stack(self, task: asyncio.Task) -> List[str]:
+        """Chain of suspended coroutines, ending in what the innermost one awaits"""
+        labels = []
+        awaitable = task.get_coro()
+        while awaitable is not None and len(labels) < MAX_STACK_DEPTH:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                # C futures are awaited through their FutureIter
+                labels.append(f"<await {type(awaitable).__name__.removesuffix('Iter')}>")
+                break
+            labels.append(self._label(frame))
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        return labels
+    
+    def _label(self, frame) -> str:
+        code = frame.f_code
+        label = self._labels.get(code)
+        if label is None:
+            module = frame.f_globals.get("__name__", "?")
+            label = self._labels[code] = f"{module}.{code.co_name}:{code.co_firstlineno}"
+        return label
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests on demand
+    
+    A request is profiled when its ``X-Profile`` header holds a token from
+    ``profile_token()`` or it falls within ``profiling_sample_rate``. The
+    profile id is returned in the ``X-Profile-Id`` response header.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+        
+        profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{secrets.token_hex(4)}"
+        
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), (PROFILE_ID_HEADER, profile_id.encode())]
+            await send(message)
+        
+        session = profiler.begin()
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.end(session)
+            duration = perf_counter() - started
+            if session.samples:
+                await asyncio.to_thread(_write_profile, profile_id, scope, duration, session.collapsed())
+    
+    # Private helper methods
+    
+    def _requested(self, scope) -> bool:
+        rate = settings.profiling_sample_rate
+        if rate and random.random() < rate:
+            return True
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return verify_profile_token(value.decode("latin-1"))
+        return False
+
+
+# Private helpers
+
+def _sign(purpose: str, expires: int) -> str:
+    message = f"{purpose}:{expires}".encode()
+    return hmac.new(settings.secret_key.encode(), message, hashlib.sha256).hexdigest()
+
+
+def _write_profile(profile_id: str, scope, duration: float, collapsed: str):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^\w-]+", ".", scope["path"].strip("/"))[:80]
+    name = f"{profile_id}_{scope['method']}_{slug}_{round(duration * 1e3)}ms{PROFILE_SUFFIX}"
+    (directory / name).write_text(collapsed)
+    logger.info(f"Profile {profile_id} written for {scope['method']} {scope['path']} ({duration * 1e3:.0f} ms)")
+    
+    # Keep the newest profiling_max_files profiles
+    files = sorted(directory.glob(f"*{PROFILE_SUFFIX}"), key=lambda path: path.name, reverse=True)
+    for stale in files[settings.profiling_max_files:]:
+        stale.unlink(missing_ok=True)
+
+
+# Global profiler instance
+profiler = SamplingProfiler(settings.profiling_interval_seconds)
+
+
+if __name__ == "__main__":
+    # python -m core.profiling [profile|admin] [ttl_seconds]
+    purpose = sys.argv[1] if len(sys.argv) > 1 else "profile"
+    ttl = int(sys.argv[2]) if len(sys.argv) > 2 else 3600
+    print(profile_token(purpose, ttl))
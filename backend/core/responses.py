@@ -0,0 +1,86 @@
+"""
+Response classes and caching for pre-encoded payloads
+"""
+from typing import Any, Optional
+from collections import OrderedDict
+import hashlib
+import time
+from fastapi.responses import JSONResponse
+
+
+class PreEncodedJSONResponse(JSONResponse):
+    """JSON response that writes already-encoded bytes straight out
+    
+    Returning one from an endpoint skips FastAPI's response_model
+    validation and re-encoding; response_model is still used for the
+    OpenAPI schema. Content that is not bytes is encoded as usual.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return super().render(content)
+
+
+class EncodedResponse:
+    """An encoded body with its strong ETag"""
+    
+    __slots__ = ("body", "etag", "version", "expires_at")
+    
+    def __init__(self, body: bytes, version: Optional[int] = None, ttl: Optional[float] = None):
+        self.body = body
+        self.etag = body_etag(body)
+        self.version = version
+        self.expires_at = time.monotonic() + ttl if ttl is not None else None
+
+
+class EncodedResponseCache:
+    """Encoded GET responses keyed by request, each valid for one data version
+    
+    An entry is served until the version it was built at changes or its
+    ttl runs out, whichever is first. Least recently used entries are
+    evicted beyond ``max_entries``.
+    """
+    
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, EncodedResponse]" = OrderedDict()
+    
+    def get(self, key: str, version: int) -> Optional[EncodedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.version != version or (entry.expires_at is not None and entry.expires_at <= time.monotonic()):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+    
+    def put(self, key: str, entry: EncodedResponse):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self):
+        self._entries.clear()
+
+
+def body_etag(body: bytes) -> str:
+    """Strong ETag derived from the exact response bytes"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak comparison, as RFC 9110 requires for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
@@ -95,6 +95,23 @@ CREATE TABLE IF NOT EXISTS public.cia_templates (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- =====================================================
+-- Campaign Tables
+-- =====================================================
+
+-- Campaign Metrics: append-only metric samples per campaign (e.g. from Google Ads).
+-- The performance alert engine reads new rows in id order.
+CREATE TABLE IF NOT EXISTS public.campaign_metrics (
+    id BIGSERIAL PRIMARY KEY,
+    user_id UUID REFERENCES public.user_profiles(id) ON DELETE CASCADE,
+    campaign_id TEXT NOT NULL,
+    campaign_name TEXT,
+    metric_name TEXT NOT NULL, -- ctr, conversions, cost_per_conversion, etc.
+    value DOUBLE PRECISION NOT NULL,
+    recorded_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
 -- =====================================================
 -- Indexes for Performance
 -- =====================================================
@@ -106,6 +123,8 @@ CREATE INDEX idx_cia_phase_responses_session_id ON public.cia_phase_responses(se
 CREATE INDEX idx_cia_phase_responses_phase ON public.cia_phase_responses(phase_number);
 CREATE INDEX idx_cia_master_archives_user_id ON public.cia_master_archives(user_id);
 CREATE INDEX idx_cia_master_archives_session_id ON public.cia_master_archives(session_id);
+CREATE INDEX idx_campaign_metrics_user_id ON public.campaign_metrics(user_id);
+CREATE INDEX idx_campaign_metrics_series ON public.campaign_metrics(campaign_id, metric_name, recorded_at DESC);
 
 -- =====================================================
 -- Row Level Security (RLS) Policies
@@ -117,6 +136,7 @@ ALTER TABLE public.cia_sessions ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.cia_phase_responses ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.cia_master_archives ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.cia_templates ENABLE ROW LEVEL SECURITY;
+ALTER TABLE public.campaign_metrics ENABLE ROW LEVEL SECURITY;
 
 -- User Profiles: Users can only see and edit their own profile
 CREATE POLICY "Users can view own profile" ON public.user_profiles
@@ -174,6 +194,10 @@ CREATE POLICY "Users can update own templates" ON public.cia_templates
 CREATE POLICY "Users can delete own templates" ON public.cia_templates
     FOR DELETE USING (auth.uid() = user_id AND is_default = false);
 
+-- Campaign Metrics: Users can only see metrics for their own campaigns
+CREATE POLICY "Users can view own campaign metrics" ON public.campaign_metrics
+    FOR SELECT USING (auth.uid() = user_id);
+
 -- =====================================================
 -- Functions and Triggers
 -- =====================================================
@@ -17,6 +17,12 @@ CREATE TABLE IF NOT EXISTS public.ticker_items (
     source_data JSONB DEFAULT '{}',
     is_active BOOLEAN DEFAULT true,
     expires_at TIMESTAMPTZ,
+    -- Owner of a personal item (e.g. precomputed insights); NULL for items everyone sees
+    user_id UUID REFERENCES public.user_profiles(id) ON DELETE CASCADE,
+    -- Stable content identity for idempotent ingestion (NULL for items without an external ID)
+    dedupe_key TEXT GENERATED ALWAYS AS (
+        (source_data->>'source') || ':' || COALESCE(source_data->>'hn_id', source_data->>'external_id')
+    ) STORED,
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
@@ -63,6 +69,16 @@ CREATE TABLE IF NOT EXISTS public.ticker_engagement (
     metadata JSONB DEFAULT '{}'
 );
 
+-- Change log of ticker_items, one row per insert, update or deactivation.
+-- seq orders the changes for LISTEN/NOTIFY consumers (services/ticker_changes.py)
+-- and lets them catch up on anything missed while disconnected.
+CREATE TABLE IF NOT EXISTS public.ticker_item_changes (
+    seq BIGSERIAL PRIMARY KEY,
+    item_id UUID NOT NULL,
+    op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'deactivate')),
+    changed_at TIMESTAMPTZ DEFAULT NOW()
+);
+
 -- =====================================================
 -- Indexes for Performance
 -- =====================================================
@@ -72,6 +88,25 @@ CREATE INDEX idx_ticker_items_priority ON public.ticker_items(priority);
 CREATE INDEX idx_ticker_items_active ON public.ticker_items(is_active);
 CREATE INDEX idx_ticker_items_created_at ON public.ticker_items(created_at DESC);
 CREATE INDEX idx_ticker_items_expires_at ON public.ticker_items(expires_at);
+CREATE UNIQUE INDEX idx_ticker_items_dedupe_key ON public.ticker_items(dedupe_key);
+
+-- Keyset pagination: each feed page is a range scan on (sort key..., id)
+CREATE INDEX idx_ticker_items_feed_recent ON public.ticker_items(created_at DESC, id DESC)
+    WHERE is_active = true;
+CREATE INDEX idx_ticker_items_feed_priority ON public.ticker_items(priority, created_at DESC, id DESC)
+    WHERE is_active = true;
+CREATE INDEX idx_ticker_items_feed_category_recent ON public.ticker_items(category, created_at DESC, id DESC)
+    WHERE is_active = true;
+CREATE INDEX idx_ticker_items_feed_category_priority ON public.ticker_items(category, priority, created_at DESC, id DESC)
+    WHERE is_active = true;
+
+CREATE INDEX idx_ticker_items_user_id ON public.ticker_items(user_id, category)
+    WHERE user_id IS NOT NULL;
+
+-- Incremental sync of the in-process feed store (services/ticker_store.py)
+CREATE INDEX idx_ticker_items_updated_at ON public.ticker_items(updated_at);
+
+CREATE INDEX idx_ticker_item_changes_changed_at ON public.ticker_item_changes(changed_at);
 
 CREATE INDEX idx_ticker_sources_category ON public.ticker_sources(category);
 CREATE INDEX idx_ticker_sources_enabled ON public.ticker_sources(is_enabled);
@@ -80,6 +115,7 @@ CREATE INDEX idx_ticker_sources_last_fetch ON public.ticker_sources(last_fetch_a
 CREATE INDEX idx_ticker_engagement_user_id ON public.ticker_engagement(user_id);
 CREATE INDEX idx_ticker_engagement_item_id ON public.ticker_engagement(ticker_item_id);
 CREATE INDEX idx_ticker_engagement_timestamp ON public.ticker_engagement(action_timestamp DESC);
+CREATE INDEX idx_ticker_engagement_user_item ON public.ticker_engagement(user_id, ticker_item_id);
 
 -- =====================================================
 -- Row Level Security (RLS) Policies
@@ -90,10 +126,16 @@ ALTER TABLE public.ticker_items ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.ticker_sources ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.ticker_preferences ENABLE ROW LEVEL SECURITY;
 ALTER TABLE public.ticker_engagement ENABLE ROW LEVEL SECURITY;
+-- No policies: the change log is only read by the backend's direct connection
+ALTER TABLE public.ticker_item_changes ENABLE ROW LEVEL SECURITY;
 
 -- Ticker Items: All authenticated users can view active items
 CREATE POLICY "Users can view active ticker items" ON public.ticker_items
-    FOR SELECT USING (is_active = true AND (expires_at IS NULL OR expires_at > NOW()));
+    FOR SELECT USING (
+        is_active = true
+        AND (expires_at IS NULL OR expires_at > NOW())
+        AND (user_id IS NULL OR user_id = auth.uid())
+    );
 
 -- Ticker Sources: Only admins can manage (implement admin check)
 CREATE POLICY "Admins can manage ticker sources" ON public.ticker_sources
@@ -136,15 +178,36 @@ BEGIN
        OR (created_at < NOW() - INTERVAL '24 hours' AND priority > 3);
     
     GET DIAGNOSTICS deleted_count = ROW_COUNT;
+    
+    -- Consumers only catch up over short disconnects
+    DELETE FROM public.ticker_item_changes
+    WHERE changed_at < NOW() - INTERVAL '24 hours';
+    
     RETURN deleted_count;
 END;
 $$ LANGUAGE plpgsql;
 
--- Function to calculate ticker item relevance score
+-- Score added per engagement of each kind by the requesting user
+-- (kept in step with DEFAULT_ENGAGEMENT_WEIGHTS in services/ticker_ranking.py)
+CREATE OR REPLACE FUNCTION ticker_engagement_weight(p_action TEXT)
+RETURNS FLOAT AS $$
+    SELECT CASE p_action
+        WHEN 'click' THEN 5.0
+        WHEN 'share' THEN 5.0
+        WHEN 'view' THEN 1.0
+        WHEN 'dismiss' THEN -25.0
+        ELSE 0.0
+    END::FLOAT;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Function to calculate ticker item relevance score. The engagement score is
+-- the sum of ticker_engagement_weight() over the user's engagements. (Dropped
+-- first because it used to take a plain engagement count.)
+DROP FUNCTION IF EXISTS calculate_ticker_relevance(INTEGER, TIMESTAMPTZ, INTEGER);
 CREATE OR REPLACE FUNCTION calculate_ticker_relevance(
     item_priority INTEGER,
     item_created_at TIMESTAMPTZ,
-    user_engagement_count INTEGER DEFAULT 0
+    user_engagement_score FLOAT DEFAULT 0
 ) RETURNS FLOAT AS $$
 DECLARE
     age_hours FLOAT;
@@ -160,11 +223,75 @@ BEGIN
     relevance_score := relevance_score * (1 / (1 + age_hours / 24));
     
     -- Engagement boost
-    relevance_score := relevance_score + (user_engagement_count * 5);
+    relevance_score := relevance_score + user_engagement_score;
     
     RETURN relevance_score;
 END;
-$$ LANGUAGE plpgsql;
+$$ LANGUAGE plpgsql STABLE;
+
+-- Function to return the top K ticker items by relevance for a user.
+-- Candidates are bounded to recent items plus the top priority tiers, and
+-- engagement scores come only from the user's own rows in ticker_engagement.
+-- Personal items are only returned to their owner. (Dropped first because
+-- the result columns changed.)
+DROP FUNCTION IF EXISTS get_ranked_ticker_items(UUID, INTEGER, TEXT[], INTEGER, BOOLEAN, INTEGER, INTEGER);
+CREATE OR REPLACE FUNCTION get_ranked_ticker_items(
+    p_user_id UUID DEFAULT NULL,
+    p_limit INTEGER DEFAULT 50,
+    p_categories TEXT[] DEFAULT NULL,
+    p_priority_filter INTEGER DEFAULT NULL,
+    p_include_expired BOOLEAN DEFAULT false,
+    p_window_hours INTEGER DEFAULT 72,
+    p_priority_tier INTEGER DEFAULT 2
+) RETURNS TABLE (
+    id UUID,
+    category TEXT,
+    title TEXT,
+    description TEXT,
+    icon_name TEXT,
+    type TEXT,
+    priority INTEGER,
+    source_data JSONB,
+    is_active BOOLEAN,
+    expires_at TIMESTAMPTZ,
+    user_id UUID,
+    created_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ,
+    relevance_score FLOAT
+) AS $$
+    WITH candidates AS (
+        SELECT t.*
+        FROM public.ticker_items t
+        WHERE t.is_active = true
+          AND (p_include_expired OR t.expires_at IS NULL OR t.expires_at > NOW())
+          AND (p_categories IS NULL OR t.category = ANY(p_categories))
+          AND (p_priority_filter IS NULL OR t.priority <= p_priority_filter)
+          AND (t.user_id IS NULL OR t.user_id = p_user_id)
+          AND (
+              t.created_at > NOW() - make_interval(hours => p_window_hours)
+              OR t.priority <= p_priority_tier
+          )
+    ),
+    engagement AS (
+        SELECT e.ticker_item_id, SUM(ticker_engagement_weight(e.action)) AS engagement_score
+        FROM public.ticker_engagement e
+        WHERE p_user_id IS NOT NULL
+          AND e.user_id = p_user_id
+          AND e.ticker_item_id IN (SELECT c.id FROM candidates c)
+        GROUP BY e.ticker_item_id
+    )
+    SELECT
+        c.id, c.category, c.title, c.description, c.icon_name, c.type,
+        c.priority, c.source_data, c.is_active, c.expires_at,
+        c.user_id, c.created_at, c.updated_at,
+        calculate_ticker_relevance(
+            c.priority, c.created_at, COALESCE(e.engagement_score, 0)
+        ) AS relevance_score
+    FROM candidates c
+    LEFT JOIN engagement e ON e.ticker_item_id = c.id
+    ORDER BY relevance_score DESC, c.created_at DESC, c.id DESC
+    LIMIT p_limit;
+$$ LANGUAGE sql STABLE;
 
 -- Apply update triggers to ticker tables
 CREATE TRIGGER update_ticker_items_updated_at BEFORE UPDATE ON public.ticker_items
@@ -176,6 +303,51 @@ CREATE TRIGGER update_ticker_sources_updated_at BEFORE UPDATE ON public.ticker_s
 CREATE TRIGGER update_ticker_preferences_updated_at BEFORE UPDATE ON public.ticker_preferences
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Record each ticker_items change and notify listeners. The payload carries
+-- the row as JSON unless it would exceed NOTIFY's 8000 byte limit, in which
+-- case listeners read the row back by seq.
+CREATE OR REPLACE FUNCTION notify_ticker_item_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    change_op TEXT;
+    change_seq BIGINT;
+    item JSONB;
+    payload TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        change_op := 'insert';
+        item := to_jsonb(NEW);
+    ELSIF TG_OP = 'DELETE' THEN
+        change_op := 'deactivate';
+        item := NULL;
+    ELSIF NEW.is_active = false AND OLD.is_active = true THEN
+        change_op := 'deactivate';
+        item := to_jsonb(NEW);
+    ELSE
+        change_op := 'update';
+        item := to_jsonb(NEW);
+    END IF;
+    
+    INSERT INTO public.ticker_item_changes (item_id, op)
+    VALUES (COALESCE(NEW.id, OLD.id), change_op)
+    RETURNING seq INTO change_seq;
+    
+    payload := jsonb_build_object(
+        'seq', change_seq, 'op', change_op, 'id', COALESCE(NEW.id, OLD.id), 'row', item
+    )::TEXT;
+    IF octet_length(payload) > 7900 THEN
+        payload := jsonb_build_object(
+            'seq', change_seq, 'op', change_op, 'id', COALESCE(NEW.id, OLD.id), 'truncated', true
+        )::TEXT;
+    END IF;
+    PERFORM pg_notify('ticker_items_changes', payload);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER notify_ticker_items_change AFTER INSERT OR UPDATE OR DELETE ON public.ticker_items
+    FOR EACH ROW EXECUTE FUNCTION notify_ticker_item_change();
+
 -- =====================================================
 -- Initial Data Seeding
 -- =====================================================
@@ -184,7 +356,7 @@ CREATE TRIGGER update_ticker_preferences_updated_at BEFORE UPDATE ON public.tick
 INSERT INTO public.ticker_sources (category, source_name, source_type, endpoint_url, refresh_interval_minutes, is_enabled, config)
 VALUES 
     ('general', 'hacker_news', 'api', 'https://hacker-news.firebaseio.com/v0', 15, true, 
-     '{"item_limit": 10, "min_score": 100, "keywords": ["AI", "marketing", "business", "startup", "SEO", "growth"]}'),
+     '{"item_limit": 10, "min_score": 100, "concurrency": 10, "item_timeout_seconds": 5, "keywords": ["AI", "marketing", "business", "startup", "SEO", "growth"]}'),
     
     ('general', 'tech_news', 'api', 'https://newsapi.org/v2/top-headlines', 30, true,
      '{"category": "technology", "country": "us", "page_size": 20}'),
@@ -1,22 +1,59 @@
 """
 Brand BOS Backend API - Main Entry Point
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
 from loguru import logger
 
 from core.config import settings
-from core.database import init_supabase
+from core.database import init_supabase, init_db_pool, close_db_pool
+from core.metrics import CONTENT_TYPE, QUEUE_DEPTH, WEBSOCKET_CONNECTIONS, MetricsMiddleware, registry
+from core.profiling import ProfilingMiddleware
+from core.leader import leader_election
+
+from services.ticker_service import ticker_service
+from services.ticker_store import ticker_store
+from services.ticker_broadcaster import ticker_broadcaster
+from services.ticker_changes import ticker_changes
+from services.ticker_stream import ticker_stream_relay
+from services.engagement_buffer import engagement_buffer
+from services.source_scheduler import source_scheduler
+from services.refresh_coordinator import refresh_coordinator
+from services.insight_pipeline import insight_pipeline
+from services.feed_snapshot import feed_snapshot_publisher, feed_snapshot_reader
+from services.seen_index import seen_index
 
 # Import routers
 from api.ticker import router as ticker_router
+from api.admin import router as admin_router
 # from api.cia import router as cia_router
 # from api.auth import router as auth_router
 # from api.content import router as content_router
 
 
+async def start_leader_services():
+    """Start the work done once per host, by the leader when there are several workers"""
+    # Load the in-memory feed store (feeds read the database until it is warm)
+    if settings.ticker_store_enabled:
+        ticker_store.follow(None)
+        await ticker_store.start()
+        if settings.workers > 1:
+            await feed_snapshot_publisher.start()
+    
+    # Remember which source items were already ingested, before any refresh
+    await seen_index.start()
+    
+    # Start interval-based source refreshes
+    if settings.scheduler_enabled:
+        await source_scheduler.start()
+    
+    # Start periodic insight precompute for active users
+    if settings.insight_precompute_enabled:
+        await insight_pipeline.start()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle startup and shutdown events"""
@@ -32,10 +69,45 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to initialize Supabase: {e}")
     
+    # Initialize direct Postgres pool (optional)
+    await init_db_pool()
+    
+    # Listen for ticker_items changes (requires DATABASE_URL)
+    await ticker_changes.start()
+    
+    # With several workers, followers read the leader's feed snapshot and
+    # take over the leader's work if it exits
+    if settings.workers > 1:
+        if settings.ticker_store_enabled:
+            ticker_store.follow(feed_snapshot_reader)
+        await leader_election.start(start_leader_services)
+    else:
+        await start_leader_services()
+    
+    # Start shared WebSocket broadcaster and the SSE relay
+    await ticker_broadcaster.start()
+    await ticker_stream_relay.start()
+    
+    # Start engagement write-behind buffer
+    await engagement_buffer.start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Brand BOS Backend...")
+    await source_scheduler.stop()
+    await insight_pipeline.stop()
+    await refresh_coordinator.stop()
+    await seen_index.stop()
+    await ticker_broadcaster.stop()
+    await ticker_stream_relay.stop()
+    await engagement_buffer.stop()
+    await feed_snapshot_publisher.stop()
+    await ticker_store.stop()
+    await leader_election.stop()
+    await ticker_changes.stop()
+    await ticker_service.aclose()
+    await close_db_pool()
 
 
 # Create FastAPI app
@@ -55,6 +127,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record request latency per route
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+# Profile requests that ask for it (X-Profile) or are sampled
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+# Gauges read when /metrics is scraped
+WEBSOCKET_CONNECTIONS.set_function(lambda: ticker_broadcaster.subscriber_count)
+QUEUE_DEPTH.labels("engagement_buffer").set_function(lambda: engagement_buffer.pending)
+QUEUE_DEPTH.labels("websocket_frames").set_function(lambda: ticker_broadcaster.queued_frames)
+QUEUE_DEPTH.labels("stream_events").set_function(lambda: ticker_stream_relay.queued_events)
+QUEUE_DEPTH.labels("insight_precompute").set_function(lambda: insight_pipeline.pending)
+
 # Configure logging
 logger.add(
     settings.log_file,
@@ -95,8 +182,15 @@ async def health_check():
     return health_status
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
 # Include routers
 app.include_router(ticker_router, prefix="/api/ticker", tags=["Ticker Feed"])
+app.include_router(admin_router, prefix="/api/admin", tags=["Admin"])
 # app.include_router(cia_router, prefix="/api/cia", tags=["CIA System"])
 # app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
 # app.include_router(content_router, prefix="/api/content", tags=["Content"])
@@ -107,6 +201,7 @@ if __name__ == "__main__":
         "main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug,
+        reload=settings.debug and settings.workers == 1,
+        workers=settings.workers,
         log_level=settings.log_level.lower()
     )
\ No newline at end of file
@@ -1,11 +1,12 @@
 """
 Ticker System Pydantic Models
 """
-from typing import List, Optional, Dict, Any, Literal
+from typing import List, Optional, Dict, Any, Literal, Mapping
 from datetime import datetime
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, PrivateAttr, validator
 from uuid import UUID, uuid4
 from enum import Enum
+import orjson
 
 
 class TickerCategory(str, Enum):
@@ -50,6 +51,7 @@ class TickerItemBase(BaseModel):
     priority: int = Field(ge=1, le=5, default=3)
     source_data: Dict[str, Any] = Field(default_factory=dict)
     expires_at: Optional[datetime] = None
+    user_id: Optional[UUID] = None  # Set for items only their owner sees
 
 
 class TickerItemCreate(TickerItemBase):
@@ -74,8 +76,78 @@ class TickerItem(TickerItemBase):
     updated_at: datetime
     relevance_score: Optional[float] = None
     
+    # Cached compact JSON; items are not modified once encoded
+    _json: Optional[bytes] = PrivateAttr(default=None)
+    
     class Config:
         from_attributes = True
+    
+    @classmethod
+    def from_row(cls, row: Mapping[str, Any]) -> "TickerItem":
+        """Build from a ticker_items row read from our own database without validation
+        
+        Sets the instance state directly, as model_construct() does, but
+        without its per-field bookkeeping. Rows with unparsed values
+        (PostgREST returns timestamps as strings) are validated instead.
+        """
+        if not isinstance(row["created_at"], datetime):
+            return cls(**row)
+        
+        item = cls.__new__(cls)
+        _object_setattr(item, "__dict__", {
+            "category": _CATEGORIES[row["category"]],
+            "title": row["title"],
+            "description": row["description"],
+            "icon_name": row["icon_name"],
+            "type": _TYPES[row["type"]],
+            "priority": row["priority"],
+            "source_data": row["source_data"] or {},
+            "expires_at": row["expires_at"],
+            "user_id": row.get("user_id"),
+            "id": row["id"],
+            "is_active": row["is_active"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "relevance_score": row.get("relevance_score")
+        })
+        _object_setattr(item, "__pydantic_fields_set__", set(_TICKER_ITEM_FIELDS))
+        _object_setattr(item, "__pydantic_extra__", None)
+        _object_setattr(item, "__pydantic_private__", {"_json": None})
+        return item
+    
+    def json_bytes(self) -> bytes:
+        """Compact JSON encoding, computed once per instance"""
+        # Private attributes are read through BaseModel.__getattr__, which
+        # is slow enough to matter here, so use the underlying dict
+        private = self.__pydantic_private__
+        encoded = private["_json"]
+        if encoded is None:
+            try:
+                encoded = orjson.dumps(self.__dict__, default=_json_default, option=orjson.OPT_UTC_Z)
+            except orjson.JSONEncodeError:
+                # source_data holding something orjson can't encode
+                encoded = self.__pydantic_serializer__.to_json(self)
+            private["_json"] = encoded
+        return encoded
+
+
+_object_setattr = object.__setattr__
+_CATEGORIES = {category.value: category for category in TickerCategory}
+_TYPES = {ticker_type.value: ticker_type for ticker_type in TickerType}
+_TICKER_ITEM_FIELDS = frozenset(TickerItem.model_fields)
+
+
+def _json_default(value: Any) -> Any:
+    # asyncpg returns ids as its own UUID subclass, which orjson only
+    # encodes natively when it is exactly uuid.UUID
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError
+
+
+def ticker_items_json(items: List[TickerItem]) -> bytes:
+    """Encode a list of items from their cached per-item JSON"""
+    return b"[" + b",".join(item.json_bytes() for item in items) + b"]"
 
 
 # Ticker Source Models
@@ -161,6 +233,11 @@ class TickerEngagementCreate(BaseModel):
     metadata: Dict[str, Any] = Field(default_factory=dict)
 
 
+class TickerEngagementBatch(BaseModel):
+    """Model for submitting many engagement records at once"""
+    events: List[TickerEngagementCreate] = Field(min_length=1, max_length=1000)
+
+
 class TickerEngagement(BaseModel):
     """Complete engagement model"""
     id: UUID = Field(default_factory=uuid4)
@@ -180,7 +257,18 @@ class TickerFeedResponse(BaseModel):
     items: List[TickerItem]
     total_count: int
     has_more: bool
-    last_updated: datetime
+    next_cursor: Optional[str] = None
+    last_updated: Optional[datetime] = None
+    
+    def json_bytes(self) -> bytes:
+        """Compact JSON encoding that reuses each item's cached encoding"""
+        rest = orjson.dumps({
+            "total_count": self.total_count,
+            "has_more": self.has_more,
+            "next_cursor": self.next_cursor,
+            "last_updated": self.last_updated
+        }, option=orjson.OPT_UTC_Z)
+        return b'{"items":' + ticker_items_json(self.items) + b"," + rest[1:]
 
 
 class TickerInsight(BaseModel):
@@ -210,6 +298,7 @@ class TickerFeedRequest(BaseModel):
     priority_filter: Optional[int] = Field(None, ge=1, le=5)
     include_expired: bool = False
     sort_by: Literal["relevance", "created_at", "priority"] = "relevance"
+    cursor: Optional[str] = None
 
 
 class GenerateInsightsRequest(BaseModel):
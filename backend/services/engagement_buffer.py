@@ -0,0 +1,185 @@
+"""
+Engagement Buffer - write-behind ingestion for ticker engagement events
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime, timezone
+import asyncio
+import itertools
+from loguru import logger
+
+from core.config import settings
+from core.database import get_db_pool, get_supabase_admin, execute_async
+from models.ticker import TickerAction, TickerEngagementCreate
+
+
+# Rows referencing users or items that no longer exist are skipped instead
+# of failing the whole batch on the foreign keys.
+INSERT_ENGAGEMENT_SQL = """
+    INSERT INTO public.ticker_engagement (user_id, ticker_item_id, action, action_timestamp, metadata)
+    SELECT u.user_id, u.ticker_item_id, u.action, u.action_timestamp, u.metadata
+    FROM unnest($1::uuid[], $2::uuid[], $3::text[], $4::timestamptz[], $5::jsonb[])
+        AS u(user_id, ticker_item_id, action, action_timestamp, metadata)
+    WHERE EXISTS (SELECT 1 FROM public.ticker_items t WHERE t.id = u.ticker_item_id)
+      AND EXISTS (SELECT 1 FROM public.user_profiles p WHERE p.id = u.user_id)
+"""
+
+# (user_id, ticker_item_id, action, action_timestamp, metadata)
+EngagementRecord = Tuple[Any, Any, str, datetime, Dict[str, Any]]
+
+
+class EngagementBuffer:
+    """In-process buffer that accepts engagement events in O(1) and flushes in bulk
+    
+    Events are flushed when ``flush_size`` are pending or every
+    ``flush_interval`` seconds. Repeated views of the same item by the same
+    user collapse into one pending record. ``max_pending`` bounds memory;
+    events beyond it are rejected so callers can shed load.
+    """
+    
+    def __init__(
+        self,
+        flush_size: int = settings.engagement_flush_size,
+        flush_interval: float = settings.engagement_flush_seconds,
+        max_pending: int = settings.engagement_buffer_max
+    ):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[Any, ...], EngagementRecord] = {}
+        self._sequence = itertools.count()
+        self._flush_needed = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._admin_client = None
+        self.stats = {"accepted": 0, "collapsed": 0, "rejected": 0, "written": 0, "failed": 0}
+    
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+    
+    def add(self, event: TickerEngagementCreate) -> bool:
+        """Queue one event; returns False if the buffer is full"""
+        if event.action == TickerAction.VIEW:
+            key = ("view", event.user_id, event.ticker_item_id)
+            if key in self._pending:
+                self.stats["collapsed"] += 1
+                return True
+        else:
+            key = (next(self._sequence),)
+        
+        if len(self._pending) >= self.max_pending:
+            self.stats["rejected"] += 1
+            return False
+        
+        self._pending[key] = (
+            event.user_id,
+            event.ticker_item_id,
+            event.action.value,
+            datetime.now(timezone.utc),
+            event.metadata
+        )
+        self.stats["accepted"] += 1
+        
+        if len(self._pending) >= self.flush_size:
+            self._flush_needed.set()
+        return True
+    
+    def add_many(self, events: Iterable[TickerEngagementCreate]) -> int:
+        """Queue many events; returns how many were accepted"""
+        return sum(1 for event in events if self.add(event))
+    
+    async def start(self):
+        """Start the background flusher"""
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+            logger.info("Engagement buffer started")
+    
+    async def stop(self):
+        """Stop the flusher and drain everything still pending"""
+        if self._task is not None:
+            # Let an in-flight flush finish rather than cancelling mid-write
+            self._stopping = True
+            self._flush_needed.set()
+            await self._task
+            self._task = None
+        
+        while self._pending:
+            if not await self.flush():
+                break
+        logger.info(f"Engagement buffer drained ({self.stats['written']} events written)")
+    
+    async def flush(self) -> int:
+        """Write all pending events; returns the number written"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            
+            records = list(self._pending.values())
+            self._pending = {}
+            self._flush_needed.clear()
+            
+            written = 0
+            for start in range(0, len(records), self.flush_size):
+                chunk = records[start:start + self.flush_size]
+                try:
+                    written += await self._write(chunk)
+                except Exception as e:
+                    logger.error(f"Error writing {len(chunk)} engagement events: {e}")
+                    self.stats["failed"] += len(chunk)
+            
+            self.stats["written"] += written
+            return written
+    
+    # Private helper methods
+    
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._flush_needed.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping:
+                break
+            
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Engagement flush failed: {e}")
+    
+    async def _write(self, records: List[EngagementRecord]) -> int:
+        """Insert one chunk in a single round trip; returns rows written"""
+        pool = get_db_pool()
+        if pool is not None:
+            user_ids, item_ids, actions, timestamps, metadata = zip(*records)
+            status = await pool.execute(
+                INSERT_ENGAGEMENT_SQL,
+                list(user_ids),
+                list(item_ids),
+                list(actions),
+                list(timestamps),
+                list(metadata)
+            )
+            # Status is "INSERT 0 <rows>"
+            return int(status.split()[-1])
+        
+        if self._admin_client is None:
+            self._admin_client = get_supabase_admin()
+        await execute_async(
+            self._admin_client.table("ticker_engagement").insert([
+                {
+                    "user_id": str(user_id),
+                    "ticker_item_id": str(item_id),
+                    "action": action,
+                    "action_timestamp": timestamp.isoformat(),
+                    "metadata": metadata
+                }
+                for user_id, item_id, action, timestamp, metadata in records
+            ])
+        )
+        return len(records)
+
+
+# Singleton instance
+engagement_buffer = EngagementBuffer()
@@ -0,0 +1,473 @@
+"""
+Feed Snapshot - the live ticker feed shared between worker processes via mmap
+
+In multi-worker mode the leader worker keeps the ticker store in sync and,
+whenever the store's version changes, publishes it as a snapshot file:
+
+    header   magic, snapshot version, record count, where the source names
+             are, per-category index offsets
+    records  one fixed-size struct per item in recency order: sort keys,
+             filter and ranking fields and where its JSON is
+    indexes  per category, record numbers in recency and in priority order
+    sources  JSON array of the source names records refer to by number
+    json     each item's cached JSON encoding, back to back
+
+Each snapshot goes to a new file; then its version and a heartbeat are
+written to a small control file that every worker keeps mapped. Followers
+compare the version on each read and remap when it changes. Reads bisect
+and merge the mapped indexes in place, and only the items a page returns
+are decoded, with their JSON served straight from the mapping. Relevance
+candidates are built from the records alone, so ranking decodes only the
+items it returns.
+"""
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from pathlib import Path
+from uuid import UUID
+import asyncio
+import heapq
+import mmap
+import os
+import struct
+import time
+
+import orjson
+from loguru import logger
+
+from core.config import settings
+from models.ticker import TickerCategory, TickerFeedRequest, TickerItem
+from services.ticker_store import StoredItem, ticker_store
+
+
+MAGIC = b"TKSNAP02"
+
+CATEGORIES = [category.value for category in TickerCategory]
+CATEGORY_CODES = {name: code for code, name in enumerate(CATEGORIES)}
+
+# magic, version, record count, source names length, source names offset
+HEADER = struct.Struct("<8sQIIQ")
+# Per category: recency index offset, priority index offset, length
+CATEGORY_ENTRY = struct.Struct("<QQI4x")
+# created_us, expires_us (0 = never), id, user_id (zeros = shared),
+# priority, category code, source number, json offset, json length
+RECORD = struct.Struct("<qq16s16sBB2xIQI4x")
+
+# version, heartbeat (microseconds since the epoch)
+CONTROL = struct.Struct("<QQ")
+
+# Snapshot files kept besides the current one, for followers still remapping
+KEEP_PREVIOUS = 2
+
+NO_USER = bytes(16)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def snapshot_dir() -> Path:
+    return Path(settings.worker_state_dir)
+
+
+def encode_snapshot(items: List[StoredItem], version: int) -> bytes:
+    """Serialize live items into one snapshot"""
+    items = sorted(items, key=lambda item: item.recent_key)
+    records_offset = HEADER.size + CATEGORY_ENTRY.size * len(CATEGORIES)
+    recent: Dict[int, array] = {code: array("I") for code in range(len(CATEGORIES))}
+    for number, item in enumerate(items):
+        recent[CATEGORY_CODES[item.category]].append(number)
+    by_priority = {
+        code: array("I", sorted(numbers, key=lambda number: items[number].priority_key))
+        for code, numbers in recent.items()
+    }
+    
+    sources: Dict[str, int] = {}
+    source_numbers = [sources.setdefault(_source_name(item.row), len(sources)) for item in items]
+    source_names = orjson.dumps(list(sources))
+    
+    indexes_offset = records_offset + RECORD.size * len(items)
+    sources_offset = indexes_offset + sum(len(numbers) * 8 for numbers in recent.values())
+    json_offset = sources_offset + len(source_names)
+    
+    parts = [HEADER.pack(MAGIC, version, len(items), len(source_names), sources_offset)]
+    offset = indexes_offset
+    for code in range(len(CATEGORIES)):
+        length = len(recent[code])
+        parts.append(CATEGORY_ENTRY.pack(offset, offset + length * 4, length))
+        offset += length * 8
+    
+    encoded = [item.to_item().json_bytes() for item in items]
+    position = json_offset
+    for item, source_number, body in zip(items, source_numbers, encoded):
+        parts.append(RECORD.pack(
+            item.created_us,
+            item.expires_us or 0,
+            item.id.bytes,
+            UUID(item.user_id).bytes if item.user_id else NO_USER,
+            item.priority,
+            CATEGORY_CODES[item.category],
+            source_number,
+            position,
+            len(body)
+        ))
+        position += len(body)
+    
+    for code in range(len(CATEGORIES)):
+        parts.append(recent[code].tobytes())
+        parts.append(by_priority[code].tobytes())
+    parts.append(source_names)
+    parts.extend(encoded)
+    return b"".join(parts)
+
+
+class MappedSnapshot:
+    """One published snapshot, mapped read-only"""
+    
+    def __init__(self, path: Path):
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        magic, self.version, self.count, sources_length, sources_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a feed snapshot")
+        self.sources: List[str] = orjson.loads(self._view[sources_offset:sources_offset + sources_length])
+        
+        self._recent: Dict[str, memoryview] = {}
+        self._by_priority: Dict[str, memoryview] = {}
+        for code, name in enumerate(CATEGORIES):
+            recent_offset, priority_offset, length = CATEGORY_ENTRY.unpack_from(
+                self._map, HEADER.size + code * CATEGORY_ENTRY.size
+            )
+            if length:
+                self._recent[name] = self._view[recent_offset:recent_offset + length * 4].cast("I")
+                self._by_priority[name] = self._view[priority_offset:priority_offset + length * 4].cast("I")
+        self._records_offset = HEADER.size + CATEGORY_ENTRY.size * len(CATEGORIES)
+        self._items: Dict[int, TickerItem] = {}
+        self._rows: Dict[int, Dict[str, Any]] = {}
+    
+    def record(self, number: int) -> Tuple:
+        return RECORD.unpack_from(self._map, self._records_offset + number * RECORD.size)
+    
+    def recent_key(self, number: int) -> Tuple[int, int]:
+        created_us, _, item_id = RECORD.unpack_from(self._map, self._records_offset + number * RECORD.size)[:3]
+        return (-created_us, -int.from_bytes(item_id, "big"))
+    
+    def priority_key(self, number: int) -> Tuple[int, int, int]:
+        created_us, _, item_id, _, priority = RECORD.unpack_from(
+            self._map, self._records_offset + number * RECORD.size
+        )[:5]
+        return (priority, -created_us, -int.from_bytes(item_id, "big"))
+    
+    def row(self, number: int) -> Dict[str, Any]:
+        """The item's ticker_items row, decoded once per snapshot"""
+        row = self._rows.get(number)
+        if row is None:
+            created_us, _, _, _, _, _, _, offset, length = self.record(number)
+            row = orjson.loads(self._view[offset:offset + length])
+            row["id"] = UUID(row["id"])
+            if row.get("user_id"):
+                row["user_id"] = UUID(row["user_id"])
+            row["created_at"] = EPOCH + timedelta(microseconds=created_us)
+            for field in ("updated_at", "expires_at"):
+                if row.get(field):
+                    row[field] = datetime.fromisoformat(row[field].replace("Z", "+00:00"))
+            self._rows[number] = row
+        return row
+    
+    def item(self, number: int) -> TickerItem:
+        """The item as a model whose JSON encoding is the mapped bytes"""
+        item = self._items.get(number)
+        if item is None:
+            item = TickerItem.from_row(self.row(number))
+            offset, length = self.record(number)[7:]
+            item.__pydantic_private__["_json"] = self._view[offset:offset + length]
+            self._items[number] = item
+        return item
+    
+    def numbers(self, categories: Optional[List[TickerCategory]]) -> Sequence[int]:
+        """Record numbers of the selected categories in recency order (the record order)"""
+        if not categories:
+            return range(self.count)
+        numbers: List[int] = []
+        for category in categories:
+            numbers.extend(self._recent.get(category.value, ()))
+        numbers.sort()
+        return numbers
+    
+    def merge(
+        self,
+        by_priority: bool,
+        categories: Optional[List[TickerCategory]],
+        start_key: Optional[Tuple[int, ...]]
+    ) -> Iterator[int]:
+        """Record numbers of the selected categories in feed order, strictly after ``start_key``"""
+        index = self._by_priority if by_priority else self._recent
+        key = self.priority_key if by_priority else self.recent_key
+        names = [cat.value for cat in categories] if categories else list(index)
+        iterators = []
+        for name in names:
+            numbers = index.get(name)
+            if numbers is None:
+                continue
+            start = bisect_right(numbers, start_key, key=key) if start_key is not None else 0
+            iterators.append(islice(numbers, start, None))
+        if len(iterators) == 1:
+            return iterators[0]
+        return heapq.merge(*iterators, key=key)
+
+
+class SnapshotCandidate(Mapping):
+    """A relevance candidate read from its record
+    
+    Holds the fields ranking reads (see ``CandidateBatch``); any other key
+    decodes the item's full row from the snapshot.
+    """
+    
+    __slots__ = ("_snapshot", "_number", "_fields")
+    
+    def __init__(self, snapshot: MappedSnapshot, number: int, fields: Dict[str, Any]):
+        self._snapshot = snapshot
+        self._number = number
+        self._fields = fields
+    
+    def __getitem__(self, key: str) -> Any:
+        fields = self._fields
+        if key in fields:
+            return fields[key]
+        return self._snapshot.row(self._number)[key]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot.row(self._number))
+    
+    def __len__(self) -> int:
+        return len(self._snapshot.row(self._number))
+
+
+class FeedSnapshotReader:
+    """Serves store reads from the leader's latest snapshot
+    
+    Implements the read side of ``TickerStore`` (``ready``, ``version``,
+    ``query`` and ``candidates``) so a follower's store can delegate to it.
+    """
+    
+    def __init__(self, directory: Path, max_age: float):
+        self.directory = directory
+        self.max_age = max_age
+        self._control: Optional[mmap.mmap] = None
+        self._control_checked = 0.0
+        self._snapshot: Optional[MappedSnapshot] = None
+    
+    @property
+    def ready(self) -> bool:
+        """True while the leader's store is warm and it published recently"""
+        return self._current() is not None
+    
+    @property
+    def version(self) -> int:
+        snapshot = self._current()
+        return snapshot.version if snapshot is not None else 0
+    
+    def query(
+        self,
+        request: TickerFeedRequest,
+        limit: int,
+        cursor: Optional[Dict[str, Any]] = None,
+        user_id: Optional[UUID] = None
+    ) -> Optional[List[TickerItem]]:
+        """Same contract as ``TickerStore.query``"""
+        snapshot = self._current()
+        if snapshot is None or request.include_expired or request.sort_by not in ("created_at", "priority"):
+            return None
+        
+        by_priority = request.sort_by == "priority"
+        start_key: Optional[Tuple[int, ...]] = None
+        if cursor:
+            created_us = (_datetime(cursor["created_at"]) - EPOCH) // timedelta(microseconds=1)
+            start_key = (-created_us, -cursor["id"].int)
+            if by_priority:
+                start_key = (cursor["priority"],) + start_key
+        
+        user = user_id.bytes if user_id else None
+        now = _now_us()
+        items: List[TickerItem] = []
+        for number in snapshot.merge(by_priority, request.categories, start_key):
+            _, expires_us, _, owner, priority = snapshot.record(number)[:5]
+            if expires_us and expires_us <= now:
+                continue
+            if owner != NO_USER and owner != user:
+                continue
+            if request.priority_filter and priority > request.priority_filter:
+                if by_priority:
+                    break
+                continue
+            items.append(snapshot.item(number))
+            if len(items) >= limit:
+                break
+        return items
+    
+    def candidates(
+        self,
+        request: TickerFeedRequest,
+        since: datetime,
+        priority_tier: int,
+        user_id: Optional[UUID] = None
+    ) -> Optional[List[Mapping[str, Any]]]:
+        """Same contract as ``TickerStore.candidates``; rows decode lazily"""
+        snapshot = self._current()
+        if snapshot is None or request.include_expired:
+            return None
+        
+        since_us = (_datetime(since) - EPOCH) // timedelta(microseconds=1)
+        user = user_id.bytes if user_id else None
+        now = _now_us()
+        rows = []
+        for number in snapshot.numbers(request.categories):
+            created_us, expires_us, _, owner, priority, category, source = snapshot.record(number)[:7]
+            if expires_us and expires_us <= now:
+                continue
+            if owner != NO_USER and owner != user:
+                continue
+            if request.priority_filter and priority > request.priority_filter:
+                continue
+            if created_us > since_us or priority <= priority_tier:
+                rows.append(SnapshotCandidate(snapshot, number, {
+                    "category": CATEGORIES[category],
+                    "priority": priority,
+                    "created_at": EPOCH + timedelta(microseconds=created_us),
+                    "source_name": snapshot.sources[source]
+                }))
+        return rows
+    
+    # Private helper methods
+    
+    def _current(self) -> Optional[MappedSnapshot]:
+        control = self._open_control()
+        if control is None:
+            return None
+        version, heartbeat_us = CONTROL.unpack_from(control, 0)
+        if not version or _now_us() - heartbeat_us > self.max_age * 1e6:
+            return None
+        if self._snapshot is None or self._snapshot.version != version:
+            try:
+                # The previous mapping is unmapped once no item refers to it
+                self._snapshot = MappedSnapshot(_snapshot_path(self.directory, version))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Feed snapshot {version} unavailable: {e}")
+                return None
+        return self._snapshot
+    
+    def _open_control(self) -> Optional[mmap.mmap]:
+        if self._control is not None:
+            return self._control
+        # Until the leader creates it, look at most once a second
+        now = time.monotonic()
+        if now - self._control_checked < 1.0:
+            return None
+        self._control_checked = now
+        try:
+            with open(self.directory / "feed.control", "rb") as file:
+                self._control = mmap.mmap(file.fileno(), CONTROL.size, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        return self._control
+
+
+class FeedSnapshotPublisher:
+    """Leader side: writes a snapshot whenever the store's version changes"""
+    
+    def __init__(self, directory: Path, interval: float = settings.feed_snapshot_interval_seconds):
+        self.directory = directory
+        self.interval = interval
+        self._control: Optional[mmap.mmap] = None
+        self._published_store_version: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    async def start(self):
+        if self._task is None or self._task.done():
+            self._control = self._open_control()
+            self._task = asyncio.create_task(self._run())
+            logger.info("Feed snapshot publisher started")
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def publish_once(self):
+        """Publish if the store changed, and renew the heartbeat while it is warm"""
+        if not ticker_store.ready:
+            return
+        version, _ = CONTROL.unpack_from(self._control, 0)
+        store_version = ticker_store.version
+        if store_version != self._published_store_version:
+            version += 1
+            # Encoding a large store takes long enough to stall the event loop
+            await asyncio.to_thread(self._write, version, ticker_store.live_items())
+            self._published_store_version = store_version
+        CONTROL.pack_into(self._control, 0, version, _now_us())
+    
+    # Private helper methods
+    
+    async def _run(self):
+        while True:
+            try:
+                await self.publish_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Feed snapshot publish failed: {e}")
+            await asyncio.sleep(self.interval)
+    
+    def _open_control(self) -> mmap.mmap:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / "feed.control"
+        with open(path, "a+b") as file:
+            if os.fstat(file.fileno()).st_size < CONTROL.size:
+                file.truncate(CONTROL.size)
+            return mmap.mmap(file.fileno(), CONTROL.size)
+    
+    def _write(self, version: int, items: List[StoredItem]):
+        data = encode_snapshot(items, version)
+        path = _snapshot_path(self.directory, version)
+        temporary = path.with_suffix(".tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, path)
+        # Followers that still map an old file keep it alive after unlink
+        for stale in self.directory.glob("feed-*.snapshot"):
+            stale_version = int(stale.stem.split("-")[1])
+            if stale_version < version - KEEP_PREVIOUS:
+                stale.unlink(missing_ok=True)
+        logger.debug(f"Feed snapshot {version} published ({len(data)} bytes)")
+
+
+# Private helpers
+
+def _snapshot_path(directory: Path, version: int) -> Path:
+    return directory / f"feed-{version}.snapshot"
+
+
+def _datetime(value: Any) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _source_name(row: Dict[str, Any]) -> str:
+    source_data = row.get("source_data") or {}
+    return source_data.get("source") or ""
+
+
+def _now_us() -> int:
+    return time.time_ns() // 1000
+
+
+# Global instances (used in multi-worker mode only)
+feed_snapshot_reader = FeedSnapshotReader(snapshot_dir(), max_age=settings.feed_snapshot_interval_seconds * 5)
+feed_snapshot_publisher = FeedSnapshotPublisher(snapshot_dir())
@@ -0,0 +1,231 @@
+"""
+Insight Pipeline - per-user insights, precomputed and stored as personal ticker items
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+import asyncio
+import hashlib
+import time
+from loguru import logger
+
+from core.config import settings
+from core.database import get_db_pool, get_supabase_admin, execute_async
+from models.ticker import TickerCategory, TickerItemCreate
+from services.ticker_service import ticker_service, ticker_dedupe_key
+from services.performance_alerts import performance_alert_engine
+from services.ticker_store import ticker_store
+
+
+# Users seen in the ticker or the CIA system within the last $1 days
+SELECT_ACTIVE_USERS_SQL = """
+    SELECT user_id FROM public.ticker_engagement
+    WHERE action_timestamp > NOW() - make_interval(days => $1) AND user_id IS NOT NULL
+    UNION
+    SELECT user_id FROM public.cia_sessions
+    WHERE last_activity_at > NOW() - make_interval(days => $1) AND user_id IS NOT NULL
+"""
+
+# Retire the user's insights that were not produced by the latest run
+DEACTIVATE_STALE_INSIGHTS_SQL = """
+    UPDATE public.ticker_items SET is_active = false
+    WHERE user_id = $1 AND category = 'insights' AND is_active = true
+      AND (dedupe_key IS NULL OR NOT (dedupe_key = ANY($2::text[])))
+    RETURNING *
+"""
+
+INSIGHT_SOURCE = "insights"
+
+
+class InsightPipeline:
+    """Generates each active user's insights off the request path
+    
+    A batch run every ``batch_interval`` seconds regenerates insights for
+    active users whose cached insights are older than ``ttl`` (or were
+    invalidated), at most ``concurrency`` users at a time. Results are
+    upserted as personal ticker_items, so /insights reads them from the
+    feed like any other item. Call ``invalidate`` when a user's campaign
+    data changes to regenerate that user's insights right away.
+    """
+    
+    def __init__(
+        self,
+        ttl: int = settings.insight_ttl_seconds,
+        batch_interval: float = settings.insight_batch_interval_seconds,
+        concurrency: int = settings.insight_batch_concurrency,
+        active_days: int = settings.insight_active_days
+    ):
+        self.ttl = ttl
+        self.batch_interval = batch_interval
+        self.concurrency = concurrency
+        self.active_days = active_days
+        self._cache: Dict[UUID, Tuple[float, List[TickerItemCreate]]] = {}
+        self._inflight: Dict[UUID, asyncio.Task] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._task: Optional[asyncio.Task] = None
+        self._admin_client = None
+        self.stats = {"generated": 0, "cache_hits": 0, "failed": 0, "last_batch_users": 0}
+    
+    @property
+    def pending(self) -> int:
+        """Users whose insights are being generated in the background"""
+        return len(self._inflight)
+    
+    def is_fresh(self, user_id: UUID) -> bool:
+        cached = self._cache.get(user_id)
+        return cached is not None and time.monotonic() - cached[0] < self.ttl
+    
+    def invalidate(self, user_id: UUID):
+        """Drop the user's cached insights and regenerate them in the background"""
+        self._cache.pop(user_id, None)
+        if self._task is not None:
+            self.ensure(user_id)
+    
+    def ensure(self, user_id: UUID):
+        """Precompute the user's insights in the background unless they are fresh"""
+        if self.is_fresh(user_id) or user_id in self._inflight:
+            return
+        task = asyncio.create_task(self.precompute(user_id))
+        self._inflight[user_id] = task
+        task.add_done_callback(lambda _: self._inflight.pop(user_id, None))
+    
+    async def get_insights(self, user_id: UUID, context: Optional[Dict[str, Any]] = None) -> List[TickerItemCreate]:
+        """The user's insights, generated on a cache miss"""
+        cached = self._cache.get(user_id)
+        if cached is not None and time.monotonic() - cached[0] < self.ttl:
+            self.stats["cache_hits"] += 1
+            return cached[1]
+        
+        insights = await ticker_service.generate_insights(user_id, context or {})
+        self._cache[user_id] = (time.monotonic(), insights)
+        self.stats["generated"] += 1
+        return insights
+    
+    async def precompute(self, user_id: UUID) -> int:
+        """Generate the user's insights and store them; returns the number stored"""
+        async with self._semaphore:
+            try:
+                insights = await self.get_insights(user_id)
+                return await self._store(user_id, insights)
+            except Exception as e:
+                logger.error(f"Error precomputing insights for user {user_id}: {e}")
+                self.stats["failed"] += 1
+                self._cache.pop(user_id, None)
+                return 0
+    
+    async def precompute_all(self) -> Dict[str, int]:
+        """Precompute insights for every active user whose insights are stale"""
+        users = await self._get_active_users()
+        stale = [user_id for user_id in users if not self.is_fresh(user_id)]
+        counts = await asyncio.gather(*(self.precompute(user_id) for user_id in stale))
+        
+        self.stats["last_batch_users"] = len(stale)
+        return {"active_users": len(users), "refreshed_users": len(stale), "insights": sum(counts)}
+    
+    async def start(self):
+        """Start the periodic batch"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Insight pipeline started")
+    
+    async def stop(self):
+        tasks = list(self._inflight.values())
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    # Private helper methods
+    
+    async def _run(self):
+        while True:
+            try:
+                result = await self.precompute_all()
+                logger.info(
+                    f"Insight batch: {result['refreshed_users']}/{result['active_users']} users, "
+                    f"{result['insights']} insights"
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Insight batch failed: {e}")
+            await asyncio.sleep(self.batch_interval)
+    
+    async def _get_active_users(self) -> List[UUID]:
+        pool = get_db_pool()
+        if pool is not None:
+            rows = await pool.fetch(SELECT_ACTIVE_USERS_SQL, self.active_days)
+            return [row["user_id"] for row in rows]
+        
+        since = (datetime.now(timezone.utc) - timedelta(days=self.active_days)).isoformat()
+        engagement, sessions = await asyncio.gather(
+            execute_async(
+                self._admin().table("ticker_engagement").select("user_id").gt("action_timestamp", since)
+            ),
+            execute_async(
+                self._admin().table("cia_sessions").select("user_id").gt("last_activity_at", since)
+            )
+        )
+        return list({
+            UUID(row["user_id"]) for row in engagement.data + sessions.data if row.get("user_id")
+        })
+    
+    async def _store(self, user_id: UUID, insights: List[TickerItemCreate]) -> int:
+        """Upsert the insights as the user's personal items and retire the rest"""
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl * 2)
+        items = [
+            insight.model_copy(update={
+                "user_id": user_id,
+                "expires_at": expires_at,
+                "source_data": {
+                    **insight.source_data,
+                    "source": INSIGHT_SOURCE,
+                    "external_id": _insight_id(user_id, insight)
+                }
+            })
+            for insight in insights
+        ]
+        
+        if items:
+            counts = await ticker_service.bulk_upsert_ticker_items(items)
+            if counts["failed"]:
+                raise RuntimeError(f"{counts['failed']} insights could not be stored")
+        
+        keys = [ticker_dedupe_key(item.source_data) for item in items]
+        pool = get_db_pool()
+        if pool is not None:
+            for row in await pool.fetch(DEACTIVATE_STALE_INSIGHTS_SQL, user_id, keys):
+                ticker_store.apply(row)
+        else:
+            query = (
+                self._admin().table("ticker_items").update({"is_active": False})
+                .eq("user_id", str(user_id))
+                .eq("category", TickerCategory.INSIGHTS.value)
+                .eq("is_active", True)
+            )
+            if keys:
+                query = query.not_.in_("dedupe_key", keys)
+            result = await execute_async(query)
+            for row in result.data:
+                ticker_store.apply(row)
+        return len(items)
+    
+    def _admin(self):
+        if self._admin_client is None:
+            self._admin_client = get_supabase_admin()
+        return self._admin_client
+
+
+# Private helpers
+
+def _insight_id(user_id: UUID, insight: TickerItemCreate) -> str:
+    # Stable per user and insight, so a regenerated insight updates in place
+    identity = f"{insight.source_data.get('insight_type')}|{insight.title}"
+    return f"{user_id}:{hashlib.blake2b(identity.encode(), digest_size=8).hexdigest()}"
+
+
+# Singleton instance
+insight_pipeline = InsightPipeline()
+performance_alert_engine.subscribe(insight_pipeline.invalidate)
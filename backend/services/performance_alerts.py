@@ -0,0 +1,325 @@
+"""
+Performance Alerts - streaming anomaly and change detection over campaign metrics
+"""
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+import math
+from loguru import logger
+
+from core.database import Tables, get_db_pool, get_supabase_admin, execute_async
+from models.ticker import PerformanceAlert, TickerCategory, TickerItemCreate, TickerType
+
+
+METRIC_COLUMNS = "id, user_id, campaign_id, campaign_name, metric_name, value, recorded_at"
+
+SELECT_NEW_METRICS_SQL = f"""
+    SELECT {METRIC_COLUMNS} FROM public.campaign_metrics
+    WHERE id > $1
+    ORDER BY id
+    LIMIT $2
+"""
+
+# Seeds each series with its most recent $2 samples from the last $1 days,
+# so a restart never replays full history
+SELECT_BOOTSTRAP_METRICS_SQL = f"""
+    SELECT {METRIC_COLUMNS} FROM (
+        SELECT {METRIC_COLUMNS},
+               row_number() OVER (PARTITION BY campaign_id, metric_name ORDER BY id DESC) AS rn
+        FROM public.campaign_metrics
+        WHERE recorded_at > NOW() - make_interval(days => $1)
+    ) recent
+    WHERE rn <= $2
+    ORDER BY id
+"""
+
+SELECT_MAX_METRIC_ID_SQL = "SELECT COALESCE(MAX(id), 0) FROM public.campaign_metrics"
+
+# Defaults, overridable in the google_ads_monitor source config
+DEFAULT_ALERT_THRESHOLD = 0.2    # relative change vs. the EWMA baseline
+DEFAULT_ANOMALY_Z = 3.0          # standard deviations from the windowed mean
+DEFAULT_EWMA_ALPHA = 0.3
+DEFAULT_WINDOW = 20
+DEFAULT_MIN_POINTS = 5           # samples needed before a series can alert
+DEFAULT_COOLDOWN_MINUTES = 60    # per campaign and metric
+DEFAULT_BOOTSTRAP_DAYS = 7
+
+METRICS_PAGE_SIZE = 1000
+MAX_PAGES_PER_POLL = 20
+RECENT_ALERTS_MAX = 20
+
+# Metrics where a decrease is good news
+LOWER_IS_BETTER = {"cost", "cpc", "cpa", "cpm", "cost_per_conversion", "bounce_rate"}
+
+
+class MetricSeries:
+    """Rolling statistics for one campaign metric, updated in O(1) per sample
+    
+    Keeps an EWMA plus the mean and variance of the last ``window`` samples
+    from running sums, so no history is ever re-scanned.
+    """
+    
+    __slots__ = ("count", "ewma", "window", "window_sum", "window_sumsq", "last_alert_at")
+    
+    def __init__(self, window: int):
+        self.count = 0
+        self.ewma = 0.0
+        self.window: Deque[float] = deque(maxlen=window)
+        self.window_sum = 0.0
+        self.window_sumsq = 0.0
+        self.last_alert_at: Optional[datetime] = None
+    
+    @property
+    def mean(self) -> float:
+        return self.window_sum / len(self.window) if self.window else 0.0
+    
+    @property
+    def std(self) -> float:
+        if len(self.window) < 2:
+            return 0.0
+        mean = self.mean
+        return math.sqrt(max(self.window_sumsq / len(self.window) - mean * mean, 0.0))
+    
+    def update(self, value: float, alpha: float):
+        if len(self.window) == self.window.maxlen:
+            oldest = self.window[0]
+            self.window_sum -= oldest
+            self.window_sumsq -= oldest * oldest
+        self.window.append(value)
+        self.window_sum += value
+        self.window_sumsq += value * value
+        self.ewma = value if self.count == 0 else alpha * value + (1 - alpha) * self.ewma
+        self.count += 1
+
+
+class AlertConfig:
+    """Detection settings read from the google_ads_monitor source config"""
+    
+    __slots__ = ("threshold", "anomaly_z", "alpha", "window", "min_points", "cooldown")
+    
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        self.threshold = float(config.get("alert_threshold", DEFAULT_ALERT_THRESHOLD))
+        self.anomaly_z = float(config.get("anomaly_z", DEFAULT_ANOMALY_Z))
+        self.alpha = float(config.get("ewma_alpha", DEFAULT_EWMA_ALPHA))
+        self.window = int(config.get("window", DEFAULT_WINDOW))
+        self.min_points = int(config.get("min_points", DEFAULT_MIN_POINTS))
+        self.cooldown = timedelta(minutes=float(config.get("cooldown_minutes", DEFAULT_COOLDOWN_MINUTES)))
+
+
+class PerformanceAlertEngine:
+    """Consumes new campaign_metrics rows and turns threshold crossings into alerts
+    
+    Registered as the fetcher for the ``google_ads_monitor`` source, so the
+    source scheduler drives it and persists the PERFORMANCE items it
+    returns. Each poll reads only rows past the last seen id.
+    """
+    
+    def __init__(self):
+        self._series: Dict[Tuple[str, str], MetricSeries] = {}
+        self._recent: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._last_id: Optional[int] = None
+        self._listeners: List[Callable[[UUID], Any]] = []
+        self._admin_client = None
+        self.stats = {"points": 0, "alerts": 0}
+    
+    def subscribe(self, listener: Callable[[UUID], Any]):
+        """Call ``listener(user_id)`` for each user whose campaign data changed"""
+        self._listeners.append(listener)
+    
+    def recent_updates(self, user_id: UUID) -> List[Dict[str, Any]]:
+        """The user's most recent alerts, newest first"""
+        return list(reversed(self._recent.get(str(user_id), ())))
+    
+    async def poll(self, config: Dict[str, Any]) -> List[TickerItemCreate]:
+        """Process metric rows added since the last poll; returns ticker items for new alerts"""
+        alert_config = AlertConfig(config)
+        if self._last_id is None:
+            await self._bootstrap(config, alert_config)
+        
+        items: List[TickerItemCreate] = []
+        changed_users = set()
+        for _ in range(MAX_PAGES_PER_POLL):
+            rows = await self._fetch_new(self._last_id)
+            for row in rows:
+                item = self.process(row, alert_config)
+                if item is not None:
+                    items.append(item)
+                if row["user_id"]:
+                    changed_users.add(row["user_id"])
+                self._last_id = row["id"]
+            if len(rows) < METRICS_PAGE_SIZE:
+                break
+        
+        for user_id in changed_users:
+            for listener in self._listeners:
+                try:
+                    listener(user_id if isinstance(user_id, UUID) else UUID(str(user_id)))
+                except Exception as e:
+                    logger.error(f"Campaign metrics listener failed: {e}")
+        return items
+    
+    def process(self, row: Dict[str, Any], config: AlertConfig) -> Optional[TickerItemCreate]:
+        """Fold one sample into its series; returns a ticker item if it triggers an alert"""
+        key = (row["campaign_id"], row["metric_name"])
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = MetricSeries(config.window)
+        
+        value = float(row["value"])
+        recorded_at = _datetime(row["recorded_at"])
+        item = None
+        if series.count >= config.min_points:
+            alert = self._detect(series, row["metric_name"], value, config)
+            cooled_down = series.last_alert_at is None or recorded_at - series.last_alert_at >= config.cooldown
+            if alert is not None and cooled_down:
+                series.last_alert_at = recorded_at
+                item = self._emit(row, alert)
+        
+        series.update(value, config.alpha)
+        self.stats["points"] += 1
+        return item
+    
+    # Private helper methods
+    
+    def _detect(
+        self,
+        series: MetricSeries,
+        metric_name: str,
+        value: float,
+        config: AlertConfig
+    ) -> Optional[PerformanceAlert]:
+        baseline = series.ewma
+        change = (value - baseline) / abs(baseline) if baseline else 0.0
+        std = series.std
+        z_score = (value - series.mean) / std if std > 1e-9 else 0.0
+        
+        threshold_exceeded = abs(change) >= config.threshold
+        anomaly = abs(z_score) >= config.anomaly_z
+        if not threshold_exceeded and not anomaly:
+            return None
+        
+        magnitude = max(abs(change) / config.threshold, abs(z_score) / config.anomaly_z)
+        severity = "high" if magnitude >= 3 else "medium" if magnitude >= 1.5 else "low"
+        positive = (change > 0 or (change == 0 and z_score > 0)) != (metric_name in LOWER_IS_BETTER)
+        
+        return PerformanceAlert(
+            metric_name=metric_name,
+            current_value=value,
+            previous_value=baseline,
+            change_percentage=round(change * 100, 1),
+            threshold_exceeded=threshold_exceeded,
+            severity=severity,
+            recommended_action=(
+                "Consider shifting budget toward this campaign" if positive
+                else "Review targeting, bids and creatives for this campaign"
+            )
+        )
+    
+    def _emit(self, row: Dict[str, Any], alert: PerformanceAlert) -> TickerItemCreate:
+        campaign = row["campaign_name"] or row["campaign_id"]
+        metric = alert.metric_name.replace("_", " ")
+        positive = (alert.current_value >= alert.previous_value) != (alert.metric_name in LOWER_IS_BETTER)
+        direction = "up" if alert.current_value >= alert.previous_value else "down"
+        
+        if alert.severity == "high" and not positive:
+            ticker_type = TickerType.WARNING
+        elif positive:
+            ticker_type = TickerType.SUCCESS
+        else:
+            ticker_type = TickerType.UPDATE
+        
+        title = f"{campaign}: {metric} {direction} {abs(alert.change_percentage):.0f}%"
+        description = (
+            f"{metric.capitalize()} is {alert.current_value:,.2f} against a recent average of "
+            f"{alert.previous_value:,.2f}. {alert.recommended_action}."
+        )
+        update = {
+            "title": title[:200],
+            "description": description[:500],
+            "icon": "TrendingUp" if direction == "up" else "TrendingDown",
+            "priority": {"high": 1, "medium": 2, "low": 3}[alert.severity],
+            "severity": alert.severity,
+            "is_positive": positive,
+            "metric": alert.metric_name,
+            "value": alert.current_value,
+            "change": alert.change_percentage
+        }
+        if row["user_id"]:
+            self._recent.setdefault(str(row["user_id"]), deque(maxlen=RECENT_ALERTS_MAX)).append(update)
+        self.stats["alerts"] += 1
+        
+        return TickerItemCreate(
+            category=TickerCategory.PERFORMANCE,
+            title=update["title"],
+            description=update["description"],
+            icon_name=update["icon"],
+            type=ticker_type,
+            priority=update["priority"],
+            user_id=row["user_id"],
+            expires_at=datetime.now(timezone.utc) + timedelta(hours=24),
+            source_data={
+                "source": "google_ads_monitor",
+                "external_id": f"{row['campaign_id']}:{alert.metric_name}:{row['id']}",
+                "campaign_id": row["campaign_id"],
+                "alert": alert.model_dump()
+            }
+        )
+    
+    async def _bootstrap(self, config: Dict[str, Any], alert_config: AlertConfig):
+        """Warm the series from recent samples without emitting alerts"""
+        days = int(config.get("bootstrap_days", DEFAULT_BOOTSTRAP_DAYS))
+        pool = get_db_pool()
+        if pool is not None:
+            last_id = await pool.fetchval(SELECT_MAX_METRIC_ID_SQL)
+            rows = await pool.fetch(SELECT_BOOTSTRAP_METRICS_SQL, days, alert_config.window)
+        else:
+            since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+            result = await execute_async(
+                self._admin().table(Tables.CAMPAIGN_METRICS).select(METRIC_COLUMNS)
+                .gt("recorded_at", since).order("id", desc=True).limit(METRICS_PAGE_SIZE * MAX_PAGES_PER_POLL)
+            )
+            rows = list(reversed(result.data))
+            last_id = rows[-1]["id"] if rows else 0
+        
+        for row in rows:
+            key = (row["campaign_id"], row["metric_name"])
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = MetricSeries(alert_config.window)
+            series.update(float(row["value"]), alert_config.alpha)
+            last_id = max(last_id, row["id"])
+        
+        self._last_id = last_id
+        logger.info(f"Performance alerts warmed {len(self._series)} series from {len(rows)} samples")
+    
+    async def _fetch_new(self, last_id: int) -> List[Dict[str, Any]]:
+        pool = get_db_pool()
+        if pool is not None:
+            return await pool.fetch(SELECT_NEW_METRICS_SQL, last_id, METRICS_PAGE_SIZE)
+        
+        result = await execute_async(
+            self._admin().table(Tables.CAMPAIGN_METRICS).select(METRIC_COLUMNS)
+            .gt("id", last_id).order("id").limit(METRICS_PAGE_SIZE)
+        )
+        return result.data
+    
+    def _admin(self):
+        if self._admin_client is None:
+            self._admin_client = get_supabase_admin()
+        return self._admin_client
+
+
+# Private helpers
+
+def _datetime(value: Any) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+# Singleton instance
+performance_alert_engine = PerformanceAlertEngine()
@@ -0,0 +1,111 @@
+"""
+Refresh Coordinator - single-flight, stale-while-revalidate category refreshes
+"""
+from typing import Dict, Optional
+from datetime import datetime, timedelta, timezone
+import asyncio
+from loguru import logger
+
+from services.ticker_service import ticker_service
+
+
+# Data older than this triggers a background refresh
+DEFAULT_STALE_AFTER = timedelta(minutes=15)
+
+# Minimum gap between attempts after a failed refresh
+RETRY_AFTER_FAILURE = timedelta(minutes=1)
+
+
+class RefreshCoordinator:
+    """Runs at most one refresh per category at a time
+    
+    Callers always get the data they already have; a stale category
+    schedules a single background refresh that persists its items and
+    records when the category was last refreshed, so later requests see it
+    as fresh instead of starting more refreshes.
+    """
+    
+    def __init__(self, stale_after: timedelta = DEFAULT_STALE_AFTER):
+        self.stale_after = stale_after
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._refreshed_at: Dict[str, datetime] = {}
+        self._attempted_at: Dict[str, datetime] = {}
+        self._seeded: set = set()
+    
+    def mark_fresh(self, category: str, when: Optional[datetime] = None):
+        """Record a successful refresh (also called by the source scheduler)"""
+        when = when or datetime.now(timezone.utc)
+        current = self._refreshed_at.get(category)
+        if current is None or when > current:
+            self._refreshed_at[category] = when
+    
+    def last_refreshed(self, category: str) -> Optional[datetime]:
+        return self._refreshed_at.get(category)
+    
+    def is_refreshing(self, category: str) -> bool:
+        task = self._inflight.get(category)
+        return task is not None and not task.done()
+    
+    async def ensure_fresh(self, category: str) -> bool:
+        """Start a background refresh if the category is stale; returns True if one started"""
+        if self.is_refreshing(category):
+            return False
+        
+        if category not in self._seeded:
+            await self._seed(category)
+        
+        now = datetime.now(timezone.utc)
+        refreshed_at = self._refreshed_at.get(category)
+        if refreshed_at is not None and now - refreshed_at < self.stale_after:
+            return False
+        
+        attempted_at = self._attempted_at.get(category)
+        if attempted_at is not None and now - attempted_at < RETRY_AFTER_FAILURE:
+            return False
+        
+        # Re-check after the await in _seed so only one task is created
+        if self.is_refreshing(category):
+            return False
+        
+        self._attempted_at[category] = now
+        self._inflight[category] = asyncio.create_task(self._refresh(category))
+        return True
+    
+    async def stop(self):
+        """Cancel in-flight refreshes"""
+        tasks = [task for task in self._inflight.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._inflight.clear()
+    
+    # Private helper methods
+    
+    async def _seed(self, category: str):
+        """Start from the sources' last successful fetch after a restart"""
+        self._seeded.add(category)
+        sources = await ticker_service.get_enabled_sources()
+        successes = [
+            source.last_success_at for source in sources
+            if source.category == category and source.last_success_at is not None
+        ]
+        if successes:
+            latest = max(successes)
+            if latest.tzinfo is None:
+                latest = latest.replace(tzinfo=timezone.utc)
+            self.mark_fresh(category, latest)
+    
+    async def _refresh(self, category: str):
+        try:
+            results = await ticker_service.refresh_category(category)
+            if results["sources"] and not results["failed_sources"]:
+                self.mark_fresh(category)
+            logger.info(f"Refreshed {category} ticker sources: {results}")
+        except Exception as e:
+            logger.error(f"Error refreshing {category} ticker sources: {e}")
+        finally:
+            self._inflight.pop(category, None)
+
+
+# Singleton instance
+refresh_coordinator = RefreshCoordinator()
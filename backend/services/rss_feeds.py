@@ -0,0 +1,238 @@
+"""
+RSS Feeds - conditional, incremental fetching of RSS and Atom sources
+
+A source with ``source_type = 'rss'`` reads the feed at its
+``endpoint_url``. Each request carries the ``ETag`` and ``Last-Modified``
+validators saved in the source's config from the previous fetch, so an
+unchanged feed costs one 304 and no parsing.
+
+Changed feeds are parsed as the body streams in. Feeds list entries newest
+first, so reading stops at the entry whose GUID was newest last time (or
+after ``item_limit`` entries) and the rest of the body is never downloaded.
+Each entry is dropped from the tree once it has been read, so memory stays
+flat however large the feed is.
+
+Config keys (all optional):
+    keywords            title must contain one of these (any entry if empty)
+    min_score           minimum value of the ``score_field`` element
+    score_field         entry child holding a numeric score, e.g. "comments"
+    item_limit          most entries read per fetch (default 50)
+    title_prefix        prepended to item titles, like "HN: "
+    priority            ticker priority of the items (default 3)
+
+Fetch state kept in the config: ``etag``, ``last_modified`` and
+``last_guid``. The registry saves it only after the items are persisted.
+"""
+from typing import Any, Dict, Iterator, List, Optional
+from xml.etree.ElementTree import Element, XMLPullParser
+import html
+import re
+
+import httpx
+from loguru import logger
+
+from models.ticker import TickerCategory, TickerItemCreate, TickerSource, TickerType
+from services.seen_index import seen_index
+
+
+DEFAULT_ITEM_LIMIT = 50
+
+# Entry elements by local name: RSS 2.0 / RSS 1.0 items and Atom entries
+ENTRY_TAGS = frozenset(("item", "entry"))
+
+# Elements whose children are entries; processed entries are removed from them
+CONTAINER_TAGS = frozenset(("channel", "feed", "RDF"))
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+
+
+class FeedEntry:
+    """The fields of one RSS item or Atom entry that become a ticker item"""
+    
+    __slots__ = ("guid", "title", "link", "summary", "published", "score")
+    
+    def __init__(self, element: Element, score_field: Optional[str] = None):
+        children: Dict[str, Element] = {}
+        link = None
+        for child in element:
+            name = _local_name(child.tag)
+            if name == "link" and child.get("href"):
+                # Atom: prefer the alternate link over enclosures and replies
+                if link is None or child.get("rel", "alternate") == "alternate":
+                    link = child.get("href")
+                continue
+            children.setdefault(name, child)
+        
+        self.title = _plain(_text(children.get("title")))
+        self.link = link or _text(children.get("link")) or None
+        self.summary = _plain(
+            _text(children.get("description")) or _text(children.get("summary")) or _text(children.get("content"))
+        )
+        self.published = (
+            _text(children.get("pubDate")) or _text(children.get("published"))
+            or _text(children.get("updated")) or None
+        )
+        # RSS guid, Atom id, RSS 1.0 rdf:about, else the link
+        self.guid = (
+            _text(children.get("guid")) or _text(children.get("id"))
+            or element.get("{http://www.w3.org/1999/02/22-rdf-syntax-ns#}about") or self.link
+        )
+        self.score = 0.0
+        if score_field is not None:
+            try:
+                self.score = float(_text(children.get(score_field)) or 0)
+            except ValueError:
+                pass
+
+
+class FeedParser:
+    """Incremental RSS/Atom parser fed one chunk of the body at a time"""
+    
+    def __init__(self, score_field: Optional[str] = None):
+        self.score_field = score_field
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._containers: List[Element] = []
+    
+    def feed(self, chunk: bytes) -> Iterator[FeedEntry]:
+        """Entries completed by this chunk, in document order"""
+        self._parser.feed(chunk)
+        for event, element in self._parser.read_events():
+            name = _local_name(element.tag)
+            if event == "start":
+                if name in CONTAINER_TAGS:
+                    self._containers.append(element)
+                continue
+            if name not in ENTRY_TAGS:
+                continue
+            entry = FeedEntry(element, self.score_field)
+            self._detach(element)
+            yield entry
+    
+    # Private helper methods
+    
+    def _detach(self, element: Element):
+        """Drop a read entry, and the finished siblings before it, from the tree"""
+        for container in reversed(self._containers):
+            for index, child in enumerate(container):
+                if child is element:
+                    del container[:index + 1]
+                    return
+        element.clear()
+
+
+async def fetch_feed(client: httpx.AsyncClient, source: TickerSource) -> List[TickerItemCreate]:
+    """Fetch new entries of an RSS/Atom source as ticker items
+    
+    Updates ``source.config`` with the feed's validators and newest GUID.
+    Entries ingested earlier, or rejected for their title, are skipped.
+    """
+    config = source.config
+    if not source.endpoint_url:
+        raise ValueError(f"RSS source {source.source_name} has no endpoint_url")
+    
+    headers = {}
+    if config.get("etag"):
+        headers["If-None-Match"] = config["etag"]
+    if config.get("last_modified"):
+        headers["If-Modified-Since"] = config["last_modified"]
+    
+    keywords = [keyword.lower() for keyword in config.get("keywords", [])]
+    min_score = config.get("min_score", 0)
+    item_limit = config.get("item_limit", DEFAULT_ITEM_LIMIT)
+    last_guid = config.get("last_guid")
+    parser = FeedParser(config.get("score_field"))
+    
+    items: List[TickerItemCreate] = []
+    newest_guid = None
+    read = 0
+    async with client.stream("GET", source.endpoint_url, headers=headers) as response:
+        if response.status_code == 304:
+            return items
+        response.raise_for_status()
+        
+        done = False
+        async for chunk in response.aiter_bytes():
+            for entry in parser.feed(chunk):
+                if entry.guid is None:
+                    continue
+                if entry.guid == last_guid:
+                    done = True
+                    break
+                if newest_guid is None:
+                    newest_guid = entry.guid
+                read += 1
+                
+                if not seen_index.contains(source.source_name, entry.guid):
+                    item = _ticker_item(source, entry, keywords)
+                    if item is None:
+                        # Rejected for its title, which does not change
+                        seen_index.add(source.source_name, entry.guid)
+                    elif entry.score >= min_score:
+                        # A low score can still rise, so it is not remembered
+                        items.append(item)
+                
+                if read >= item_limit:
+                    done = True
+                    break
+            if done:
+                break
+        
+        if response.headers.get("etag"):
+            config["etag"] = response.headers["etag"]
+        if response.headers.get("last-modified"):
+            config["last_modified"] = response.headers["last-modified"]
+    
+    if newest_guid is not None:
+        config["last_guid"] = newest_guid
+    logger.debug(f"RSS {source.source_name}: read {read} new entries, {len(items)} accepted")
+    return items
+
+
+# Private helpers
+
+def _ticker_item(
+    source: TickerSource,
+    entry: FeedEntry,
+    keywords: List[str]
+) -> Optional[TickerItemCreate]:
+    """Map an entry to a ticker item, or None if its title is rejected"""
+    if not entry.title:
+        return None
+    title_lower = entry.title.lower()
+    if keywords and not any(keyword in title_lower for keyword in keywords):
+        return None
+    
+    config = source.config
+    return TickerItemCreate(
+        category=TickerCategory(source.category),
+        title=f"{config.get('title_prefix', '')}{entry.title}"[:200],
+        description=(entry.summary or entry.link or entry.title)[:500],
+        icon_name="Rss",
+        type=TickerType.INFO,
+        priority=config.get("priority", 3),
+        source_data={
+            "source": source.source_name,
+            "external_id": entry.guid,
+            "url": entry.link,
+            "published": entry.published,
+            "score": entry.score
+        }
+    )
+
+
+def _local_name(tag: Any) -> str:
+    if not isinstance(tag, str):
+        return ""  # comments and processing instructions
+    return tag.rsplit("}", 1)[-1]
+
+
+def _text(element: Optional[Element]) -> str:
+    if element is None:
+        return ""
+    return "".join(element.itertext()).strip()
+
+
+def _plain(markup: str) -> str:
+    """Feed summaries are usually HTML; keep the text"""
+    return _SPACE_RE.sub(" ", html.unescape(_TAG_RE.sub(" ", markup))).strip()
@@ -0,0 +1,285 @@
+"""
+Seen Index - source items already ingested or rejected, checked before fetching
+
+Fetchers ask the index before requesting an item from its source, so on a
+steady-state refresh only new items cost a request or a database write. Keys
+are ``(source_name, external_id)``, the same identity as
+``ticker_items.dedupe_key``.
+
+Recent keys live in an exact LRU. Keys it evicts go into a Bloom filter of
+``bloom_capacity`` keys at ``error_rate`` false positives; when it fills up
+it becomes the previous generation and a fresh one takes over, so the index
+remembers between one and two filters' worth of older history. A false
+positive skips one new item, which is an acceptable trade for a news ticker.
+
+At startup the index loads its last snapshot and then the identities of
+items stored since; without a snapshot it loads the most recent
+``warm_rows`` items. It saves a snapshot every ``snapshot_interval`` seconds
+when it changed, and on shutdown.
+"""
+from typing import Any, List, Optional
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import asyncio
+import hashlib
+import math
+import os
+import struct
+import time
+
+import orjson
+from loguru import logger
+
+from core.config import settings
+from core.database import get_db_pool, get_supabase_admin, execute_async
+
+
+# Identities of stored items, newest first
+SELECT_SEEN_KEYS_SQL = """
+    SELECT dedupe_key
+    FROM public.ticker_items
+    WHERE dedupe_key IS NOT NULL
+      AND created_at > $1
+    ORDER BY created_at DESC
+    LIMIT $2
+"""
+
+# Rows stored just before a snapshot may not have been marked yet
+WARM_OVERLAP_SECONDS = 300
+
+# magic, saved_at, bit count, hash count, current count, previous count, LRU length
+SNAPSHOT_HEADER = struct.Struct("<8sdQIIII")
+SNAPSHOT_MAGIC = b"SEENIDX1"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over precomputed bit positions"""
+    
+    __slots__ = ("bit_count", "hash_count", "bits", "count")
+    
+    def __init__(self, bit_count: int, hash_count: int, bits: Optional[bytearray] = None, count: int = 0):
+        self.bit_count = bit_count
+        self.hash_count = hash_count
+        self.bits = bits if bits is not None else bytearray((bit_count + 7) // 8)
+        self.count = count
+    
+    @classmethod
+    def sized(cls, capacity: int, error_rate: float) -> "BloomFilter":
+        """Smallest filter holding ``capacity`` keys at ``error_rate``"""
+        bit_count = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        hash_count = max(1, round(bit_count / capacity * math.log(2)))
+        return cls(bit_count, hash_count)
+    
+    def positions(self, key: str) -> List[int]:
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.bit_count for i in range(self.hash_count)]
+    
+    def contains(self, positions: List[int]) -> bool:
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in positions)
+    
+    def add(self, positions: List[int]):
+        bits = self.bits
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+
+class SeenIndex:
+    """Bounded LRU of recent keys backed by two Bloom filter generations"""
+    
+    def __init__(
+        self,
+        path: Path,
+        lru_size: int = settings.seen_index_lru_size,
+        bloom_capacity: int = settings.seen_index_bloom_capacity,
+        error_rate: float = settings.seen_index_error_rate,
+        warm_rows: int = settings.seen_index_warm_rows,
+        snapshot_interval: float = settings.seen_index_snapshot_seconds
+    ):
+        self.path = path
+        self.lru_size = lru_size
+        self.bloom_capacity = bloom_capacity
+        self.error_rate = error_rate
+        self.warm_rows = warm_rows
+        self.snapshot_interval = snapshot_interval
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._current = BloomFilter.sized(bloom_capacity, error_rate)
+        self._previous: Optional[BloomFilter] = None
+        self._changes = 0
+        self._started = False
+        self._task: Optional[asyncio.Task] = None
+    
+    def __len__(self) -> int:
+        """Approximate number of keys remembered"""
+        previous = self._previous.count if self._previous is not None else 0
+        return len(self._recent) + self._current.count + previous
+    
+    def contains(self, source_name: str, external_id: Any) -> bool:
+        return self._contains(_key(source_name, external_id))
+    
+    def add(self, source_name: str, external_id: Any):
+        self._add(_key(source_name, external_id))
+    
+    async def start(self):
+        """Warm the index from its snapshot and the database, then snapshot periodically"""
+        if self._started:
+            return
+        self._started = True
+        try:
+            saved_at = await asyncio.to_thread(self._load)
+            await self._warm(saved_at)
+        except Exception as e:
+            logger.error(f"Seen index warm start failed: {e}")
+        if self.snapshot_interval > 0:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._started:
+            await self.save()
+            self._started = False
+    
+    async def save(self):
+        """Write a snapshot if anything changed since the last one"""
+        if not self._changes:
+            return
+        changes = self._changes
+        data = self._encode()
+        await asyncio.to_thread(self._write, data)
+        self._changes -= changes
+        logger.debug(f"Seen index snapshot saved ({len(self)} keys, {len(data)} bytes)")
+    
+    # Private helper methods
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                await self.save()
+            except Exception as e:
+                logger.error(f"Seen index snapshot failed: {e}")
+    
+    def _contains(self, key: str) -> bool:
+        if key in self._recent:
+            self._recent.move_to_end(key)
+            return True
+        positions = self._current.positions(key)
+        return self._current.contains(positions) or (
+            self._previous is not None and self._previous.contains(positions)
+        )
+    
+    def _add(self, key: str):
+        if key in self._recent:
+            self._recent.move_to_end(key)
+            return
+        self._recent[key] = None
+        self._changes += 1
+        while len(self._recent) > self.lru_size:
+            evicted, _ = self._recent.popitem(last=False)
+            positions = self._current.positions(evicted)
+            if self._current.contains(positions):
+                continue
+            if self._current.count >= self.bloom_capacity:
+                self._previous = self._current
+                self._current = BloomFilter(self._previous.bit_count, self._previous.hash_count)
+            self._current.add(positions)
+    
+    async def _warm(self, saved_at: Optional[datetime]):
+        """Add the identities of items stored since the snapshot (or the newest ones)"""
+        since = (
+            saved_at - timedelta(seconds=WARM_OVERLAP_SECONDS) if saved_at is not None
+            else datetime.fromtimestamp(0, timezone.utc)
+        )
+        pool = get_db_pool()
+        if pool is not None:
+            rows = await pool.fetch(SELECT_SEEN_KEYS_SQL, since, self.warm_rows)
+        else:
+            result = await execute_async(
+                # Service-role client: RLS hides deactivated rows from the anon key
+                get_supabase_admin().table("ticker_items").select("dedupe_key")
+                .not_.is_("dedupe_key", "null")
+                .gt("created_at", since.isoformat())
+                .order("created_at", desc=True)
+                .limit(self.warm_rows)
+            )
+            rows = result.data
+        
+        # Oldest first, so the newest end up in the LRU
+        for row in reversed(rows):
+            if not self._contains(row["dedupe_key"]):
+                self._add(row["dedupe_key"])
+        logger.info(f"Seen index warmed with {len(rows)} stored items ({len(self)} keys)")
+    
+    def _encode(self) -> bytes:
+        previous = self._previous or BloomFilter(self._current.bit_count, self._current.hash_count)
+        recent = orjson.dumps(list(self._recent))
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, time.time(), self._current.bit_count, self._current.hash_count,
+            self._current.count, previous.count, len(recent)
+        )
+        return b"".join((header, self._current.bits, previous.bits, recent))
+    
+    def _write(self, data: bytes):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, self.path)
+    
+    def _load(self) -> Optional[datetime]:
+        """Restore the last snapshot; returns when it was saved, or None"""
+        try:
+            data = self.path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            magic, saved_at, bit_count, hash_count, current_count, previous_count, recent_length = (
+                SNAPSHOT_HEADER.unpack_from(data, 0)
+            )
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError("bad magic")
+            expected = BloomFilter.sized(self.bloom_capacity, self.error_rate)
+            if (bit_count, hash_count) != (expected.bit_count, expected.hash_count):
+                # Sized for other settings: start over from the database
+                logger.info("Seen index settings changed, ignoring the snapshot")
+                return None
+            size = (bit_count + 7) // 8
+            offset = SNAPSHOT_HEADER.size
+            current = bytearray(data[offset:offset + size])
+            previous = bytearray(data[offset + size:offset + 2 * size])
+            recent = orjson.loads(data[offset + 2 * size:offset + 2 * size + recent_length])
+            if len(current) != size or len(previous) != size:
+                raise ValueError("truncated")
+        except (ValueError, struct.error, orjson.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable seen index snapshot: {e}")
+            return None
+        
+        self._current = BloomFilter(bit_count, hash_count, current, current_count)
+        self._previous = BloomFilter(bit_count, hash_count, previous, previous_count) if previous_count else None
+        self._recent = OrderedDict()
+        for key in recent:
+            self._add(key)
+        self._changes = 0
+        logger.info(f"Seen index snapshot loaded ({len(self)} keys)")
+        return datetime.fromtimestamp(saved_at, timezone.utc)
+
+
+# Private helpers
+
+def _key(source_name: str, external_id: Any) -> str:
+    # Same form as ticker_items.dedupe_key
+    return f"{source_name}:{external_id}"
+
+
+# Singleton instance
+seen_index = SeenIndex(Path(settings.seen_index_path))
@@ -0,0 +1,252 @@
+"""
+Source Fetchers - registry of ticker source fetchers with circuit breakers
+
+A fetcher takes a source and returns the items it found. It is registered
+for a ``source_type`` and optionally one ``source_name``; a source uses the
+fetcher for its exact pair, else the one for its type. Fetchers get a copy
+of the source and may keep state between fetches in its ``config`` (feed
+validators, a last-seen id); the keys they change come back on the result,
+for the caller to merge into the saved config once the items are persisted.
+
+``fetch_all`` runs every source concurrently, each within its own deadline,
+and yields each source's result as soon as it finishes, so one slow source
+delays no other and callers can persist batches as they arrive.
+
+Every source has a circuit breaker. It opens after ``failure_threshold``
+consecutive failures (seeded from the source's ``error_count``) or
+``window_failures`` failures within ``window_seconds``, and then the source
+is skipped without a request until its cool-down ends. The cool-down
+doubles with each further failure, up to ``max_cooldown_seconds``. After
+it, one trial fetch closes the breaker on success or reopens it on failure.
+"""
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from collections import deque
+from datetime import datetime, timezone
+from uuid import UUID
+import asyncio
+import copy
+import time
+from loguru import logger
+
+from core.config import settings
+from core.metrics import SOURCE_CIRCUIT_SKIPS, SOURCE_FETCH_SECONDS
+from models.ticker import SourceType, TickerItemCreate, TickerSource
+
+
+Fetcher = Callable[[TickerSource], Awaitable[List[TickerItemCreate]]]
+
+
+class CircuitBreaker:
+    """Failure tracking for one source"""
+    
+    __slots__ = ("failures", "recent", "opened_until", "probing")
+    
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.recent: Deque[float] = deque()
+        self.opened_until: Optional[float] = None
+        self.probing = False
+    
+    @property
+    def state(self) -> str:
+        if self.opened_until is None:
+            return "closed"
+        if self.probing or time.monotonic() >= self.opened_until:
+            return "half_open"
+        return "open"
+
+
+class SourceResult:
+    """Outcome of fetching one source; ``skipped`` when its breaker was open
+    
+    ``config`` holds the config keys the fetcher added or changed, if any.
+    """
+    
+    __slots__ = ("source", "items", "config", "error", "skipped", "seconds")
+    
+    def __init__(
+        self,
+        source: TickerSource,
+        items: Optional[List[TickerItemCreate]] = None,
+        config: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        skipped: bool = False,
+        seconds: float = 0.0
+    ):
+        self.source = source
+        self.items = items or []
+        self.config = config
+        self.error = error
+        self.skipped = skipped
+        self.seconds = seconds
+
+
+class FetcherRegistry:
+    """Fetchers by source type and name, run under per-source deadlines and breakers"""
+    
+    def __init__(
+        self,
+        timeout: float = settings.source_fetch_timeout,
+        failure_threshold: int = settings.source_breaker_failures,
+        window_failures: int = settings.source_breaker_window_failures,
+        window_seconds: float = settings.source_breaker_window_seconds,
+        cooldown_seconds: float = settings.source_breaker_cooldown_seconds,
+        max_cooldown_seconds: float = settings.source_breaker_max_cooldown_seconds
+    ):
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.window_failures = window_failures
+        self.window_seconds = window_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self._fetchers: Dict[Tuple[str, Optional[str]], Fetcher] = {}
+        self._breakers: Dict[UUID, CircuitBreaker] = {}
+    
+    def register(self, source_type: SourceType, fetcher: Fetcher, source_name: Optional[str] = None):
+        """Use ``fetcher`` for sources of this type (and name, if given)"""
+        self._fetchers[(SourceType(source_type).value, source_name)] = fetcher
+    
+    def resolve(self, source: TickerSource) -> Optional[Fetcher]:
+        source_type = SourceType(source.source_type).value
+        fetcher = self._fetchers.get((source_type, source.source_name))
+        if fetcher is None:
+            fetcher = self._fetchers.get((source_type, None))
+        return fetcher
+    
+    def circuit_state(self, source: TickerSource) -> str:
+        return self.breaker(source).state
+    
+    def breaker(self, source: TickerSource) -> CircuitBreaker:
+        breaker = self._breakers.get(source.id)
+        if breaker is None:
+            breaker = self._breakers[source.id] = CircuitBreaker(source.error_count)
+            if source.error_count >= self.failure_threshold:
+                # Failing before this process started: cool down from its last fetch
+                since = 0.0
+                if source.last_fetch_at is not None:
+                    last_fetch_at = source.last_fetch_at
+                    if last_fetch_at.tzinfo is None:
+                        last_fetch_at = last_fetch_at.replace(tzinfo=timezone.utc)
+                    since = (datetime.now(timezone.utc) - last_fetch_at).total_seconds()
+                breaker.opened_until = time.monotonic() + self._cooldown(breaker) - max(since, 0.0)
+        return breaker
+    
+    async def fetch(self, source: TickerSource, timeout: Optional[float] = None) -> SourceResult:
+        """Fetch one source within its deadline and record the outcome on its breaker
+        
+        The deadline is the source's ``config["timeout_seconds"]``, else
+        ``timeout``, else the registry default. Raises on failure. While the
+        source's breaker is open it is not fetched and the result is skipped.
+        """
+        if self.resolve(source) is None:
+            return SourceResult(source)
+        if not self._allow(self.breaker(source)):
+            SOURCE_CIRCUIT_SKIPS.labels(source.source_name).inc()
+            return SourceResult(source, skipped=True)
+        return await self._fetch(source, timeout)
+    
+    async def fetch_all(
+        self,
+        sources: Iterable[TickerSource],
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[SourceResult]:
+        """Fetch sources concurrently, yielding each result as it completes
+        
+        Sources whose breaker is open are yielded first, as skipped, without
+        being fetched. Closing the iterator early cancels unfinished fetches.
+        """
+        tasks: List[asyncio.Task] = []
+        skipped: List[SourceResult] = []
+        for source in sources:
+            if self.resolve(source) is None:
+                continue
+            if not self._allow(self.breaker(source)):
+                SOURCE_CIRCUIT_SKIPS.labels(source.source_name).inc()
+                skipped.append(SourceResult(source, skipped=True))
+                continue
+            tasks.append(asyncio.create_task(self._fetch_result(source, timeout)))
+        
+        try:
+            for result in skipped:
+                yield result
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    # Private helper methods
+    
+    async def _fetch(self, source: TickerSource, timeout: Optional[float]) -> SourceResult:
+        """Fetch a source its breaker already admitted"""
+        fetcher = self.resolve(source)
+        deadline = source.config.get("timeout_seconds") or timeout or self.timeout
+        breaker = self.breaker(source)
+        working = source.model_copy(update={"config": copy.deepcopy(source.config)})
+        started = time.perf_counter()
+        try:
+            items = await asyncio.wait_for(fetcher(working), deadline)
+        except asyncio.TimeoutError:
+            self._record_failure(source, breaker)
+            SOURCE_FETCH_SECONDS.labels(source.source_name, "error").observe(time.perf_counter() - started)
+            raise TimeoutError(f"{source.source_name} did not finish within {deadline:g}s")
+        except Exception:
+            self._record_failure(source, breaker)
+            SOURCE_FETCH_SECONDS.labels(source.source_name, "error").observe(time.perf_counter() - started)
+            raise
+        finally:
+            # Also when cancelled, so an interrupted trial fetch lets the next one run
+            breaker.probing = False
+        seconds = time.perf_counter() - started
+        self._record_success(source, breaker)
+        SOURCE_FETCH_SECONDS.labels(source.source_name, "success").observe(seconds)
+        changes = {
+            key: value for key, value in working.config.items()
+            if key not in source.config or source.config[key] != value
+        }
+        return SourceResult(source, items, changes or None, seconds=seconds)
+    
+    async def _fetch_result(self, source: TickerSource, timeout: Optional[float]) -> SourceResult:
+        started = time.perf_counter()
+        try:
+            return await self._fetch(source, timeout)
+        except Exception as e:
+            return SourceResult(source, error=str(e) or type(e).__name__, seconds=time.perf_counter() - started)
+    
+    def _allow(self, breaker: CircuitBreaker) -> bool:
+        if breaker.opened_until is None:
+            return True
+        if breaker.probing or time.monotonic() < breaker.opened_until:
+            return False
+        breaker.probing = True
+        return True
+    
+    def _record_success(self, source: TickerSource, breaker: CircuitBreaker):
+        if breaker.opened_until is not None:
+            logger.info(f"Circuit for {source.source_name} closed")
+        breaker.failures = 0
+        breaker.recent.clear()
+        breaker.opened_until = None
+        breaker.probing = False
+    
+    def _record_failure(self, source: TickerSource, breaker: CircuitBreaker):
+        now = time.monotonic()
+        breaker.failures += 1
+        breaker.recent.append(now)
+        while breaker.recent and now - breaker.recent[0] > self.window_seconds:
+            breaker.recent.popleft()
+        breaker.probing = False
+        if breaker.failures >= self.failure_threshold or len(breaker.recent) >= self.window_failures:
+            cooldown = self._cooldown(breaker)
+            breaker.opened_until = now + cooldown
+            logger.warning(
+                f"Circuit for {source.source_name} open for {cooldown:.0f}s after {breaker.failures} failures"
+            )
+    
+    def _cooldown(self, breaker: CircuitBreaker) -> float:
+        excess = max(0, breaker.failures - self.failure_threshold)
+        return min(self.cooldown_seconds * (2 ** min(excess, 16)), self.max_cooldown_seconds)
+
+
+# Singleton instance
+source_fetchers = FetcherRegistry()
@@ -0,0 +1,202 @@
+"""
+Source Scheduler - interval-aware background refresh of ticker sources
+"""
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+import asyncio
+import random
+from loguru import logger
+
+from core.config import settings
+from models.ticker import TickerSource
+from services.ticker_service import ticker_service
+from services.refresh_coordinator import refresh_coordinator
+from services.source_fetchers import source_fetchers
+
+
+# How often the source list is re-read to pick up config changes
+SOURCE_RELOAD_SECONDS = 300
+
+# Upper bound on a single idle sleep, so reloads are never missed
+MAX_IDLE_SECONDS = 60
+
+
+class ScheduledSource:
+    """Scheduling state for one source"""
+    
+    __slots__ = ("source", "next_due_at", "running", "last_outcome")
+    
+    def __init__(self, source: TickerSource):
+        self.source = source
+        self.next_due_at: datetime = datetime.now(timezone.utc)
+        self.running = False
+        self.last_outcome: Optional[str] = None
+
+
+class SourceScheduler:
+    """Refreshes each ticker source when its refresh interval comes due
+    
+    A source is due ``refresh_interval_minutes`` after its last fetch,
+    scaled by ``2 ** error_count`` while it keeps failing (capped at
+    ``max_backoff_minutes``), plus random jitter of up to ``jitter_ratio``
+    of the delay so sources do not fire in lockstep. Due sources run
+    concurrently under a global limit, each with its own timeout.
+    """
+    
+    def __init__(
+        self,
+        max_concurrency: int = settings.scheduler_max_concurrency,
+        source_timeout: float = settings.scheduler_source_timeout,
+        jitter_ratio: float = settings.scheduler_jitter_ratio,
+        max_backoff_minutes: int = settings.scheduler_max_backoff_minutes
+    ):
+        self.max_concurrency = max_concurrency
+        self.source_timeout = source_timeout
+        self.jitter_ratio = jitter_ratio
+        self.max_backoff_minutes = max_backoff_minutes
+        self._entries: Dict[UUID, ScheduledSource] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._wakeup = asyncio.Event()
+        self._running_tasks: set = set()
+        self._task: Optional[asyncio.Task] = None
+        self._loaded_at: Optional[datetime] = None
+    
+    async def start(self):
+        """Start the scheduling loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Source scheduler started")
+    
+    async def stop(self):
+        """Stop the loop and cancel in-flight refreshes"""
+        tasks = [task for task in (self._task, *self._running_tasks) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._running_tasks.clear()
+        logger.info("Source scheduler stopped")
+    
+    def next_delay(self, source: TickerSource) -> timedelta:
+        """Delay before the next run after a fetch, including backoff and jitter"""
+        minutes = source.refresh_interval_minutes * (2 ** min(source.error_count, 16))
+        minutes = min(minutes, max(self.max_backoff_minutes, source.refresh_interval_minutes))
+        jitter = random.uniform(0, self.jitter_ratio) * minutes
+        return timedelta(minutes=minutes + jitter)
+    
+    def schedule(self) -> List[Dict[str, Any]]:
+        """Current schedule, soonest first"""
+        now = datetime.now(timezone.utc)
+        entries = sorted(self._entries.values(), key=lambda entry: entry.next_due_at)
+        return [
+            {
+                "source_id": str(entry.source.id),
+                "source_name": entry.source.source_name,
+                "category": entry.source.category,
+                "refresh_interval_minutes": entry.source.refresh_interval_minutes,
+                "error_count": entry.source.error_count,
+                "last_fetch_at": entry.source.last_fetch_at,
+                "last_error": entry.source.last_error,
+                "last_outcome": entry.last_outcome,
+                "circuit": source_fetchers.circuit_state(entry.source),
+                "next_due_at": entry.next_due_at,
+                "due_in_seconds": max(0.0, (entry.next_due_at - now).total_seconds()),
+                "running": entry.running
+            }
+            for entry in entries
+        ]
+    
+    async def reload(self):
+        """Re-read enabled sources, keeping the state of known ones"""
+        sources = [
+            source for source in await ticker_service.get_enabled_sources()
+            if ticker_service.has_fetcher(source)
+        ]
+        entries = {}
+        for source in sources:
+            entry = self._entries.get(source.id)
+            if entry is None:
+                entry = ScheduledSource(source)
+                entry.next_due_at = self._initial_due(source)
+            elif not entry.running:
+                entry.source = source
+            entries[source.id] = entry
+        
+        self._entries = entries
+        self._loaded_at = datetime.now(timezone.utc)
+        self._wakeup.set()
+    
+    # Private helper methods
+    
+    def _initial_due(self, source: TickerSource) -> datetime:
+        now = datetime.now(timezone.utc)
+        if source.last_fetch_at is None:
+            # Never fetched: spread first runs over a fraction of the interval
+            spread = random.uniform(0, self.jitter_ratio) * source.refresh_interval_minutes
+            return now + timedelta(minutes=spread)
+        last_fetch_at = source.last_fetch_at
+        if last_fetch_at.tzinfo is None:
+            last_fetch_at = last_fetch_at.replace(tzinfo=timezone.utc)
+        return max(now, last_fetch_at + self.next_delay(source))
+    
+    async def _run(self):
+        while True:
+            try:
+                now = datetime.now(timezone.utc)
+                if self._loaded_at is None or (now - self._loaded_at).total_seconds() >= SOURCE_RELOAD_SECONDS:
+                    await self.reload()
+                
+                for entry in self._entries.values():
+                    if not entry.running and entry.next_due_at <= now:
+                        entry.running = True
+                        task = asyncio.create_task(self._refresh(entry))
+                        self._running_tasks.add(task)
+                        task.add_done_callback(self._running_tasks.discard)
+                
+                # Sleep until the next source is due (or a reload is needed)
+                waiting = [entry.next_due_at for entry in self._entries.values() if not entry.running]
+                delay = MAX_IDLE_SECONDS
+                if waiting:
+                    delay = min(delay, (min(waiting) - now).total_seconds())
+                
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=max(delay, 0.05))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Source scheduler loop error: {e}")
+                await asyncio.sleep(MAX_IDLE_SECONDS)
+    
+    async def _refresh(self, entry: ScheduledSource):
+        source = entry.source
+        try:
+            async with self._semaphore:
+                counts = await ticker_service.refresh_source(source, timeout=self.source_timeout)
+            if counts is None:
+                entry.last_outcome = "skipped"
+                logger.debug(f"Skipped {source.source_name}: its circuit is open")
+                return
+            source.error_count = 0
+            entry.last_outcome = "success"
+            refresh_coordinator.mark_fresh(source.category)
+            logger.info(f"Refreshed {source.source_name}: {counts}")
+        except Exception as e:
+            source.error_count += 1
+            source.last_error = str(e) or type(e).__name__
+            entry.last_outcome = "error"
+            logger.warning(
+                f"Refresh of {source.source_name} failed ({source.error_count} in a row): {source.last_error}"
+            )
+        finally:
+            source.last_fetch_at = datetime.now(timezone.utc)
+            entry.next_due_at = source.last_fetch_at + self.next_delay(source)
+            entry.running = False
+            self._wakeup.set()
+
+
+# Singleton instance
+source_scheduler = SourceScheduler()
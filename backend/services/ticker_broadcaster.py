@@ -0,0 +1,237 @@
+"""
+Ticker Broadcaster - process-wide fan-out of ticker updates to WebSockets
+"""
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+from datetime import datetime, timezone
+import asyncio
+from loguru import logger
+
+from core.config import settings
+from core.metrics import BROADCAST_LAG_SECONDS
+from models.ticker import TickerItem, TickerCategory, TickerFeedRequest, ticker_items_json
+from services.ticker_changes import ChangeEvent, ticker_changes
+from services.ticker_service import ticker_service
+
+
+# Number of recent items kept for initial frames
+RECENT_ITEMS_MAX = 100
+
+
+class TickerSubscriber:
+    """A connected client with a bounded queue of pre-encoded frames"""
+    
+    def __init__(self, categories: Optional[Iterable[TickerCategory]], queue_size: int):
+        self.categories: Optional[FrozenSet[str]] = (
+            frozenset(TickerCategory(cat).value for cat in categories) if categories else None
+        )
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+    
+    def accepts(self, item: TickerItem) -> bool:
+        return self.categories is None or item.category.value in self.categories
+    
+    def close(self):
+        """Discard pending frames and wake the sender with a None sentinel"""
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class TickerBroadcaster:
+    """Single background consumer that fans each update out to every subscriber
+    
+    New items arrive from the ticker change feed as they are committed, or,
+    without a direct database connection, are polled once per interval
+    regardless of how many clients are connected. Each batch is encoded
+    once per distinct category filter and the same frame is queued for each
+    matching subscriber. A subscriber whose queue is full is dropped rather
+    than slowing everyone else down.
+    """
+    
+    def __init__(
+        self,
+        poll_interval: float = settings.ticker_ws_poll_seconds,
+        queue_size: int = settings.ticker_ws_queue_size,
+        initial_limit: int = 20
+    ):
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.initial_limit = initial_limit
+        self._subscribers: Set[TickerSubscriber] = set()
+        self._recent: List[TickerItem] = []
+        self._watermark: Optional[datetime] = None
+        self._primed = False
+        self._prime_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+    
+    @property
+    def queued_frames(self) -> int:
+        """Frames waiting to be sent, across all subscribers"""
+        return sum(subscriber.queue.qsize() for subscriber in self._subscribers)
+    
+    async def start(self):
+        """Start the background poller"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Ticker broadcaster started")
+    
+    async def stop(self):
+        """Stop the poller and disconnect all subscribers"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        for subscriber in list(self._subscribers):
+            self.unsubscribe(subscriber)
+        logger.info("Ticker broadcaster stopped")
+    
+    def subscribe(self, categories: Optional[Iterable[TickerCategory]] = None) -> TickerSubscriber:
+        """Register a new subscriber"""
+        subscriber = TickerSubscriber(categories, self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber: TickerSubscriber):
+        """Remove a subscriber and release its sender"""
+        if subscriber in self._subscribers:
+            self._subscribers.discard(subscriber)
+            subscriber.close()
+    
+    async def initial_frame(self, subscriber: TickerSubscriber) -> str:
+        """Encoded snapshot of recent items for a newly connected client"""
+        await self._prime()
+        items = [item for item in self._recent if subscriber.accepts(item)]
+        return self._encode("initial", items[:self.initial_limit])
+    
+    def publish(self, items: List[TickerItem]):
+        """Queue one shared frame per category filter for every subscriber"""
+        if not items:
+            return
+        
+        self._remember(items)
+        
+        now = datetime.now(timezone.utc)
+        for item in items:
+            if item.created_at.tzinfo is not None:
+                BROADCAST_LAG_SECONDS.observe((now - item.created_at).total_seconds())
+        
+        frames: Dict[Optional[FrozenSet[str]], Optional[str]] = {}
+        for subscriber in list(self._subscribers):
+            if subscriber.categories not in frames:
+                matching = [item for item in items if subscriber.accepts(item)]
+                frames[subscriber.categories] = self._encode("update", matching) if matching else None
+            
+            frame = frames[subscriber.categories]
+            if frame is None:
+                continue
+            
+            try:
+                subscriber.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                logger.warning("Dropping slow ticker WebSocket subscriber")
+                self.unsubscribe(subscriber)
+    
+    def apply_changes(self, events: List[ChangeEvent]):
+        """Publish newly inserted shared items and keep the recent window current"""
+        removed = {event.item_id for event in events if not event.live}
+        if removed:
+            self._recent = [item for item in self._recent if item.id not in removed]
+        
+        # Personal items are never broadcast
+        shared = [event for event in events if event.live and event.row.get("user_id") is None]
+        updated = [event.item for event in shared if event.op == "update"]
+        if updated:
+            self._remember(updated)
+        self.publish([event.item for event in shared if event.op == "insert"])
+    
+    async def poll_once(self):
+        """Fetch items created since the last poll and publish them"""
+        if not await self._prime():
+            return
+        
+        request = TickerFeedRequest(limit=RECENT_ITEMS_MAX, sort_by="created_at")
+        items = await ticker_service.get_ticker_feed(request)
+        
+        known_ids = {item.id for item in self._recent}
+        new_items = [
+            item for item in items
+            if item.id not in known_ids
+            and (self._watermark is None or item.created_at >= self._watermark)
+        ]
+        self.publish(new_items)
+    
+    # Private helper methods
+    
+    async def _run(self):
+        if ticker_changes.enabled:
+            await self._follow_changes()
+            return
+        
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self._subscribers:
+                continue
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Ticker broadcaster poll failed: {e}")
+    
+    async def _follow_changes(self):
+        subscription = ticker_changes.subscribe()
+        try:
+            async for events in subscription:
+                try:
+                    self.apply_changes(events)
+                except Exception as e:
+                    logger.error(f"Ticker broadcaster failed to publish changes: {e}")
+        finally:
+            ticker_changes.unsubscribe(subscription)
+    
+    async def _prime(self) -> bool:
+        """Load the recent item window once, shared by all subscribers
+        
+        Returns False if the load failed; the next call tries again, so a
+        failed load never makes the first poll republish the whole window.
+        """
+        if self._primed:
+            return True
+        async with self._prime_lock:
+            if self._primed:
+                return True
+            request = TickerFeedRequest(limit=RECENT_ITEMS_MAX, sort_by="created_at")
+            try:
+                items = await ticker_service.get_ticker_feed(request, raise_errors=True)
+            except Exception as e:
+                logger.error(f"Ticker broadcaster failed to load recent items: {e}")
+                return False
+            self._remember(items)
+            self._primed = True
+            return True
+    
+    def _remember(self, items: List[TickerItem]):
+        self._recent = sorted(
+            {item.id: item for item in self._recent + items}.values(),
+            key=lambda item: item.created_at,
+            reverse=True
+        )[:RECENT_ITEMS_MAX]
+        if self._recent:
+            self._watermark = self._recent[0].created_at
+    
+    @staticmethod
+    def _encode(frame_type: str, items: List[TickerItem]) -> str:
+        # Splice in each item's cached encoding instead of re-serializing
+        items_json = ticker_items_json(items).decode()
+        return f'{{"type":"{frame_type}","items":{items_json}}}'
+
+
+# Singleton instance
+ticker_broadcaster = TickerBroadcaster()
@@ -0,0 +1,369 @@
+"""
+Ticker Changes - ticker_items change capture over Postgres LISTEN/NOTIFY
+
+A trigger records every insert, update and deactivation of a ticker item in
+``ticker_item_changes`` and sends its ``seq`` (and usually the row) on the
+``ticker_items_changes`` channel. One listener connection per process turns
+those notifications into an in-process stream of :class:`ChangeEvent`, so
+updates reach consumers within a round trip of the commit and nothing polls.
+
+NOTIFY is only delivered while the connection is up, so after a reconnect
+the listener reads back every change with a seq above the last one it has
+seen contiguously. Sequence values are taken before commit, so a later seq
+can arrive first; the listener remembers which seqs above the contiguous
+point it already delivered and skips them during catch-up. A hole that stays
+open longer than ``hole_grace_seconds`` most likely belongs to a rolled-back
+transaction and is skipped; its seqs are remembered for
+``skipped_retention_seconds`` so a long transaction that commits after all is
+still delivered, live or during catch-up.
+"""
+from typing import Any, Deque, Dict, List, Optional, Set
+from collections import deque
+from datetime import datetime, timezone
+from uuid import UUID
+import asyncio
+import json
+import time
+
+import asyncpg
+from loguru import logger
+
+from core.config import settings
+from models.ticker import TickerItem
+
+
+CHANNEL = "ticker_items_changes"
+
+SELECT_LATEST_SEQ_SQL = "SELECT COALESCE(MAX(seq), 0) FROM public.ticker_item_changes"
+
+# Current state of the changed rows; a deleted row comes back as NULL
+SELECT_CHANGES_SINCE_SQL = """
+    SELECT c.seq, c.op, c.item_id, to_jsonb(t) AS row
+    FROM public.ticker_item_changes c
+    LEFT JOIN public.ticker_items t ON t.id = c.item_id
+    WHERE c.seq > $1
+    ORDER BY c.seq
+    LIMIT $2
+"""
+
+SELECT_CHANGES_BY_SEQ_SQL = """
+    SELECT c.seq, c.op, c.item_id, to_jsonb(t) AS row
+    FROM public.ticker_item_changes c
+    LEFT JOIN public.ticker_items t ON t.id = c.item_id
+    WHERE c.seq = ANY($1::BIGINT[])
+    ORDER BY c.seq
+"""
+
+KEEPALIVE_SQL = "SELECT 1"
+
+CATCH_UP_PAGE_SIZE = 1000
+
+# Reconnect backoff
+RETRY_INITIAL_SECONDS = 1.0
+RETRY_MAX_SECONDS = 30.0
+
+_TIMESTAMP_FIELDS = ("created_at", "updated_at", "expires_at")
+
+
+class ChangeEvent:
+    """One ticker_items change; ``row`` is None when the row was deleted
+    
+    ``floor`` is the feed's committed floor once this change was delivered:
+    every change at or below it had been delivered by then.
+    """
+    
+    __slots__ = ("seq", "op", "item_id", "row", "floor", "_item")
+    
+    def __init__(self, seq: int, op: str, item_id: UUID, row: Optional[Dict[str, Any]]):
+        self.seq = seq
+        self.op = op
+        self.item_id = item_id
+        self.row = row
+        self.floor: Optional[int] = None
+        self._item: Optional[TickerItem] = None
+    
+    @property
+    def live(self) -> bool:
+        """True when the item is active and unexpired after this change"""
+        if self.row is None or not self.row.get("is_active", True):
+            return False
+        expires_at = self.row.get("expires_at")
+        return expires_at is None or expires_at > datetime.now(timezone.utc)
+    
+    @property
+    def item(self) -> Optional[TickerItem]:
+        if self._item is None and self.row is not None:
+            self._item = TickerItem.from_row(self.row)
+        return self._item
+    
+    @classmethod
+    def from_json(cls, seq: int, op: str, item_id: Any, row: Optional[Dict[str, Any]]) -> "ChangeEvent":
+        """Build from JSON fields, parsing the row's timestamps and ids"""
+        if isinstance(row, str):
+            row = json.loads(row)
+        if row is not None:
+            row = dict(row)
+            for field in _TIMESTAMP_FIELDS:
+                if row.get(field):
+                    row[field] = datetime.fromisoformat(row[field])
+            row["id"] = UUID(row["id"])
+            if row.get("user_id"):
+                row["user_id"] = UUID(row["user_id"])
+        return cls(int(seq), op, item_id if isinstance(item_id, UUID) else UUID(item_id), row)
+
+
+class ChangeSubscription:
+    """An unbounded queue of change events for one in-process consumer"""
+    
+    def __init__(self):
+        self._events: Deque[ChangeEvent] = deque()
+        self._ready = asyncio.Event()
+    
+    def put(self, event: ChangeEvent):
+        self._events.append(event)
+        self._ready.set()
+    
+    async def get_batch(self) -> List[ChangeEvent]:
+        """Wait for at least one event and return everything queued"""
+        await self._ready.wait()
+        events = list(self._events)
+        self._events.clear()
+        self._ready.clear()
+        return events
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self) -> List[ChangeEvent]:
+        return await self.get_batch()
+
+
+class TickerChangeFeed:
+    """Lifespan-managed LISTEN connection fanning changes out to subscribers"""
+    
+    def __init__(
+        self,
+        keepalive_interval: float = settings.ticker_changes_keepalive_seconds,
+        hole_grace_seconds: float = settings.ticker_changes_hole_grace_seconds,
+        skipped_retention_seconds: float = settings.ticker_changes_skipped_retention_seconds
+    ):
+        self.keepalive_interval = keepalive_interval
+        self.hole_grace_seconds = hole_grace_seconds
+        self.skipped_retention_seconds = skipped_retention_seconds
+        self._subscriptions: Set[ChangeSubscription] = set()
+        self._connection: Optional[asyncpg.Connection] = None
+        self._connected = asyncio.Event()
+        self._closed = asyncio.Event()
+        # Every seq <= _floor has been delivered (or skipped as a hole)
+        self._floor: Optional[int] = None
+        self._delivered: Set[int] = set()
+        self._hole_since: Optional[float] = None
+        # Skipped seqs (ascending) and when they were skipped
+        self._skipped: Dict[int, float] = {}
+        self._fetches: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def enabled(self) -> bool:
+        """True when the listener is running (it may be reconnecting)"""
+        return self._task is not None and not self._task.done()
+    
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+    
+    @property
+    def last_seq(self) -> Optional[int]:
+        """Highest seq delivered so far"""
+        return max(self._delivered, default=self._floor)
+    
+    @property
+    def committed_floor(self) -> Optional[int]:
+        """Every seq at or below this has been delivered, or surely rolled back"""
+        if self._floor is None or not self._skipped:
+            return self._floor
+        return min(self._floor, next(iter(self._skipped)) - 1)
+    
+    async def start(self):
+        """Start listening when a direct database connection is configured"""
+        if not settings.ticker_changes_enabled or not settings.database_url:
+            logger.info("Ticker change capture disabled, ticker updates are polled")
+            return
+        if not self.enabled:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Ticker change feed started")
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in list(self._fetches):
+            task.cancel()
+    
+    def subscribe(self) -> ChangeSubscription:
+        subscription = ChangeSubscription()
+        self._subscriptions.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: ChangeSubscription):
+        self._subscriptions.discard(subscription)
+    
+    # Private helper methods
+    
+    async def _run(self):
+        delay = RETRY_INITIAL_SECONDS
+        while True:
+            try:
+                await self._listen()
+                delay = RETRY_INITIAL_SECONDS
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ticker change listener failed: {e}")
+            finally:
+                self._connected.clear()
+                await self._close()
+            logger.warning(f"Ticker change listener reconnecting in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RETRY_MAX_SECONDS)
+    
+    async def _listen(self):
+        """Hold one LISTEN session until the connection drops"""
+        self._closed.clear()
+        self._connection = connection = await asyncpg.connect(dsn=settings.database_url)
+        connection.add_termination_listener(lambda _: self._closed.set())
+        await connection.add_listener(CHANNEL, self._on_notify)
+        
+        # Listening before reading the position means nothing falls in between
+        if self._floor is None:
+            self._set_floor(await connection.fetchval(SELECT_LATEST_SEQ_SQL))
+        else:
+            await self._catch_up(connection)
+        self._connected.set()
+        logger.info(f"Listening for ticker changes from seq {self._floor}")
+        
+        while True:
+            try:
+                await asyncio.wait_for(self._closed.wait(), timeout=self.keepalive_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            # Detect half-open connections that would otherwise go quiet
+            await connection.fetchval(KEEPALIVE_SQL, timeout=10)
+            self._skip_stale_hole()
+    
+    async def _close(self):
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            try:
+                await connection.close(timeout=5)
+            except Exception:
+                connection.terminate()
+    
+    async def _catch_up(self, connection: asyncpg.Connection):
+        """Deliver every change after the contiguous floor that was missed"""
+        caught_up = 0
+        since = self._floor
+        while True:
+            records = await connection.fetch(SELECT_CHANGES_SINCE_SQL, since, CATCH_UP_PAGE_SIZE)
+            for record in records:
+                self._deliver(ChangeEvent.from_json(record["seq"], record["op"], record["item_id"], record["row"]))
+                caught_up += 1
+            if len(records) < CATCH_UP_PAGE_SIZE:
+                break
+            since = records[-1]["seq"]
+        if self._skipped:
+            # Skipped holes whose transaction committed while disconnected
+            records = await connection.fetch(SELECT_CHANGES_BY_SEQ_SQL, list(self._skipped))
+            for record in records:
+                self._deliver(ChangeEvent.from_json(record["seq"], record["op"], record["item_id"], record["row"]))
+                caught_up += 1
+        if caught_up:
+            logger.info(f"Caught up on {caught_up} ticker changes")
+    
+    def _on_notify(self, connection, pid: int, channel: str, payload: str):
+        try:
+            change = json.loads(payload)
+            if change.get("truncated"):
+                self._fetch_later(change["seq"])
+                return
+            self._deliver(ChangeEvent.from_json(change["seq"], change["op"], change["id"], change["row"]))
+        except Exception as e:
+            logger.error(f"Bad ticker change notification {payload[:200]!r}: {e}")
+    
+    def _fetch_later(self, seq: int):
+        """Read back a change whose row did not fit in the notification"""
+        async def fetch():
+            connection = self._connection
+            if connection is None:
+                return  # catch-up after the reconnect delivers it
+            records = await connection.fetch(SELECT_CHANGES_BY_SEQ_SQL, [seq])
+            for record in records:
+                self._deliver(ChangeEvent.from_json(record["seq"], record["op"], record["item_id"], record["row"]))
+        
+        task = asyncio.create_task(fetch())
+        self._fetches.add(task)
+        task.add_done_callback(self._fetches.discard)
+    
+    def _set_floor(self, seq: int):
+        """Start from ``seq``; changes notified while it was read may be at or below it"""
+        self._floor = seq
+        self._delivered = {delivered for delivered in self._delivered if delivered > seq}
+        self._hole_since = None
+        self._advance()
+    
+    def _deliver(self, event: ChangeEvent):
+        if self._floor is not None and (event.seq <= self._floor or event.seq in self._delivered):
+            if self._skipped.pop(event.seq, None) is None:
+                return
+            logger.warning(f"Ticker change seq {event.seq} committed after its hole was skipped")
+        else:
+            self._delivered.add(event.seq)
+        self._advance()
+        self._skip_stale_hole()
+        event.floor = self.committed_floor
+        for subscription in self._subscriptions:
+            subscription.put(event)
+    
+    def _advance(self):
+        """Move the floor over contiguously delivered seqs"""
+        if self._floor is None:
+            return
+        floor = self._floor
+        while self._floor + 1 in self._delivered:
+            self._floor += 1
+            self._delivered.discard(self._floor)
+        if not self._delivered:
+            self._hole_since = None
+        elif self._hole_since is None or self._floor != floor:
+            # The grace period runs from when the current lowest hole opened
+            self._hole_since = time.monotonic()
+    
+    def _skip_stale_hole(self):
+        now = time.monotonic()
+        self._forget_skipped(now)
+        if self._hole_since is None or now - self._hole_since < self.hole_grace_seconds:
+            return
+        skipped_to = min(self._delivered) - 1
+        logger.debug(f"Skipping ticker change seqs {self._floor + 1}..{skipped_to}")
+        for seq in range(self._floor + 1, skipped_to + 1):
+            self._skipped[seq] = now
+        self._floor = skipped_to
+        self._hole_since = None
+        self._advance()
+    
+    def _forget_skipped(self, now: float):
+        """Stop waiting for skipped seqs once they are surely rolled back"""
+        while self._skipped:
+            seq, skipped_at = next(iter(self._skipped.items()))
+            if now - skipped_at < self.skipped_retention_seconds:
+                break
+            del self._skipped[seq]
+
+
+# Singleton instance
+ticker_changes = TickerChangeFeed()
@@ -0,0 +1,233 @@
+"""
+Ticker Ranking - vectorized relevance scoring over columnar candidate batches
+"""
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+from datetime import datetime, timezone
+import numpy as np
+
+from models.ticker import TickerCategory
+
+
+CATEGORY_CODES = {category.value: code for code, category in enumerate(TickerCategory)}
+
+# Score added per engagement of each kind by the requesting user; the same
+# weights as ticker_engagement_weight() in database/ticker_schema.sql
+DEFAULT_ENGAGEMENT_WEIGHTS = {
+    "click": 5.0,
+    "share": 5.0,
+    "view": 1.0,
+    "dismiss": -25.0
+}
+
+
+class RankingWeights:
+    """Per-user ranking weights, read from ticker_preferences.custom_filters
+    
+    ``category_weights`` and ``source_weights`` multiply the time-decayed
+    priority score; unknown categories and sources default to 1.0.
+    """
+    
+    def __init__(
+        self,
+        category_weights: Optional[Mapping[str, float]] = None,
+        source_weights: Optional[Mapping[str, float]] = None,
+        engagement_weights: Optional[Mapping[str, float]] = None
+    ):
+        self.category_weights = dict(category_weights or {})
+        self.source_weights = dict(source_weights or {})
+        self.engagement_weights = {**DEFAULT_ENGAGEMENT_WEIGHTS, **(engagement_weights or {})}
+    
+    @classmethod
+    def from_custom_filters(cls, custom_filters: Optional[Dict[str, Any]]) -> "RankingWeights":
+        custom_filters = custom_filters or {}
+        return cls(
+            category_weights=custom_filters.get("category_weights"),
+            source_weights=custom_filters.get("source_weights"),
+            engagement_weights=custom_filters.get("engagement_weights")
+        )
+    
+    @property
+    def is_default(self) -> bool:
+        """True when these weights rank exactly like get_ranked_ticker_items()"""
+        return (
+            not self.category_weights
+            and not self.source_weights
+            and self.engagement_weights == DEFAULT_ENGAGEMENT_WEIGHTS
+        )
+    
+    def category_vector(self) -> np.ndarray:
+        vector = np.ones(len(CATEGORY_CODES), dtype=np.float64)
+        for category, weight in self.category_weights.items():
+            if category in CATEGORY_CODES:
+                vector[CATEGORY_CODES[category]] = float(weight)
+        return vector
+
+
+class CandidateBatch:
+    """Ranking features for a set of candidate items, stored column-wise
+    
+    ``rows`` keeps the raw DB rows so only the selected top K are ever
+    turned into TickerItem models.
+    """
+    
+    __slots__ = (
+        "rows", "priority", "created_ts", "category", "source",
+        "clicks", "views", "shares", "dismisses"
+    )
+    
+    def __init__(
+        self,
+        rows: Sequence[Mapping[str, Any]],
+        engagement: Optional[Mapping[Any, Mapping[str, int]]] = None
+    ):
+        count = len(rows)
+        self.rows = rows
+        self.priority = np.fromiter((row["priority"] for row in rows), dtype=np.float64, count=count)
+        self.created_ts = np.fromiter(
+            (_timestamp(row["created_at"]) for row in rows), dtype=np.float64, count=count
+        )
+        self.category = np.fromiter(
+            (CATEGORY_CODES.get(_value(row["category"]), 0) for row in rows), dtype=np.int8, count=count
+        )
+        self.source = np.array([_source_name(row) for row in rows], dtype=object)
+        
+        if engagement is None:
+            # Counts were joined onto the rows by the candidate query
+            columns = {
+                action: np.fromiter((row.get(action) or 0 for row in rows), dtype=np.float64, count=count)
+                for action in ("clicks", "views", "shares", "dismisses")
+            }
+        elif not engagement:
+            columns = {
+                action: np.zeros(count, dtype=np.float64)
+                for action in ("clicks", "views", "shares", "dismisses")
+            }
+        else:
+            empty: Mapping[str, int] = {}
+            columns = {
+                action: np.fromiter(
+                    (engagement.get(_key(row["id"]), empty).get(action, 0) for row in rows),
+                    dtype=np.float64,
+                    count=count
+                )
+                for action in ("clicks", "views", "shares", "dismisses")
+            }
+        self.clicks = columns["clicks"]
+        self.views = columns["views"]
+        self.shares = columns["shares"]
+        self.dismisses = columns["dismisses"]
+    
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+def score_batch(
+    batch: CandidateBatch,
+    weights: Optional[RankingWeights] = None,
+    now: Optional[datetime] = None
+) -> np.ndarray:
+    """Relevance scores for the whole batch in one vectorized pass
+    
+    Mirrors calculate_ticker_relevance(): ``(6 - priority) * 20`` decayed by
+    ``1 / (1 + age_hours / 24)``, scaled by category and source weights,
+    plus weighted engagement counts.
+    """
+    weights = weights or RankingWeights()
+    if len(batch) == 0:
+        return np.empty(0, dtype=np.float64)
+    
+    now_ts = (now or datetime.now(timezone.utc)).timestamp()
+    age_hours = np.maximum(now_ts - batch.created_ts, 0.0) / 3600.0
+    scores = (6.0 - batch.priority) * 20.0 / (1.0 + age_hours / 24.0)
+    
+    if weights.category_weights:
+        scores *= weights.category_vector()[batch.category]
+    
+    if weights.source_weights:
+        sources, inverse = np.unique(batch.source, return_inverse=True)
+        source_vector = np.array(
+            [float(weights.source_weights.get(source, 1.0)) for source in sources],
+            dtype=np.float64
+        )
+        scores *= source_vector[inverse]
+    
+    engagement = weights.engagement_weights
+    scores += (
+        batch.clicks * engagement["click"]
+        + batch.views * engagement["view"]
+        + batch.shares * engagement["share"]
+        + batch.dismisses * engagement["dismiss"]
+    )
+    return scores
+
+
+def top_k(scores: np.ndarray, k: int, created_ts: Optional[np.ndarray] = None) -> np.ndarray:
+    """Indices of the k highest scores, best first (argpartition, then sort the k)"""
+    count = scores.shape[0]
+    if k <= 0 or count == 0:
+        return np.empty(0, dtype=np.intp)
+    
+    if k < count:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(count)
+    
+    # Newest first among equal scores
+    if created_ts is not None:
+        order = np.lexsort((-created_ts[candidates], -scores[candidates]))
+    else:
+        order = np.argsort(-scores[candidates], kind="stable")
+    return candidates[order]
+
+
+def rank_rows(
+    batch: CandidateBatch,
+    k: int,
+    weights: Optional[RankingWeights] = None,
+    now: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """Top k rows of a batch, each with its relevance_score filled in"""
+    scores = score_batch(batch, weights, now)
+    ranked = []
+    for index in top_k(scores, k, batch.created_ts):
+        row = dict(batch.rows[index])
+        row["relevance_score"] = float(scores[index])
+        ranked.append(row)
+    return ranked
+
+
+def engagement_counts(records: Iterable[Mapping[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """Per-item engagement counts from raw ticker_engagement rows"""
+    plural = {"click": "clicks", "view": "views", "share": "shares", "dismiss": "dismisses"}
+    counts: Dict[str, Dict[str, int]] = {}
+    for record in records:
+        item_counts = counts.setdefault(_key(record["ticker_item_id"]), {})
+        action = plural.get(_value(record["action"]))
+        if action:
+            item_counts[action] = item_counts.get(action, 0) + 1
+    return counts
+
+
+# Private helpers
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+def _key(value: Any) -> str:
+    return str(value)
+
+
+def _source_name(row: Mapping[str, Any]) -> str:
+    if "source_name" in row:
+        return row["source_name"] or ""
+    source_data = row.get("source_data") or {}
+    return source_data.get("source") or ""
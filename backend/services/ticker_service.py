@@ -1,19 +1,306 @@
 """
 Ticker Service - Business logic for ticker system
 """
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime, timedelta, timezone
 from uuid import UUID
 import asyncio
+import base64
+import json
+import time
+import asyncpg
 import httpx
 from loguru import logger
 
-from core.database import get_supabase, get_supabase_admin
+from core.config import settings
+from core.database import get_supabase, get_supabase_admin, get_db_pool, execute_async
+from core.metrics import HTTP_CLIENT_SECONDS, INGESTED_ITEMS
 from models.ticker import (
     TickerItem, TickerItemCreate, TickerCategory,
-    TickerType, TickerFeedRequest, TickerInsight,
-    PerformanceAlert, TickerSource
+    TickerType, TickerFeedRequest, TickerFeedResponse, TickerInsight,
+    PerformanceAlert, TickerSource, SourceType
 )
+from services.ticker_ranking import (
+    CandidateBatch, RankingWeights, engagement_counts, rank_rows, score_batch
+)
+from services.ticker_store import ticker_store
+from services.performance_alerts import performance_alert_engine
+from services.seen_index import seen_index
+from services.source_fetchers import source_fetchers
+from services.rss_feeds import fetch_feed
+
+
+# SQL for the asyncpg backend. Statement text is kept stable so asyncpg's
+# per-connection statement cache reuses the prepared plan.
+TICKER_ITEM_COLUMNS = (
+    "category, title, description, icon_name, type, priority, "
+    "source_data, is_active, expires_at, user_id"
+)
+
+INSERT_TICKER_ITEM_SQL = f"""
+    INSERT INTO public.ticker_items ({TICKER_ITEM_COLUMNS})
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+    RETURNING *
+"""
+
+SELECT_ENABLED_SOURCES_SQL = """
+    SELECT * FROM public.ticker_sources
+    WHERE category = $1 AND is_enabled = true
+"""
+
+SELECT_ALL_ENABLED_SOURCES_SQL = """
+    SELECT * FROM public.ticker_sources WHERE is_enabled = true
+"""
+
+# error_count counts consecutive failures; a success resets it so the
+# scheduler's backoff starts over. $4 holds only the config keys the fetcher
+# changed, merged in so edits made to the source during the fetch survive.
+UPDATE_SOURCE_FETCH_SQL = """
+    UPDATE public.ticker_sources
+    SET last_fetch_at = NOW(),
+        fetch_count = fetch_count + 1,
+        last_success_at = CASE WHEN $2 THEN NOW() ELSE last_success_at END,
+        error_count = CASE WHEN $2 THEN 0 ELSE error_count + 1 END,
+        last_error = COALESCE($3, last_error),
+        config = COALESCE(config, '{}'::jsonb) || COALESCE($4::jsonb, '{}'::jsonb)
+    WHERE id = $1
+"""
+
+CLEANUP_EXPIRED_SQL = "SELECT cleanup_expired_ticker_items()"
+
+# Multi-row upsert keyed on the generated dedupe_key column. Unchanged rows
+# are filtered by the WHERE clause and not returned, so they count as skipped.
+# On conflict a shared item keeps its is_active, so re-ingestion never
+# revives one that was deactivated; a personal item (an insight) takes the
+# new value, so regenerating it reactivates it.
+BULK_UPSERT_TICKER_ITEMS_SQL = f"""
+    INSERT INTO public.ticker_items ({TICKER_ITEM_COLUMNS})
+    SELECT * FROM unnest(
+        $1::text[], $2::text[], $3::text[], $4::text[], $5::text[],
+        $6::int[], $7::jsonb[], $8::bool[], $9::timestamptz[], $10::uuid[]
+    )
+    ON CONFLICT (dedupe_key) DO UPDATE SET
+        title = EXCLUDED.title,
+        description = EXCLUDED.description,
+        icon_name = EXCLUDED.icon_name,
+        type = EXCLUDED.type,
+        priority = EXCLUDED.priority,
+        source_data = EXCLUDED.source_data,
+        expires_at = EXCLUDED.expires_at,
+        is_active = CASE WHEN EXCLUDED.user_id IS NOT NULL THEN EXCLUDED.is_active ELSE ticker_items.is_active END
+    WHERE (
+        ticker_items.title, ticker_items.description, ticker_items.icon_name,
+        ticker_items.type, ticker_items.priority, ticker_items.source_data,
+        ticker_items.expires_at, ticker_items.is_active
+    ) IS DISTINCT FROM (
+        EXCLUDED.title, EXCLUDED.description, EXCLUDED.icon_name,
+        EXCLUDED.type, EXCLUDED.priority, EXCLUDED.source_data,
+        EXCLUDED.expires_at,
+        CASE WHEN EXCLUDED.user_id IS NOT NULL THEN EXCLUDED.is_active ELSE ticker_items.is_active END
+    )
+    RETURNING *, (xmax = 0) AS inserted
+"""
+
+BULK_UPSERT_BATCH_SIZE = 500
+
+# Sort orders that support keyset (cursor) pagination
+KEYSET_SORTS = ("created_at", "priority")
+
+# Server-side relevance ranking (get_ranked_ticker_items in ticker_schema.sql).
+# Candidates are items from the last RELEVANCE_WINDOW_HOURS plus every item
+# with priority <= RELEVANCE_PRIORITY_TIER.
+RANKED_FEED_SQL = "SELECT * FROM get_ranked_ticker_items($1, $2, $3, $4, $5, $6, $7)"
+RELEVANCE_WINDOW_HOURS = 72
+RELEVANCE_PRIORITY_TIER = 2
+
+# Candidate window with the user's engagement counts joined on, for the
+# vectorized ranker (services/ticker_ranking.py)
+RANKING_CANDIDATES_SQL = """
+    SELECT t.id, t.category, t.title, t.description, t.icon_name, t.type,
+           t.priority, t.source_data, t.is_active, t.expires_at,
+           t.user_id, t.created_at, t.updated_at,
+           t.source_data->>'source' AS source_name,
+           COALESCE(e.clicks, 0) AS clicks,
+           COALESCE(e.views, 0) AS views,
+           COALESCE(e.shares, 0) AS shares,
+           COALESCE(e.dismisses, 0) AS dismisses
+    FROM public.ticker_items t
+    LEFT JOIN (
+        SELECT ticker_item_id,
+               COUNT(*) FILTER (WHERE action = 'click') AS clicks,
+               COUNT(*) FILTER (WHERE action = 'view') AS views,
+               COUNT(*) FILTER (WHERE action = 'share') AS shares,
+               COUNT(*) FILTER (WHERE action = 'dismiss') AS dismisses
+        FROM public.ticker_engagement
+        WHERE user_id = $1
+        GROUP BY ticker_item_id
+    ) e ON e.ticker_item_id = t.id
+    WHERE t.is_active = true
+      AND ($4 OR t.expires_at IS NULL OR t.expires_at > NOW())
+      AND ($2::text[] IS NULL OR t.category = ANY($2::text[]))
+      AND ($3::int IS NULL OR t.priority <= $3::int)
+      AND (t.user_id IS NULL OR t.user_id = $1)
+      AND (t.created_at > NOW() - make_interval(hours => $5) OR t.priority <= $6)
+    ORDER BY t.created_at DESC
+    LIMIT $7
+"""
+
+SELECT_ENGAGEMENT_SQL = """
+    SELECT ticker_item_id, action FROM public.ticker_engagement
+    WHERE user_id = $1 AND ticker_item_id = ANY($2::uuid[])
+"""
+
+SELECT_CUSTOM_FILTERS_SQL = """
+    SELECT custom_filters FROM public.ticker_preferences WHERE user_id = $1
+"""
+
+# Upper bound on candidates loaded for vectorized ranking
+RANKING_CANDIDATE_LIMIT = 10000
+
+# How long per-user ranking weights are cached
+RANKING_WEIGHTS_TTL_SECONDS = 60
+
+# Hacker News ingestion
+HN_API_BASE = "https://hacker-news.firebaseio.com/v0"
+HN_DEFAULT_CONCURRENCY = 10
+HN_DEFAULT_ITEM_TIMEOUT = 5.0
+
+
+def ticker_dedupe_key(source_data: Dict[str, Any]) -> Optional[str]:
+    """Content identity of an ingested item, mirroring ticker_items.dedupe_key"""
+    source = source_data.get("source")
+    external_id = source_data.get("hn_id")
+    if external_id is None:
+        external_id = source_data.get("external_id")
+    if source is None or external_id is None:
+        return None
+    return f"{source}:{external_id}"
+
+
+def rest_or(query, *conditions: str):
+    """Append a PostgREST ``or=(...)`` filter; repeated calls are ANDed together"""
+    query.params = query.params.add("or", f"({','.join(conditions)})")
+    return query
+
+
+def _rest_user_filter(query, user_id: Optional[UUID]):
+    """Limit a ticker_items REST query to shared items plus the user's own"""
+    if user_id:
+        return rest_or(query, "user_id.is.null", f"user_id.eq.{user_id}")
+    return query.is_("user_id", "null")
+
+
+async def _start_request_timer(request: httpx.Request):
+    request.extensions["started"] = time.perf_counter()
+
+
+async def _observe_response_time(response: httpx.Response):
+    """Outbound request latency up to the response headers, by host"""
+    started = response.request.extensions.get("started")
+    if started is not None:
+        HTTP_CLIENT_SECONDS.labels(response.request.url.host, str(response.status_code)).observe(
+            time.perf_counter() - started
+        )
+
+
+def encode_feed_cursor(sort_by: str, item: TickerItem) -> str:
+    """Encode the keyset position after ``item`` as an opaque cursor"""
+    if sort_by == "priority":
+        key = [item.priority, item.created_at.isoformat(), str(item.id)]
+    else:
+        key = [item.created_at.isoformat(), str(item.id)]
+    payload = json.dumps({"s": sort_by, "k": key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_feed_cursor(cursor: str, sort_by: str) -> Dict[str, Any]:
+    """Decode a feed cursor, raising ValueError if it is malformed or for another sort"""
+    if sort_by not in KEYSET_SORTS:
+        raise ValueError("Cursor pagination requires sort_by=created_at or priority")
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        cursor_sort, key = payload["s"], payload["k"]
+        if sort_by == "priority":
+            priority, created_at, item_id = key
+            decoded = {"priority": int(priority)}
+        else:
+            created_at, item_id = key
+            decoded = {}
+        decoded["created_at"] = datetime.fromisoformat(created_at)
+        decoded["id"] = UUID(item_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    
+    if cursor_sort != sort_by:
+        raise ValueError("Cursor was issued for a different sort order")
+    return decoded
+
+
+def build_feed_query(
+    request: TickerFeedRequest,
+    limit: int,
+    user_id: Optional[UUID] = None
+) -> Tuple[str, List[Any]]:
+    """Build the parameterized feed query for the asyncpg backend
+    
+    Cursor pages are keyset range scans on the (priority,) created_at, id
+    indexes. The priority order mixes ASC and DESC columns, so its cursor
+    is split into two range scans (rest of the current tier, later tiers).
+    Personal items are only included for their owner.
+    """
+    conditions = ["is_active = true"]
+    args: List[Any] = []
+    
+    if user_id:
+        args.append(user_id)
+        conditions.append(f"(user_id IS NULL OR user_id = ${len(args)})")
+    else:
+        conditions.append("user_id IS NULL")
+    
+    if not request.include_expired:
+        conditions.append("(expires_at IS NULL OR expires_at > NOW())")
+    
+    if request.categories:
+        args.append([cat.value for cat in request.categories])
+        conditions.append(f"category = ANY(${len(args)}::text[])")
+    
+    if request.priority_filter:
+        args.append(request.priority_filter)
+        conditions.append(f"priority <= ${len(args)}")
+    
+    cursor = decode_feed_cursor(request.cursor, request.sort_by) if request.cursor else None
+    
+    order_by = ""
+    if request.sort_by == "created_at":
+        order_by = "ORDER BY created_at DESC, id DESC"
+        if cursor:
+            args.extend([cursor["created_at"], cursor["id"]])
+            conditions.append(f"(created_at, id) < (${len(args) - 1}, ${len(args)})")
+    elif request.sort_by == "priority":
+        order_by = "ORDER BY priority, created_at DESC, id DESC"
+    
+    args.append(limit)
+    where = " AND ".join(conditions)
+    
+    if request.sort_by == "priority" and cursor:
+        args.extend([cursor["priority"], cursor["created_at"], cursor["id"]])
+        p, c, i = len(args) - 2, len(args) - 1, len(args)
+        sql = (
+            f"(SELECT * FROM public.ticker_items WHERE {where} AND priority = ${p} "
+            f"AND (created_at, id) < (${c}, ${i}) ORDER BY created_at DESC, id DESC LIMIT ${p - 1}) "
+            f"UNION ALL "
+            f"(SELECT * FROM public.ticker_items WHERE {where} AND priority > ${p} "
+            f"{order_by} LIMIT ${p - 1}) "
+            f"{order_by} LIMIT ${p - 1}"
+        )
+        return sql, args
+    
+    sql = (
+        f"SELECT * FROM public.ticker_items WHERE {where} "
+        f"{order_by} LIMIT ${len(args)}"
+    )
+    return sql, args
 
 
 class TickerService:
@@ -22,124 +309,323 @@ class TickerService:
     def __init__(self):
         self.supabase = get_supabase()
         self.admin_client = get_supabase_admin()
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._ranked_feed_available = True
+        self._ranking_weights: Dict[UUID, Tuple[float, RankingWeights]] = {}
+        source_fetchers.register(SourceType.API, lambda source: self._fetch_hacker_news(source.config), "hacker_news")
+        source_fetchers.register(SourceType.API, lambda source: self._fetch_tech_news(source.config), "tech_news")
+        source_fetchers.register(
+            SourceType.INTERNAL, lambda source: performance_alert_engine.poll(source.config), "google_ads_monitor"
+        )
+        source_fetchers.register(SourceType.RSS, lambda source: fetch_feed(self.http_client, source))
+    
+    @property
+    def pool(self):
+        """asyncpg pool when the Postgres backend is active, else None"""
+        return get_db_pool()
+    
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Shared outbound HTTP client (keep-alive, HTTP/2)"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(10.0),
+                limits=httpx.Limits(
+                    max_connections=50,
+                    max_keepalive_connections=20,
+                    keepalive_expiry=30.0
+                ),
+                event_hooks={"request": [_start_request_timer], "response": [_observe_response_time]}
+            )
+        return self._http_client
+    
+    async def aclose(self):
+        """Release the shared HTTP client"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
         
     async def get_ticker_feed(
         self, 
         request: TickerFeedRequest,
-        user_id: Optional[UUID] = None
+        user_id: Optional[UUID] = None,
+        raise_errors: bool = False
     ) -> List[TickerItem]:
-        """Get mixed ticker feed with intelligent sorting"""
+        """Get mixed ticker feed with intelligent sorting
+        
+        Errors are logged and give an empty feed unless ``raise_errors``.
+        """
+        items, _ = await self._query_feed(request, user_id, raise_errors)
+        return items
+    
+    async def get_ticker_feed_page(
+        self,
+        request: TickerFeedRequest,
+        user_id: Optional[UUID] = None
+    ) -> TickerFeedResponse:
+        """Get one page of the feed with an exact has_more and a next-page cursor"""
+        items, has_more = await self._query_feed(request, user_id)
+        
+        next_cursor = None
+        if has_more and items and request.sort_by in KEYSET_SORTS:
+            next_cursor = encode_feed_cursor(request.sort_by, items[-1])
+        
+        return TickerFeedResponse(
+            items=items,
+            total_count=len(items),
+            has_more=has_more,
+            next_cursor=next_cursor,
+            last_updated=max((item.created_at for item in items), default=None)
+        )
+    
+    async def _query_feed(
+        self,
+        request: TickerFeedRequest,
+        user_id: Optional[UUID] = None,
+        raise_errors: bool = False
+    ) -> Tuple[List[TickerItem], bool]:
+        """Fetch one row past the limit so has_more is exact
+        
+        Served from the in-memory store when it is warm; the database
+        answers on a cold start, when the store has fallen behind, and for
+        expired items or per-user relevance.
+        """
         try:
-            # Build query
-            query = self.supabase.table("ticker_items").select("*")
+            cursor = decode_feed_cursor(request.cursor, request.sort_by) if request.cursor else None
+            stored = ticker_store.query(request, request.limit + 1, cursor, user_id)
+            if stored is not None:
+                return stored[:request.limit], len(stored) > request.limit
             
-            # Apply filters
-            query = query.eq("is_active", True)
-            
-            if not request.include_expired:
-                query = query.or_(
-                    "expires_at.is.null",
-                    f"expires_at.gt.{datetime.now().isoformat()}"
-                )
-            
-            if request.categories:
-                query = query.in_("category", [cat.value for cat in request.categories])
-            
-            if request.priority_filter:
-                query = query.lte("priority", request.priority_filter)
-            
-            # Sorting
-            if request.sort_by == "created_at":
-                query = query.order("created_at", desc=True)
-            elif request.sort_by == "priority":
-                query = query.order("priority").order("created_at", desc=True)
+            if request.sort_by == "relevance":
+                # Personal weights need the vectorized ranker; otherwise the
+                # database ranks and returns only the top K
+                weights = await self._get_ranking_weights(user_id)
+                ranked = None
+                if user_id is None:
+                    ranked = self._rank_feed_from_store(request, weights, request.limit + 1)
+                if ranked is None and weights.is_default:
+                    ranked = await self._get_ranked_feed(request, user_id, request.limit + 1)
+                if ranked is None:
+                    ranked = await self._rank_feed_vectorized(request, user_id, weights, request.limit + 1)
+                if ranked is not None:
+                    return ranked[:request.limit], len(ranked) > request.limit
             
-            # Execute query
-            query = query.limit(request.limit)
-            result = query.execute()
+            if self.pool is not None:
+                sql, args = build_feed_query(request, request.limit + 1, user_id)
+                rows = await self.pool.fetch(sql, *args)
+                items = [TickerItem.from_row(row) for row in rows]
+            else:
+                items = await self._get_ticker_feed_rest(request, request.limit + 1, user_id)
             
-            items = [TickerItem(**item) for item in result.data]
+            has_more = len(items) > request.limit
             
-            # Calculate relevance scores if sorting by relevance
+            # Rank in Python when server-side ranking is unavailable
             if request.sort_by == "relevance":
                 items = await self._calculate_relevance_scores(items, user_id)
                 items.sort(key=lambda x: x.relevance_score or 0, reverse=True)
             
-            return items
+            return items[:request.limit], has_more
             
         except Exception as e:
+            if raise_errors:
+                raise
             logger.error(f"Error fetching ticker feed: {e}")
-            return []
+            return [], False
     
     async def create_ticker_item(self, item: TickerItemCreate) -> TickerItem:
         """Create a new ticker item"""
         try:
-            result = self.admin_client.table("ticker_items").insert(
-                item.model_dump()
-            ).execute()
+            if self.pool is not None:
+                row = await self.pool.fetchrow(
+                    INSERT_TICKER_ITEM_SQL,
+                    item.category.value,
+                    item.title,
+                    item.description,
+                    item.icon_name,
+                    item.type.value,
+                    item.priority,
+                    item.source_data,
+                    item.is_active,
+                    item.expires_at,
+                    item.user_id
+                )
+                ticker_store.apply(row)
+                return TickerItem.from_row(row)
+            
+            result = await execute_async(
+                self.admin_client.table("ticker_items").insert(
+                    item.model_dump(mode="json")
+                )
+            )
             
+            ticker_store.apply(result.data[0])
             return TickerItem(**result.data[0])
         except Exception as e:
             logger.error(f"Error creating ticker item: {e}")
             raise
     
+    async def bulk_upsert_ticker_items(self, items: List[TickerItemCreate]) -> Dict[str, int]:
+        """Insert or update a batch of ticker items keyed on their content identity
+        
+        Each chunk of ``BULK_UPSERT_BATCH_SIZE`` items is written in one
+        round trip. Returns inserted/updated/skipped/failed counts; duplicates
+        within the batch and unchanged rows count as skipped.
+        """
+        counts = {"inserted": 0, "updated": 0, "skipped": 0, "failed": 0}
+        
+        # Collapse duplicates within the batch (last one wins)
+        unique: Dict[Any, TickerItemCreate] = {}
+        for index, item in enumerate(items):
+            key = ticker_dedupe_key(item.source_data) or index
+            unique[key] = item
+        counts["skipped"] += len(items) - len(unique)
+        batch = list(unique.values())
+        
+        for start in range(0, len(batch), BULK_UPSERT_BATCH_SIZE):
+            chunk = batch[start:start + BULK_UPSERT_BATCH_SIZE]
+            try:
+                if self.pool is not None:
+                    chunk_counts = await self._bulk_upsert_pg(chunk)
+                else:
+                    chunk_counts = await self._bulk_upsert_rest(chunk)
+                for key, value in chunk_counts.items():
+                    counts[key] += value
+            except Exception as e:
+                logger.error(f"Error upserting {len(chunk)} ticker items: {e}")
+                counts["failed"] += len(chunk)
+        
+        return counts
+    
     async def fetch_general_events(self) -> List[TickerItemCreate]:
-        """Fetch general events from external sources"""
+        """Fetch general events from every enabled source concurrently"""
         items = []
         
-        # Fetch from enabled sources
         sources = await self._get_enabled_sources("general")
+        async for result in source_fetchers.fetch_all(sources):
+            if result.skipped:
+                continue
+            if result.error is not None:
+                logger.error(f"Error fetching from {result.source.source_name}: {result.error}")
+                await self._update_source_fetch_time(result.source.id, success=False, error=result.error)
+                continue
+            items.extend(result.items)
+            await self._update_source_fetch_time(result.source.id, success=True)
+        
+        return items
+    
+    async def refresh_category(self, category: str) -> Dict[str, Any]:
+        """Refresh every fetchable source of a category concurrently
         
-        for source in sources:
+        Each source's items are persisted as soon as its fetch finishes;
+        sources whose circuit breaker is open are skipped.
+        """
+        sources = [
+            source for source in await self._get_enabled_sources(category)
+            if self.has_fetcher(source)
+        ]
+        
+        results: Dict[str, Any] = {
+            "sources": len(sources),
+            "failed_sources": 0,
+            "skipped_sources": 0,
+            "inserted": 0,
+            "updated": 0,
+            "skipped": 0
+        }
+        async for result in source_fetchers.fetch_all(sources):
+            if result.skipped:
+                results["skipped_sources"] += 1
+                continue
             try:
-                if source.source_name == "hacker_news":
-                    hn_items = await self._fetch_hacker_news(source.config)
-                    items.extend(hn_items)
-                elif source.source_name == "tech_news":
-                    news_items = await self._fetch_tech_news(source.config)
-                    items.extend(news_items)
-                
-                # Update last fetch time
-                await self._update_source_fetch_time(source.id, success=True)
-                
+                if result.error is not None:
+                    await self._update_source_fetch_time(result.source.id, success=False, error=result.error)
+                    raise RuntimeError(result.error)
+                counts = await self._persist_source_items(result.source, result.items, result.config)
             except Exception as e:
-                logger.error(f"Error fetching from {source.source_name}: {e}")
-                await self._update_source_fetch_time(source.id, success=False, error=str(e))
+                logger.warning(f"Refresh of {result.source.source_name} failed: {e}")
+                results["failed_sources"] += 1
+                continue
+            for key in ("inserted", "updated", "skipped"):
+                results[key] += counts[key]
+        return results
+    
+    def has_fetcher(self, source: TickerSource) -> bool:
+        """Whether items can be fetched for this source"""
+        return source_fetchers.resolve(source) is not None
+    
+    async def get_enabled_sources(self) -> List[TickerSource]:
+        """Get every enabled ticker source"""
+        return await self._get_enabled_sources()
+    
+    async def refresh_source(
+        self,
+        source: TickerSource,
+        timeout: Optional[float] = None
+    ) -> Optional[Dict[str, int]]:
+        """Fetch one source within ``timeout``, persist its items and record the outcome
         
-        return items
+        Raises if the fetch fails or times out, after recording the failure.
+        Returns None without fetching while the source's circuit is open.
+        """
+        try:
+            result = await source_fetchers.fetch(source, timeout)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            await self._update_source_fetch_time(source.id, success=False, error=error)
+            raise
+        if result.skipped:
+            return None
+        return await self._persist_source_items(source, result.items, result.config)
     
     async def generate_insights(self, user_id: UUID, context: Dict[str, Any]) -> List[TickerItemCreate]:
-        """Generate AI-powered insights"""
+        """Generate AI-powered insights
+        
+        The analyzers run concurrently, each bounded by
+        ``settings.insight_analyzer_timeout``; one that fails or times out
+        is logged and contributes nothing.
+        """
         insights = []
         
-        try:
+        analyzers = {
             # Analyze user's campaign performance
-            performance_insights = await self._analyze_performance_for_insights(user_id)
-            
+            "performance": self._analyze_performance_for_insights(user_id),
             # Generate content suggestions
-            content_suggestions = await self._generate_content_suggestions(user_id, context)
-            
+            "content": self._generate_content_suggestions(user_id, context),
             # Create optimization opportunities
-            optimization_opps = await self._find_optimization_opportunities(user_id)
+            "optimization": self._find_optimization_opportunities(user_id)
+        }
+        results = await asyncio.gather(
+            *(asyncio.wait_for(analyzer, settings.insight_analyzer_timeout) for analyzer in analyzers.values()),
+            return_exceptions=True
+        )
+        
+        for name, result in zip(analyzers, results):
+            if isinstance(result, asyncio.TimeoutError):
+                logger.warning(f"Insight analyzer '{name}' timed out for user {user_id}")
+                continue
+            if isinstance(result, Exception):
+                logger.error(f"Insight analyzer '{name}' failed for user {user_id}: {result}")
+                continue
             
             # Convert to ticker items
-            for insight in performance_insights + content_suggestions + optimization_opps:
-                insights.append(TickerItemCreate(
-                    category=TickerCategory.INSIGHTS,
-                    title=insight.get("title", "New Insight"),
-                    description=insight.get("description", ""),
-                    icon_name=insight.get("icon", "Lightbulb"),
-                    type=TickerType.INFO,
-                    priority=insight.get("priority", 3),
-                    source_data={
-                        "insight_type": insight.get("type"),
-                        "confidence": insight.get("confidence", 0.7),
-                        "action_items": insight.get("action_items", [])
-                    }
-                ))
-                
-        except Exception as e:
-            logger.error(f"Error generating insights: {e}")
+            for insight in result:
+                try:
+                    insights.append(TickerItemCreate(
+                        category=TickerCategory.INSIGHTS,
+                        title=insight.get("title", "New Insight"),
+                        description=insight.get("description", ""),
+                        icon_name=insight.get("icon", "Lightbulb"),
+                        type=TickerType.INFO,
+                        priority=insight.get("priority", 3),
+                        source_data={
+                            "insight_type": insight.get("type"),
+                            "confidence": insight.get("confidence", 0.7),
+                            "action_items": insight.get("action_items", [])
+                        }
+                    ))
+                except Exception as e:
+                    logger.error(f"Error generating insights: {e}")
         
         return insights
     
@@ -198,14 +684,12 @@ class TickerService:
         }
         
         try:
-            # Fetch general events
-            general_items = await self.fetch_general_events()
-            for item in general_items:
-                try:
-                    await self.create_ticker_item(item)
-                    results["general"]["success"] += 1
-                except:
-                    results["general"]["failed"] += 1
+            # Fetch general sources concurrently, persisting each as it arrives
+            general = await self.refresh_category("general")
+            results["general"] = {
+                "success": general["inserted"] + general["updated"],
+                **general
+            }
             
             # Note: Insights and performance would need user context
             # This is a simplified version for manual refresh
@@ -222,112 +706,483 @@ class TickerService:
     
     # Private helper methods
     
+    async def _get_ranked_feed(
+        self,
+        request: TickerFeedRequest,
+        user_id: Optional[UUID],
+        limit: int
+    ) -> Optional[List[TickerItem]]:
+        """Top-K relevance ranking in the database, or None to use the Python fallback"""
+        if not self._ranked_feed_available:
+            return None
+        
+        categories = [cat.value for cat in request.categories] if request.categories else None
+        try:
+            if self.pool is not None:
+                rows = await self.pool.fetch(
+                    RANKED_FEED_SQL,
+                    user_id,
+                    limit,
+                    categories,
+                    request.priority_filter,
+                    request.include_expired,
+                    RELEVANCE_WINDOW_HOURS,
+                    RELEVANCE_PRIORITY_TIER
+                )
+                return [TickerItem.from_row(row) for row in rows]
+            
+            result = await execute_async(
+                self.supabase.rpc("get_ranked_ticker_items", {
+                    "p_user_id": str(user_id) if user_id else None,
+                    "p_limit": limit,
+                    "p_categories": categories,
+                    "p_priority_filter": request.priority_filter,
+                    "p_include_expired": request.include_expired,
+                    "p_window_hours": RELEVANCE_WINDOW_HOURS,
+                    "p_priority_tier": RELEVANCE_PRIORITY_TIER
+                })
+            )
+            return [TickerItem(**row) for row in result.data]
+        
+        except asyncpg.UndefinedFunctionError:
+            logger.warning("get_ranked_ticker_items() is not installed, ranking in Python")
+            self._ranked_feed_available = False
+        except Exception as e:
+            logger.error(f"Error ranking ticker feed in database, ranking in Python: {e}")
+        return None
+    
+    async def _get_ticker_feed_rest(
+        self,
+        request: TickerFeedRequest,
+        limit: int,
+        user_id: Optional[UUID] = None
+    ) -> List[TickerItem]:
+        """Fetch feed rows through the Supabase REST backend"""
+        # Build query
+        query = self.supabase.table("ticker_items").select("*")
+        
+        # Apply filters
+        query = query.eq("is_active", True)
+        query = _rest_user_filter(query, user_id)
+        
+        if not request.include_expired:
+            query = rest_or(
+                query,
+                "expires_at.is.null",
+                f'expires_at.gt."{datetime.now(timezone.utc).isoformat()}"'
+            )
+        
+        if request.categories:
+            query = query.in_("category", [cat.value for cat in request.categories])
+        
+        if request.priority_filter:
+            query = query.lte("priority", request.priority_filter)
+        
+        # Keyset cursor
+        if request.cursor:
+            cursor = decode_feed_cursor(request.cursor, request.sort_by)
+            created_at = f'"{cursor["created_at"].isoformat()}"'
+            after_created = f"and(created_at.eq.{created_at},id.lt.{cursor['id']})"
+            if request.sort_by == "created_at":
+                query = rest_or(query, f"created_at.lt.{created_at}", after_created)
+            else:
+                priority = cursor["priority"]
+                query = rest_or(
+                    query,
+                    f"priority.gt.{priority}",
+                    f"and(priority.eq.{priority},created_at.lt.{created_at})",
+                    f"and(priority.eq.{priority},created_at.eq.{created_at},id.lt.{cursor['id']})"
+                )
+        
+        # Sorting
+        if request.sort_by == "created_at":
+            query = query.order("created_at", desc=True).order("id", desc=True)
+        elif request.sort_by == "priority":
+            query = query.order("priority").order("created_at", desc=True).order("id", desc=True)
+        
+        # Execute query
+        query = query.limit(limit)
+        result = await execute_async(query)
+        
+        return [TickerItem(**item) for item in result.data]
+    
+    async def _bulk_upsert_pg(self, items: List[TickerItemCreate]) -> Dict[str, int]:
+        """Upsert a chunk with one multi-row statement on the asyncpg pool"""
+        rows = await self.pool.fetch(
+            BULK_UPSERT_TICKER_ITEMS_SQL,
+            [item.category.value for item in items],
+            [item.title for item in items],
+            [item.description for item in items],
+            [item.icon_name for item in items],
+            [item.type.value for item in items],
+            [item.priority for item in items],
+            [item.source_data for item in items],
+            [item.is_active for item in items],
+            [item.expires_at for item in items],
+            [item.user_id for item in items]
+        )
+        inserted = 0
+        for row in rows:
+            row = dict(row)
+            inserted += row.pop("inserted")
+            ticker_store.apply(row)
+        return {
+            "inserted": inserted,
+            "updated": len(rows) - inserted,
+            "skipped": len(items) - len(rows)
+        }
+    
+    async def _bulk_upsert_rest(self, items: List[TickerItemCreate]) -> Dict[str, int]:
+        """Upsert a chunk through PostgREST (one lookup plus one upsert)"""
+        keys = [key for key in (ticker_dedupe_key(item.source_data) for item in items) if key]
+        existing = set()
+        if keys:
+            result = await execute_async(
+                self.admin_client.table("ticker_items").select("dedupe_key").in_("dedupe_key", keys)
+            )
+            existing = {row["dedupe_key"] for row in result.data}
+        
+        result = await execute_async(
+            self.admin_client.table("ticker_items").upsert(
+                [item.model_dump(mode="json") for item in items],
+                on_conflict="dedupe_key"
+            )
+        )
+        for row in result.data:
+            ticker_store.apply(row)
+        return {
+            "inserted": len(items) - len(existing),
+            "updated": len(existing),
+            "skipped": 0
+        }
+    
+    async def _rank_feed_vectorized(
+        self,
+        request: TickerFeedRequest,
+        user_id: Optional[UUID],
+        weights: RankingWeights,
+        limit: int
+    ) -> Optional[List[TickerItem]]:
+        """Load the candidate window column-wise and rank it with NumPy"""
+        categories = [cat.value for cat in request.categories] if request.categories else None
+        try:
+            if self.pool is not None:
+                rows = await self.pool.fetch(
+                    RANKING_CANDIDATES_SQL,
+                    user_id,
+                    categories,
+                    request.priority_filter,
+                    request.include_expired,
+                    RELEVANCE_WINDOW_HOURS,
+                    RELEVANCE_PRIORITY_TIER,
+                    RANKING_CANDIDATE_LIMIT
+                )
+                batch = CandidateBatch(rows)
+            else:
+                rows = await self._get_ranking_candidates_rest(request, user_id)
+                engagement = await self._get_engagement_counts(user_id, [row["id"] for row in rows])
+                batch = CandidateBatch(rows, engagement)
+            
+            return [TickerItem.from_row(row) for row in rank_rows(batch, limit, weights)]
+        
+        except Exception as e:
+            logger.error(f"Error ranking ticker feed candidates: {e}")
+            return None
+    
+    def _rank_feed_from_store(
+        self,
+        request: TickerFeedRequest,
+        weights: RankingWeights,
+        limit: int
+    ) -> Optional[List[TickerItem]]:
+        """Rank the store's candidate window; no engagement, so anonymous requests only"""
+        since = datetime.now(timezone.utc) - timedelta(hours=RELEVANCE_WINDOW_HOURS)
+        rows = ticker_store.candidates(request, since, RELEVANCE_PRIORITY_TIER)
+        if rows is None:
+            return None
+        return [TickerItem.from_row(row) for row in rank_rows(CandidateBatch(rows, {}), limit, weights)]
+    
+    async def _get_ranking_candidates_rest(
+        self,
+        request: TickerFeedRequest,
+        user_id: Optional[UUID] = None
+    ) -> List[Dict[str, Any]]:
+        """Candidate window through the Supabase REST backend"""
+        since = datetime.now(timezone.utc) - timedelta(hours=RELEVANCE_WINDOW_HOURS)
+        query = self.supabase.table("ticker_items").select("*").eq("is_active", True)
+        query = _rest_user_filter(query, user_id)
+        query = rest_or(query, f'created_at.gt."{since.isoformat()}"', f"priority.lte.{RELEVANCE_PRIORITY_TIER}")
+        
+        if not request.include_expired:
+            query = rest_or(
+                query,
+                "expires_at.is.null",
+                f'expires_at.gt."{datetime.now(timezone.utc).isoformat()}"'
+            )
+        if request.categories:
+            query = query.in_("category", [cat.value for cat in request.categories])
+        if request.priority_filter:
+            query = query.lte("priority", request.priority_filter)
+        
+        result = await execute_async(
+            query.order("created_at", desc=True).limit(RANKING_CANDIDATE_LIMIT)
+        )
+        return result.data
+    
+    async def _get_engagement_counts(
+        self,
+        user_id: Optional[UUID],
+        item_ids: List[Any]
+    ) -> Dict[str, Dict[str, int]]:
+        """Per-item click/view/share/dismiss counts for one user"""
+        if not user_id or not item_ids:
+            return {}
+        
+        if self.pool is not None:
+            records = await self.pool.fetch(SELECT_ENGAGEMENT_SQL, user_id, item_ids)
+        else:
+            result = await execute_async(
+                self.supabase.table("ticker_engagement").select(
+                    "ticker_item_id, action"
+                ).eq("user_id", str(user_id)).order(
+                    "action_timestamp", desc=True
+                ).limit(RANKING_CANDIDATE_LIMIT)
+            )
+            records = result.data
+        return engagement_counts(records)
+    
+    async def _get_ranking_weights(self, user_id: Optional[UUID]) -> RankingWeights:
+        """Ranking weights from the user's ticker_preferences.custom_filters"""
+        if not user_id:
+            return RankingWeights()
+        
+        cached = self._ranking_weights.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        
+        custom_filters = None
+        try:
+            if self.pool is not None:
+                custom_filters = await self.pool.fetchval(SELECT_CUSTOM_FILTERS_SQL, user_id)
+            else:
+                result = await execute_async(
+                    self.supabase.table("ticker_preferences").select(
+                        "custom_filters"
+                    ).eq("user_id", str(user_id)).limit(1)
+                )
+                custom_filters = result.data[0]["custom_filters"] if result.data else None
+        except Exception as e:
+            logger.error(f"Error loading ranking weights: {e}")
+        
+        weights = RankingWeights.from_custom_filters(custom_filters)
+        self._ranking_weights[user_id] = (time.monotonic() + RANKING_WEIGHTS_TTL_SECONDS, weights)
+        return weights
+    
     async def _calculate_relevance_scores(
         self, 
         items: List[TickerItem], 
         user_id: Optional[UUID]
     ) -> List[TickerItem]:
         """Calculate relevance scores for ticker items"""
-        for item in items:
-            # Base score from priority
-            base_score = (6 - item.priority) * 20
-            
-            # Time decay
-            age_hours = (datetime.now() - item.created_at).total_seconds() / 3600
-            time_factor = 1 / (1 + age_hours / 24)
-            
-            # Engagement boost (if user_id provided)
-            engagement_boost = 0
-            if user_id:
-                # Would query engagement table here
-                engagement_boost = 0  # Placeholder
-            
-            item.relevance_score = base_score * time_factor + engagement_boost
+        if not items:
+            return items
+        
+        weights = await self._get_ranking_weights(user_id)
+        try:
+            engagement = await self._get_engagement_counts(user_id, [item.id for item in items])
+        except Exception as e:
+            logger.error(f"Error loading engagement counts: {e}")
+            engagement = {}
+        
+        batch = CandidateBatch([item.__dict__ for item in items], engagement)
+        for item, score in zip(items, score_batch(batch, weights).tolist()):
+            item.relevance_score = score
         
         return items
     
-    async def _get_enabled_sources(self, category: str) -> List[TickerSource]:
-        """Get enabled ticker sources for a category"""
+    async def _get_enabled_sources(self, category: Optional[str] = None) -> List[TickerSource]:
+        """Get enabled ticker sources, optionally for one category"""
         try:
-            result = self.supabase.table("ticker_sources").select("*").eq(
-                "category", category
-            ).eq("is_enabled", True).execute()
+            if self.pool is not None:
+                if category is None:
+                    rows = await self.pool.fetch(SELECT_ALL_ENABLED_SOURCES_SQL)
+                else:
+                    rows = await self.pool.fetch(SELECT_ENABLED_SOURCES_SQL, category)
+                return [TickerSource(**dict(row)) for row in rows]
+            
+            query = self.supabase.table("ticker_sources").select("*").eq("is_enabled", True)
+            if category is not None:
+                query = query.eq("category", category)
+            result = await execute_async(query)
             
             return [TickerSource(**source) for source in result.data]
         except Exception as e:
             logger.error(f"Error fetching sources: {e}")
             return []
     
+    async def _persist_source_items(
+        self,
+        source: TickerSource,
+        items: List[TickerItemCreate],
+        config: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, int]:
+        """Upsert a source's fetched items and record the refresh outcome
+        
+        ``config`` (the keys of fetch state the fetcher changed) is merged
+        into the saved config only once the items are persisted, so a failed
+        write is fetched again next time.
+        """
+        try:
+            counts = await self.bulk_upsert_ticker_items(items)
+            for result, count in counts.items():
+                if count:
+                    INGESTED_ITEMS.labels(source.source_name, result).inc(count)
+            if counts["failed"]:
+                raise RuntimeError(f"{counts['failed']} items failed to persist")
+        except Exception as e:
+            await self._update_source_fetch_time(source.id, success=False, error=str(e) or type(e).__name__)
+            raise
+        
+        for item in items:
+            self._mark_item_seen(item)
+        await self._update_source_fetch_time(source.id, success=True, config=config)
+        if config is not None:
+            source.config = {**source.config, **config}
+        return counts
+    
     async def _update_source_fetch_time(
         self, 
         source_id: UUID, 
         success: bool, 
-        error: Optional[str] = None
+        error: Optional[str] = None,
+        config: Optional[Dict[str, Any]] = None
     ):
-        """Update source fetch statistics"""
+        """Update source fetch statistics, merging ``config`` into the source's config"""
         try:
+            if self.pool is not None:
+                await self.pool.execute(
+                    UPDATE_SOURCE_FETCH_SQL,
+                    source_id,
+                    success,
+                    error[:500] if error else None,
+                    config
+                )
+                return
+            
+            # PostgREST has no in-place increment or jsonb merge, so read the row first
+            current = await execute_async(
+                self.admin_client.table("ticker_sources").select(
+                    "fetch_count, error_count, config"
+                ).eq("id", str(source_id)).limit(1)
+            )
+            stored = current.data[0] if current.data else {}
+            
+            now = datetime.now(timezone.utc).isoformat()
             update_data = {
-                "last_fetch_at": datetime.now().isoformat(),
-                "fetch_count": self.supabase.rpc("increment", {"x": 1})
+                "last_fetch_at": now,
+                "fetch_count": (stored.get("fetch_count") or 0) + 1
             }
             
             if success:
-                update_data["last_success_at"] = datetime.now().isoformat()
+                update_data["last_success_at"] = now
+                update_data["error_count"] = 0
             else:
-                update_data["error_count"] = self.supabase.rpc("increment", {"x": 1})
+                update_data["error_count"] = (stored.get("error_count") or 0) + 1
                 if error:
                     update_data["last_error"] = error[:500]  # Truncate error message
+            if config is not None:
+                update_data["config"] = {**(stored.get("config") or {}), **config}
             
-            self.admin_client.table("ticker_sources").update(
-                update_data
-            ).eq("id", str(source_id)).execute()
+            await execute_async(
+                self.admin_client.table("ticker_sources").update(
+                    update_data
+                ).eq("id", str(source_id))
+            )
             
         except Exception as e:
             logger.error(f"Error updating source fetch time: {e}")
     
+    def _is_seen(self, source_name: str, external_id: Any) -> bool:
+        """Check whether an external item was already ingested or rejected"""
+        return seen_index.contains(source_name, external_id)
+    
+    def _mark_seen(self, source_name: str, external_id: Any):
+        """Remember an external item so later refreshes skip it"""
+        seen_index.add(source_name, external_id)
+    
+    def _mark_item_seen(self, item: TickerItemCreate):
+        """Remember a persisted ticker item by its source identity"""
+        key = ticker_dedupe_key(item.source_data)
+        if key is not None:
+            source_name, external_id = key.split(":", 1)
+            self._mark_seen(source_name, external_id)
+    
     async def _fetch_hacker_news(self, config: Dict[str, Any]) -> List[TickerItemCreate]:
-        """Fetch items from Hacker News API"""
+        """Fetch items from Hacker News API
+        
+        Story fetches run concurrently on the shared client, bounded by
+        ``config["concurrency"]``, each with ``config["item_timeout_seconds"]``.
+        Failed stories are skipped; stories ingested earlier, or rejected for
+        their title, are not fetched again. A story below ``min_score`` is
+        fetched again next time, since its score can still rise.
+        """
         items = []
         
-        try:
-            async with httpx.AsyncClient() as client:
-                # Get top stories
-                response = await client.get(
-                    "https://hacker-news.firebaseio.com/v0/topstories.json"
-                )
-                story_ids = response.json()[:config.get("item_limit", 10)]
-                
-                # Fetch each story
-                for story_id in story_ids:
-                    story_response = await client.get(
-                        f"https://hacker-news.firebaseio.com/v0/item/{story_id}.json"
+        min_score = config.get("min_score", 100)
+        keywords = [keyword.lower() for keyword in config.get("keywords", [])]
+        item_timeout = config.get("item_timeout_seconds", HN_DEFAULT_ITEM_TIMEOUT)
+        semaphore = asyncio.Semaphore(config.get("concurrency", HN_DEFAULT_CONCURRENCY))
+        client = self.http_client
+        
+        async def fetch_story(story_id: int) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    response = await asyncio.wait_for(
+                        client.get(f"{HN_API_BASE}/item/{story_id}.json"),
+                        timeout=item_timeout
                     )
-                    story = story_response.json()
-                    
-                    # Filter by keywords and score
-                    if story.get("score", 0) >= config.get("min_score", 100):
-                        # Check if any keyword matches
-                        keywords = config.get("keywords", [])
-                        title_lower = story.get("title", "").lower()
-                        
-                        if any(keyword.lower() in title_lower for keyword in keywords):
-                            items.append(TickerItemCreate(
-                                category=TickerCategory.GENERAL,
-                                title=f"HN: {story.get('title', 'Untitled')[:100]}",
-                                description=f"{story.get('score', 0)} points · {story.get('descendants', 0)} comments",
-                                icon_name="TrendingUp",
-                                type=TickerType.INFO,
-                                priority=3,
-                                source_data={
-                                    "source": "hacker_news",
-                                    "url": story.get("url"),
-                                    "hn_id": story_id,
-                                    "score": story.get("score", 0)
-                                }
-                            ))
+                    response.raise_for_status()
+                    return response.json()
+                except Exception as e:
+                    logger.warning(f"Skipping Hacker News story {story_id}: {e!r}")
+                    return None
         
-        except Exception as e:
-            logger.error(f"Error fetching from Hacker News: {e}")
+        # Get top stories (failures propagate so the source's error_count is updated)
+        response = await client.get(f"{HN_API_BASE}/topstories.json")
+        response.raise_for_status()
+        story_ids = [
+            story_id for story_id in response.json()[:config.get("item_limit", 10)]
+            if not self._is_seen("hacker_news", story_id)
+        ]
+        
+        stories = await asyncio.gather(*(fetch_story(story_id) for story_id in story_ids))
+        
+        for story_id, story in zip(story_ids, stories):
+            if not story:
+                continue
+            
+            # Filter by keywords and score
+            title_lower = story.get("title", "").lower()
+            if not any(keyword in title_lower for keyword in keywords):
+                self._mark_seen("hacker_news", story_id)
+                continue
+            if story.get("score", 0) < min_score:
+                continue
+            
+            items.append(TickerItemCreate(
+                category=TickerCategory.GENERAL,
+                title=f"HN: {story.get('title', 'Untitled')[:100]}",
+                description=f"{story.get('score', 0)} points · {story.get('descendants', 0)} comments",
+                icon_name="TrendingUp",
+                type=TickerType.INFO,
+                priority=3,
+                source_data={
+                    "source": "hacker_news",
+                    "url": story.get("url"),
+                    "hn_id": story_id,
+                    "score": story.get("score", 0)
+                }
+            ))
         
         return items
     
@@ -373,20 +1228,8 @@ class TickerService:
     
     async def _check_campaign_performance(self, user_id: UUID) -> List[Dict[str, Any]]:
         """Check campaign performance metrics"""
-        # Placeholder - would check actual campaign data
-        return [
-            {
-                "title": "Campaign Alert: High Performance",
-                "description": "Your 'Authority Building' campaign exceeded targets by 25%",
-                "icon": "Award",
-                "priority": 2,
-                "severity": "low",
-                "is_positive": True,
-                "metric": "conversions",
-                "value": 125,
-                "change": 25
-            }
-        ]
+        # Alerts detected by the streaming engine as campaign metrics arrive
+        return performance_alert_engine.recent_updates(user_id)
     
     async def _check_content_performance(self, user_id: UUID) -> List[Dict[str, Any]]:
         """Check content performance metrics"""
@@ -402,8 +1245,18 @@ class TickerService:
         """Clean up expired ticker items"""
         try:
             # Call the cleanup function in the database
-            result = self.admin_client.rpc("cleanup_expired_ticker_items").execute()
-            return result.data if result.data else 0
+            if self.pool is not None:
+                deleted = await self.pool.fetchval(CLEANUP_EXPIRED_SQL) or 0
+            else:
+                result = await execute_async(
+                    self.admin_client.rpc("cleanup_expired_ticker_items")
+                )
+                deleted = result.data if result.data else 0
+            
+            # Deletes are invisible to the store's incremental sync
+            if deleted:
+                ticker_store.invalidate()
+            return deleted
         except Exception as e:
             logger.error(f"Error cleaning up expired items: {e}")
             return 0
@@ -0,0 +1,462 @@
+"""
+Ticker Store - in-process indexed copy of the live ticker items
+"""
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from bisect import bisect_left, bisect_right, insort
+from uuid import UUID
+import asyncio
+import heapq
+from itertools import islice
+import time
+from loguru import logger
+
+from core.config import settings
+from core.database import get_db_pool, get_supabase_admin, execute_async
+from models.ticker import TickerCategory, TickerFeedRequest, TickerItem
+from services.ticker_changes import ticker_changes
+
+
+SELECT_LIVE_ITEMS_SQL = """
+    SELECT * FROM public.ticker_items
+    WHERE is_active = true AND (expires_at IS NULL OR expires_at > NOW())
+    ORDER BY created_at DESC
+    LIMIT $1
+"""
+
+# Deactivated rows are included so they can be dropped from the store
+SELECT_CHANGED_ITEMS_SQL = """
+    SELECT * FROM public.ticker_items
+    WHERE updated_at > $1
+    ORDER BY updated_at
+    LIMIT $2
+"""
+
+SELECT_NOW_SQL = "SELECT NOW()"
+
+# Rows changed in a transaction that commits after a sync can carry an
+# updated_at slightly older than the watermark, so each sync re-reads
+# this far back. Re-applying a row is idempotent.
+SYNC_OVERLAP_SECONDS = 10
+
+# A sync that returns a full page falls back to a full reload
+SYNC_PAGE_SIZE = 1000
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class StoredItem:
+    """One live ticker item with its precomputed sort keys
+    
+    Keys are integer tuples matching the feed's ORDER BY (created_at DESC,
+    id DESC and priority, created_at DESC, id DESC), so list order is the
+    feed order and a cursor position is a single bisect.
+    """
+    
+    __slots__ = (
+        "id", "category", "priority", "user_id", "created_us", "expires_us",
+        "recent_key", "priority_key", "row", "_item"
+    )
+    
+    def __init__(self, row: Dict[str, Any]):
+        self.row = row
+        self.id = row["id"] if isinstance(row["id"], UUID) else UUID(str(row["id"]))
+        self.category = getattr(row["category"], "value", row["category"])
+        self.priority = int(row["priority"])
+        self.user_id = str(row["user_id"]) if row.get("user_id") else None
+        self.created_us = _micros(row["created_at"])
+        self.expires_us = _micros(row["expires_at"]) if row.get("expires_at") else None
+        self.recent_key = (-self.created_us, -self.id.int)
+        self.priority_key = (self.priority, -self.created_us, -self.id.int)
+        self._item: Optional[TickerItem] = None
+    
+    def to_item(self) -> TickerItem:
+        """The item as a model, built once so its JSON encoding is cached too"""
+        if self._item is None:
+            self._item = TickerItem.from_row(self.row)
+        return self._item
+    
+    def visible_to(self, user_id: Optional[str]) -> bool:
+        """Shared items are visible to everyone, personal ones only to their owner"""
+        return self.user_id is None or self.user_id == user_id
+
+
+class TickerStore:
+    """Live ticker items kept in memory, indexed for the feed's sort orders
+    
+    Each category has a list sorted by recency and one sorted by priority,
+    so a page is a bisect to the cursor plus a merge across the requested
+    categories. Expiry is tracked in a min-heap and expired items are
+    evicted lazily on read.
+    
+    The store loads once at startup, then applies rows written by this
+    process immediately and applies the ticker change feed as it arrives,
+    reloading in full periodically. Only while the change feed is down does
+    it poll ``updated_at`` instead. Until the first load completes, or when
+    polling falls behind, ``query`` returns None and callers read from the
+    database instead.
+    
+    A follower worker in multi-worker mode does not load or sync at all;
+    ``follow`` makes its reads delegate to the leader's published snapshot.
+    """
+    
+    def __init__(
+        self,
+        sync_interval: float = settings.ticker_store_sync_seconds,
+        reload_interval: float = settings.ticker_store_reload_seconds,
+        max_items: int = settings.ticker_store_max_items
+    ):
+        self.sync_interval = sync_interval
+        self.reload_interval = reload_interval
+        self.max_items = max_items
+        self._items: Dict[int, StoredItem] = {}
+        self._recent: Dict[str, List[Tuple[int, int]]] = {}
+        self._by_priority: Dict[str, List[Tuple[int, int, int]]] = {}
+        self._expiry: List[Tuple[int, int]] = []
+        self._loaded = False
+        self._overflow = False
+        self._reload_needed = False
+        self._loaded_at = 0.0
+        self._synced_at = 0.0
+        self._watermark: Optional[datetime] = None
+        self._version = 0
+        self._task: Optional[asyncio.Task] = None
+        self._changes_task: Optional[asyncio.Task] = None
+        self._admin_client = None
+        self._source = None
+    
+    def __len__(self) -> int:
+        return len(self._items)
+    
+    @property
+    def version(self) -> int:
+        """Counter bumped whenever an item is added, changed, removed or expires"""
+        if self._source is not None:
+            return self._source.version
+        self._evict_expired()
+        return self._version
+    
+    @property
+    def ready(self) -> bool:
+        """True when the store is loaded and follows the change feed or has synced recently"""
+        if self._source is not None:
+            return self._source.ready
+        return (
+            self._loaded
+            and not self._overflow
+            and (self._following_changes or time.monotonic() - self._synced_at <= self.sync_interval * 3)
+        )
+    
+    async def start(self):
+        """Load in the background and keep the store in sync"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Ticker store started")
+        if ticker_changes.enabled and (self._changes_task is None or self._changes_task.done()):
+            self._changes_task = asyncio.create_task(self._follow_changes())
+    
+    async def stop(self):
+        for task in (self._task, self._changes_task):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._task = self._changes_task = None
+    
+    def follow(self, source):
+        """Serve reads from ``source`` (a snapshot reader) instead, or stop with None"""
+        self._source = source
+    
+    def live_items(self) -> List[StoredItem]:
+        """Every live item, in no particular order"""
+        self._evict_expired()
+        return list(self._items.values())
+    
+    def invalidate(self):
+        """Force a full reload on the next sync (e.g. after rows were deleted)"""
+        self._reload_needed = True
+    
+    def apply(self, row: Mapping[str, Any]):
+        """Insert, update or remove one item from a ticker_items row"""
+        if self._source is not None:
+            return  # the leader picks the row up and republishes
+        item = StoredItem(dict(row))
+        existing = self._items.get(item.id.int)
+        if existing is not None and existing.row == item.row:
+            return
+        if existing is not None:
+            self._discard(item.id.int)
+            self._version += 1
+        
+        if not item.row.get("is_active", True):
+            return
+        if item.expires_us is not None and item.expires_us <= _now_us():
+            return
+        if len(self._items) >= self.max_items:
+            logger.warning(f"Ticker store is full ({self.max_items} items), serving from the database")
+            self._overflow = True
+            self._reload_needed = True
+            return
+        self._insert(item)
+        self._version += 1
+    
+    def remove(self, item_id: UUID):
+        """Drop a deleted item"""
+        if item_id.int in self._items:
+            self._discard(item_id.int)
+            self._version += 1
+    
+    def query(
+        self,
+        request: TickerFeedRequest,
+        limit: int,
+        cursor: Optional[Dict[str, Any]] = None,
+        user_id: Optional[UUID] = None
+    ) -> Optional[List[TickerItem]]:
+        """One page of a created_at or priority feed, or None if the database must answer"""
+        if self._source is not None:
+            return self._source.query(request, limit, cursor, user_id)
+        if not self.ready or request.include_expired or request.sort_by not in ("created_at", "priority"):
+            return None
+        self._evict_expired()
+        
+        by_priority = request.sort_by == "priority"
+        index = self._by_priority if by_priority else self._recent
+        start_key: Optional[Tuple[int, ...]] = None
+        if cursor:
+            created_us = _micros(cursor["created_at"])
+            start_key = (-created_us, -cursor["id"].int)
+            if by_priority:
+                start_key = (cursor["priority"],) + start_key
+        
+        user = str(user_id) if user_id else None
+        items: List[TickerItem] = []
+        for key in self._merge(index, request.categories, start_key):
+            record = self._items[-key[-1]]
+            if not record.visible_to(user):
+                continue
+            if request.priority_filter and record.priority > request.priority_filter:
+                if by_priority:
+                    break
+                continue
+            items.append(record.to_item())
+            if len(items) >= limit:
+                break
+        return items
+    
+    def candidates(
+        self,
+        request: TickerFeedRequest,
+        since: datetime,
+        priority_tier: int,
+        user_id: Optional[UUID] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Rows for relevance ranking: created after ``since`` or priority <= ``priority_tier``"""
+        if self._source is not None:
+            return self._source.candidates(request, since, priority_tier, user_id)
+        if not self.ready or request.include_expired:
+            return None
+        self._evict_expired()
+        
+        since_us = _micros(since)
+        user = str(user_id) if user_id else None
+        rows = []
+        for key in self._merge(self._recent, request.categories, None):
+            record = self._items[-key[-1]]
+            if not record.visible_to(user):
+                continue
+            if request.priority_filter and record.priority > request.priority_filter:
+                continue
+            if record.created_us > since_us or record.priority <= priority_tier:
+                rows.append(record.row)
+        return rows
+    
+    async def load(self):
+        """Replace the store's contents with the live rows from the database"""
+        pool = get_db_pool()
+        if pool is not None:
+            watermark = await pool.fetchval(SELECT_NOW_SQL)
+            rows = await pool.fetch(SELECT_LIVE_ITEMS_SQL, self.max_items + 1)
+        else:
+            watermark = datetime.now(timezone.utc)
+            result = await execute_async(
+                self._admin().table("ticker_items").select("*")
+                .eq("is_active", True)
+                .order("created_at", desc=True)
+                .limit(self.max_items + 1)
+            )
+            rows = result.data
+        
+        self._reset()
+        self._overflow = len(rows) > self.max_items
+        if self._overflow:
+            logger.warning(f"More than {self.max_items} live ticker items, serving from the database")
+        else:
+            for row in rows:
+                self.apply(row)
+        
+        self._watermark = watermark
+        self._version += 1
+        self._loaded = True
+        self._reload_needed = False
+        self._loaded_at = self._synced_at = time.monotonic()
+        logger.info(f"Ticker store loaded {len(self._items)} items")
+    
+    async def sync(self):
+        """Apply rows changed since the last sync"""
+        since = self._watermark - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+        pool = get_db_pool()
+        if pool is not None:
+            rows = await pool.fetch(SELECT_CHANGED_ITEMS_SQL, since, SYNC_PAGE_SIZE)
+        else:
+            result = await execute_async(
+                self._admin().table("ticker_items").select("*")
+                .gt("updated_at", since.isoformat())
+                .order("updated_at")
+                .limit(SYNC_PAGE_SIZE)
+            )
+            rows = result.data
+        
+        # Too many changes to be sure nothing was missed
+        if len(rows) >= SYNC_PAGE_SIZE:
+            await self.load()
+            return
+        
+        for row in rows:
+            self.apply(row)
+            updated_at = _datetime(row["updated_at"]) if row.get("updated_at") else None
+            if updated_at and updated_at > self._watermark:
+                self._watermark = updated_at
+        self._synced_at = time.monotonic()
+    
+    # Private helper methods
+    
+    async def _run(self):
+        while True:
+            try:
+                if (
+                    not self._loaded
+                    or self._reload_needed
+                    or time.monotonic() - self._loaded_at >= self.reload_interval
+                ):
+                    await self.load()
+                elif self._following_changes:
+                    self._synced_at = time.monotonic()
+                else:
+                    await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ticker store sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
+    
+    @property
+    def _following_changes(self) -> bool:
+        """True while the change feed is connected and applied to the store"""
+        return (
+            ticker_changes.connected
+            and self._changes_task is not None
+            and not self._changes_task.done()
+        )
+    
+    async def _follow_changes(self):
+        subscription = ticker_changes.subscribe()
+        try:
+            async for events in subscription:
+                if not self._loaded:
+                    continue  # the load reads these rows anyway
+                for event in events:
+                    if event.row is None:
+                        self.remove(event.item_id)
+                        continue
+                    self.apply(event.row)
+                    # Polling after a disconnect resumes from the last change seen
+                    updated_at = event.row.get("updated_at")
+                    if updated_at and updated_at > self._watermark:
+                        self._watermark = updated_at
+        finally:
+            ticker_changes.unsubscribe(subscription)
+    
+    def _admin(self):
+        # Service-role client: RLS hides deactivated rows from the anon key
+        if self._admin_client is None:
+            self._admin_client = get_supabase_admin()
+        return self._admin_client
+    
+    def _reset(self):
+        self._items = {}
+        self._recent = {}
+        self._by_priority = {}
+        self._expiry = []
+    
+    def _insert(self, item: StoredItem):
+        self._items[item.id.int] = item
+        insort(self._recent.setdefault(item.category, []), item.recent_key)
+        insort(self._by_priority.setdefault(item.category, []), item.priority_key)
+        if item.expires_us is not None:
+            heapq.heappush(self._expiry, (item.expires_us, item.id.int))
+    
+    def _discard(self, id_int: int):
+        item = self._items.pop(id_int, None)
+        if item is None:
+            return
+        for index, key in ((self._recent, item.recent_key), (self._by_priority, item.priority_key)):
+            keys = index[item.category]
+            position = bisect_left(keys, key)
+            if position < len(keys) and keys[position] == key:
+                del keys[position]
+        # The expiry heap entry is left behind and skipped when popped
+    
+    def _evict_expired(self):
+        now = _now_us()
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_us, id_int = heapq.heappop(self._expiry)
+            item = self._items.get(id_int)
+            if item is not None and item.expires_us == expires_us:
+                self._discard(id_int)
+                self._version += 1
+    
+    def _merge(
+        self,
+        index: Dict[str, List[Tuple[int, ...]]],
+        categories: Optional[List[TickerCategory]],
+        start_key: Optional[Tuple[int, ...]]
+    ) -> Iterator[Tuple[int, ...]]:
+        """Keys of the selected categories in feed order, strictly after ``start_key``"""
+        names = [cat.value for cat in categories] if categories else list(index)
+        iterators = []
+        for name in names:
+            keys = index.get(name)
+            if not keys:
+                continue
+            start = bisect_right(keys, start_key) if start_key is not None else 0
+            iterators.append(islice(keys, start, None))
+        if len(iterators) == 1:
+            return iterators[0]
+        return heapq.merge(*iterators)
+
+
+# Private helpers
+
+def _datetime(value: Any) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _micros(value: Any) -> int:
+    # Exact integer microseconds, so ties order exactly like Postgres
+    return (_datetime(value) - EPOCH) // timedelta(microseconds=1)
+
+
+def _now_us() -> int:
+    return time.time_ns() // 1000
+
+
+# Singleton instance
+ticker_store = TickerStore()
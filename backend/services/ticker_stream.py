@@ -0,0 +1,318 @@
+"""
+Ticker Stream - Server-Sent Events relay of new ticker items with replay
+
+Each shared item inserted into ticker_items becomes one SSE event whose id
+is the change's ``seq`` from the ticker change feed, followed by
+``:<floor>`` when the feed's committed floor at delivery differs from it.
+The relay encodes every event once and keeps the most recent ones in a ring
+buffer in arrival order, so a client that reconnects with ``Last-Event-ID``
+is sent exactly the events it missed. Ids older than the ring buffer are
+replayed from ``ticker_item_changes`` starting after the floor, since a
+change below the seq may have committed later; that replay can repeat
+events the client already has, which it drops by id. Ids older than the
+change log get a ``reset`` event telling the client to reload the feed.
+"""
+from typing import AsyncIterator, Deque, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from collections import deque
+from itertools import islice
+import asyncio
+from loguru import logger
+
+from core.config import settings
+from core.database import get_db_pool
+from models.ticker import TickerCategory, TickerItem
+from services.ticker_changes import ChangeEvent, ticker_changes
+
+
+# Shared items inserted after $1, in change order, that are still live
+SELECT_INSERTS_SINCE_SQL = """
+    SELECT c.seq, t.*
+    FROM public.ticker_item_changes c
+    JOIN public.ticker_items t ON t.id = c.item_id
+    WHERE c.seq > $1
+      AND c.op = 'insert'
+      AND t.is_active = true
+      AND (t.expires_at IS NULL OR t.expires_at > NOW())
+      AND t.user_id IS NULL
+    ORDER BY c.seq
+    LIMIT $2
+"""
+
+# Client reconnect delay announced at the start of each stream
+RETRY_MILLISECONDS = 3000
+
+HEARTBEAT = b": heartbeat\n\n"
+
+
+def event_id(seq: int, floor: Optional[int]) -> bytes:
+    """SSE id for ``seq``; every change at or below ``floor`` was sent before it"""
+    if floor is None or floor == seq:
+        return b"%d" % seq
+    return b"%d:%d" % (seq, floor)
+
+
+def parse_event_id(value: str) -> Tuple[int, int]:
+    """(seq, floor) from a Last-Event-ID; raises ValueError when malformed"""
+    seq, _, floor = value.partition(":")
+    return int(seq), int(floor) if floor else int(seq)
+
+
+class StreamEvent:
+    """One encoded SSE event and the fields filters look at"""
+    
+    __slots__ = ("seq", "id", "category", "priority", "frame")
+    
+    def __init__(self, seq: int, item: TickerItem, floor: Optional[int] = None):
+        self.seq = seq
+        self.id = event_id(seq, floor)
+        self.category = item.category.value
+        self.priority = item.priority
+        self.frame = b"id: %s\nevent: item\ndata: %s\n\n" % (self.id, item.json_bytes())
+
+
+class StreamSubscriber:
+    """A connected SSE client with its server-side filters"""
+    
+    def __init__(
+        self,
+        categories: Optional[Iterable[TickerCategory]],
+        priority_filter: Optional[int],
+        queue_size: int
+    ):
+        self.categories: Optional[FrozenSet[str]] = (
+            frozenset(TickerCategory(cat).value for cat in categories) if categories else None
+        )
+        self.priority_filter = priority_filter
+        self.queue: "asyncio.Queue[Optional[StreamEvent]]" = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+    
+    def accepts(self, event: StreamEvent) -> bool:
+        return (
+            (self.categories is None or event.category in self.categories)
+            and (not self.priority_filter or event.priority <= self.priority_filter)
+        )
+
+
+class ReplayBuffer:
+    """The last ``size`` events in arrival order, addressable by seq
+    
+    Change seqs can arrive out of order (they are taken before commit), so
+    replay is by position: "after seq N" means every event that arrived
+    after event N, which is exactly what the client has not seen.
+    """
+    
+    def __init__(self, size: int):
+        self._events: Deque[StreamEvent] = deque(maxlen=size)
+        self._positions: Dict[int, int] = {}
+        self._appended = 0
+        # Resume point handed to clients before any event arrived
+        self.origin: Optional[int] = None
+    
+    def __len__(self) -> int:
+        return len(self._events)
+    
+    @property
+    def last(self) -> Optional[StreamEvent]:
+        return self._events[-1] if self._events else None
+    
+    def append(self, event: StreamEvent):
+        if len(self._events) == self._events.maxlen:
+            self._positions.pop(self._events[0].seq, None)
+            self.origin = None  # no longer everything since the origin
+        self._positions[event.seq] = self._appended
+        self._events.append(event)
+        self._appended += 1
+    
+    def events(self) -> List[StreamEvent]:
+        return list(self._events)
+    
+    def after(self, seq: int) -> Optional[List[StreamEvent]]:
+        """Events that arrived after ``seq``, or None when ``seq`` is not in the buffer"""
+        if seq == self.origin:
+            return list(self._events)
+        position = self._positions.get(seq)
+        if position is None:
+            return None
+        first = self._appended - len(self._events)
+        return list(islice(self._events, position - first + 1, None))
+
+
+class TickerStreamRelay:
+    """Fans new items from the ticker change feed out to SSE subscribers"""
+    
+    def __init__(
+        self,
+        replay_size: int = settings.ticker_stream_replay_size,
+        queue_size: int = settings.ticker_stream_queue_size
+    ):
+        self.queue_size = queue_size
+        self.buffer = ReplayBuffer(replay_size)
+        self._subscribers: Set[StreamSubscriber] = set()
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def available(self) -> bool:
+        """Streams need the change feed for their event ids"""
+        return ticker_changes.enabled
+    
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+    
+    @property
+    def queued_events(self) -> int:
+        return sum(subscriber.queue.qsize() for subscriber in self._subscribers)
+    
+    async def start(self):
+        if ticker_changes.enabled and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+            logger.info("Ticker stream relay started")
+    
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for subscriber in list(self._subscribers):
+            self.unsubscribe(subscriber)
+    
+    def subscribe(
+        self,
+        categories: Optional[Iterable[TickerCategory]] = None,
+        priority_filter: Optional[int] = None
+    ) -> StreamSubscriber:
+        subscriber = StreamSubscriber(categories, priority_filter, self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber: StreamSubscriber):
+        if subscriber in self._subscribers:
+            self._subscribers.discard(subscriber)
+            subscriber.dropped = True
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(None)
+    
+    def publish(self, events: List[StreamEvent]):
+        for event in events:
+            self.buffer.append(event)
+        for subscriber in list(self._subscribers):
+            for event in events:
+                if not subscriber.accepts(event):
+                    continue
+                try:
+                    subscriber.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # The client resumes from its last event after reconnecting
+                    logger.warning("Dropping slow ticker stream subscriber")
+                    self.unsubscribe(subscriber)
+                    break
+    
+    async def stream(
+        self,
+        subscriber: StreamSubscriber,
+        last_event_id: Optional[Tuple[int, int]],
+        heartbeat_seconds: float = settings.ticker_stream_heartbeat_seconds
+    ) -> AsyncIterator[bytes]:
+        """SSE body: replay after ``last_event_id`` (seq, floor), then live events and heartbeats"""
+        try:
+            yield b"retry: %d\n\n" % RETRY_MILLISECONDS
+            
+            replayed: Set[int] = set()
+            if last_event_id is None:
+                # Give the client a resume point even if no item arrives
+                resume_id = self._resume_id()
+                if resume_id is not None:
+                    yield b"id: %s\nevent: ready\ndata: {}\n\n" % resume_id
+            else:
+                events, complete = await self._replay(*last_event_id)
+                if not complete:
+                    yield b"event: reset\ndata: {}\n\n"
+                for event in events:
+                    if subscriber.accepts(event):
+                        replayed.add(event.seq)
+                        yield event.frame
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                if event is None:
+                    return
+                if event.seq in replayed:
+                    continue
+                yield event.frame
+        finally:
+            self.unsubscribe(subscriber)
+    
+    # Private helper methods
+    
+    async def _run(self):
+        subscription = ticker_changes.subscribe()
+        self.buffer.origin = ticker_changes.last_seq
+        try:
+            async for changes in subscription:
+                try:
+                    self.publish(self._events(changes))
+                except Exception as e:
+                    logger.error(f"Ticker stream relay failed to publish changes: {e}")
+        finally:
+            ticker_changes.unsubscribe(subscription)
+    
+    @staticmethod
+    def _events(changes: List[ChangeEvent]) -> List[StreamEvent]:
+        # Personal items are never streamed, like the WebSocket broadcast
+        return [
+            StreamEvent(change.seq, change.item, change.floor) for change in changes
+            if change.op == "insert" and change.live and change.row.get("user_id") is None
+        ]
+    
+    def _resume_id(self) -> Optional[bytes]:
+        last = self.buffer.last
+        if last is not None:
+            return last.id
+        seq = self.buffer.origin if self.buffer.origin is not None else ticker_changes.last_seq
+        if seq is None:
+            return None
+        return event_id(seq, ticker_changes.committed_floor)
+    
+    async def _replay(self, seq: int, floor: int) -> Tuple[List[StreamEvent], bool]:
+        """Events after event ``seq`` and whether that is all of them"""
+        events = self.buffer.after(seq)
+        if events is not None:
+            return events, True
+        
+        # Older than the ring buffer: read everything above the floor from
+        # the change log, then add anything buffered the query did not return
+        pool = get_db_pool()
+        if pool is None:
+            return [], False
+        limit = settings.ticker_stream_replay_max
+        committed_floor = ticker_changes.committed_floor
+        rows = await pool.fetch(SELECT_INSERTS_SINCE_SQL, floor, limit + 1)
+        if len(rows) > limit:
+            return [], False
+        
+        # Changes above the live floor may still commit below a replayed seq
+        events = [
+            StreamEvent(
+                row["seq"], TickerItem.from_row(row),
+                row["seq"] if committed_floor is None else min(row["seq"], committed_floor)
+            )
+            for row in rows
+        ]
+        seen = {event.seq for event in events}
+        events += [
+            event for event in self.buffer.events()
+            if event.seq > floor and event.seq not in seen
+        ]
+        return events, True
+
+
+# Singleton instance
+ticker_stream_relay = TickerStreamRelay()
@@ -0,0 +1,105 @@
+"""
+Benchmark: /feed response serialization, validated path vs trusted-row fast path
+
+Run from backend/:  python -m tests.benchmarks.bench_feed_serialization [rows] [rounds]
+"""
+from typing import Any, Callable, Dict, List
+from datetime import datetime, timedelta, timezone
+import asyncio
+import json
+import sys
+import time
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from core.responses import PreEncodedJSONResponse
+from models.ticker import TickerFeedResponse, TickerItem
+from tests.benchmarks.fakes import pg_uuid
+
+
+def make_rows(count: int) -> List[Dict[str, Any]]:
+    """Rows shaped like asyncpg returns them for ``SELECT * FROM ticker_items``"""
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": pg_uuid(),
+            "category": ("general", "insights", "performance")[i % 3],
+            "title": f"Story {i}: something happened in the market today",
+            "description": "A longer description of the item that is shown under the title " * 2,
+            "icon_name": "Newspaper",
+            "type": "info",
+            "priority": i % 5 + 1,
+            "source_data": {"source": "hacker_news", "hn_id": 40000000 + i, "score": i * 3, "url": f"https://example.com/{i}"},
+            "is_active": True,
+            "expires_at": now + timedelta(hours=24),
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i),
+            "dedupe_key": f"hacker_news:{40000000 + i}"
+        }
+        for i in range(count)
+    ]
+
+
+def page(items: List[TickerItem]) -> TickerFeedResponse:
+    return TickerFeedResponse(
+        items=items,
+        total_count=len(items),
+        has_more=True,
+        next_cursor="eyJzIjoiY3JlYXRlZF9hdCJ9",
+        last_updated=items[0].created_at
+    )
+
+
+def validated_path(rows: List[Dict[str, Any]], field, loop: asyncio.AbstractEventLoop) -> bytes:
+    """Previous behaviour: validate every row, then FastAPI validates and encodes again"""
+    response = page([TickerItem(**row) for row in rows])
+    content = loop.run_until_complete(serialize_response(field=field, response_content=response))
+    return JSONResponse(content).body
+
+
+def fast_path_cold(rows: List[Dict[str, Any]]) -> bytes:
+    """Trusted rows, nothing cached yet"""
+    response = page([TickerItem.from_row(row) for row in rows])
+    return PreEncodedJSONResponse(response.json_bytes()).body
+
+
+def fast_path_warm(items: List[TickerItem]) -> bytes:
+    """Items served from the store, per-item JSON already cached"""
+    return PreEncodedJSONResponse(page(items).json_bytes()).body
+
+
+def measure(label: str, fn: Callable[[], bytes], rounds: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    per_call = (time.perf_counter() - started) / rounds
+    print(f"{label:<28} {per_call * 1e6:10.1f} us/call")
+    return per_call
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    rows = make_rows(count)
+    field = create_response_field(name="feed", type_=TickerFeedResponse, mode="serialization")
+    loop = asyncio.new_event_loop()
+    
+    # Same document either way
+    warm_items = [TickerItem.from_row(row) for row in rows]
+    expected = json.loads(validated_path(rows, field, loop))
+    assert json.loads(fast_path_cold(rows)) == expected
+    assert json.loads(fast_path_warm(warm_items)) == expected
+    
+    print(f"{count} rows, {rounds} rounds")
+    baseline = measure("validated + re-encoded", lambda: validated_path(rows, field, loop), rounds)
+    cold = measure("trusted rows (cold)", lambda: fast_path_cold(rows), rounds)
+    warm = measure("cached item JSON (warm)", lambda: fast_path_warm(warm_items), rounds)
+    print(f"speedup: {baseline / cold:.1f}x cold, {baseline / warm:.1f}x warm")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Benchmark suite: ticker hot paths against an in-memory database stand-in
+
+Runs offline; only the usual backend settings (.env) are needed.
+
+Run from backend/:
+    python -m tests.benchmarks.bench_ticker [--items N] [--rounds N] [--only PREFIX]
+        [--baseline PATH] [--save] [--tolerance FRACTION]
+
+Prints ops/sec and p50/p99 per benchmark. With a baseline file, benchmarks
+that regressed beyond the tolerance are listed and the exit status is 1;
+``--save`` records this run as the new baseline.
+"""
+from typing import Any, Dict, Iterator, List, Tuple
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from uuid import uuid4
+import argparse
+import asyncio
+import sys
+
+import httpx
+from loguru import logger
+
+from models.ticker import TickerFeedRequest, TickerFeedResponse, TickerItem, TickerCategory
+from services.ticker_broadcaster import TickerBroadcaster
+from services.ticker_service import ticker_service
+from services.ticker_store import ticker_store
+from tests.benchmarks.fakes import FakePool, InMemoryTickerDB, hacker_news_transport, install_pool, pg_uuid
+from tests.benchmarks.harness import (
+    DEFAULT_TOLERANCE, BenchmarkResult, compare, load_baseline, measure, save_baseline
+)
+
+
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "ticker.json"
+
+FEED_SORTS = ("created_at", "priority", "relevance")
+
+HN_CONFIG = {"min_score": 100, "keywords": ["ai", "marketing"], "item_limit": 30, "concurrency": 10}
+
+# Category filters of the simulated WebSocket clients
+SUBSCRIBER_FILTERS = (None, None, [TickerCategory.GENERAL], [TickerCategory.INSIGHTS, TickerCategory.PERFORMANCE])
+
+
+def make_rows(count: int) -> List[Dict[str, Any]]:
+    now = datetime.now(timezone.utc)
+    db = InMemoryTickerDB()
+    db.seed(count)
+    rows = [row for *_, row in db.recent()]
+    for row in rows:
+        row["expires_at"] = now + timedelta(hours=24)
+    return rows
+
+
+async def bench_feed(
+    db: InMemoryTickerDB,
+    rounds: int,
+    user_id,
+    only: str
+) -> List[BenchmarkResult]:
+    """get_ticker_feed per sort mode, from the warm store and from the database"""
+    results = []
+    for backend in ("store", "db"):
+        # An unbounded sync interval keeps the loaded store ready for the
+        # whole run; a zero one makes it never ready, so reads go to the pool
+        ticker_store.max_items = len(db.items) * 2
+        ticker_store.sync_interval = float("inf") if backend == "store" else 0
+        if backend == "store":
+            await ticker_store.load()
+        
+        cases: List[Tuple[str, TickerFeedRequest, Any]] = [
+            (f"feed.{sort}.{backend}", TickerFeedRequest(sort_by=sort, limit=50), None)
+            for sort in FEED_SORTS
+        ]
+        cases.append((f"feed.relevance.user.{backend}", TickerFeedRequest(sort_by="relevance", limit=50), user_id))
+        cases.append((
+            f"feed.created_at.filtered.{backend}",
+            TickerFeedRequest(sort_by="created_at", limit=50, categories=[TickerCategory.PERFORMANCE], priority_filter=2),
+            user_id
+        ))
+        
+        for name, request, user in cases:
+            if not name.startswith(only):
+                continue
+            items = await ticker_service.get_ticker_feed(request, user)
+            assert items, f"{name} returned no items"
+            results.append(await measure(
+                name, lambda request=request, user=user: ticker_service.get_ticker_feed(request, user), rounds
+            ))
+    return results
+
+
+async def bench_relevance(db: InMemoryTickerDB, rounds: int, user_id) -> List[BenchmarkResult]:
+    """_calculate_relevance_scores over a page of items with the user's engagement"""
+    items = [TickerItem.from_row(row) for *_, row in db.recent()[:500]]
+    return [
+        await measure("relevance.anonymous.500", lambda: ticker_service._calculate_relevance_scores(items, None), rounds),
+        await measure("relevance.user.500", lambda: ticker_service._calculate_relevance_scores(items, user_id), rounds)
+    ]
+
+
+async def bench_items(rounds: int) -> List[BenchmarkResult]:
+    """TickerItem construction and serialization"""
+    rows = make_rows(100)
+    warm = [TickerItem.from_row(row) for row in rows]
+    page = TickerFeedResponse(items=warm, total_count=len(warm), has_more=False, last_updated=warm[0].created_at)
+    page.json_bytes()
+    
+    def fresh_page() -> bytes:
+        items = [TickerItem.from_row(row) for row in rows]
+        return TickerFeedResponse(items=items, total_count=len(items), has_more=False).json_bytes()
+    
+    return [
+        await measure("item.validate.100", lambda: [TickerItem(**row) for row in rows], rounds),
+        await measure("item.from_row.100", lambda: [TickerItem.from_row(row) for row in rows], rounds),
+        await measure("item.json.cold.100", fresh_page, rounds),
+        await measure("item.json.warm.100", lambda: page.json_bytes(), rounds),
+        await measure("item.model_dump_json.100", lambda: page.model_dump_json(), rounds)
+    ]
+
+
+async def bench_hacker_news(rounds: int) -> List[BenchmarkResult]:
+    """HN ingestion on a stubbed transport: fetch, filter, then bulk upsert
+    
+    ``hn.ingest.steady`` refreshes a top list that is 90% unchanged, marking
+    persisted stories seen like ``refresh_source``, so known stories are
+    skipped before their item request.
+    """
+    ticker_service._http_client = httpx.AsyncClient(transport=hacker_news_transport(story_count=HN_CONFIG["item_limit"]))
+    
+    async def ingest():
+        items = await ticker_service._fetch_hacker_news(HN_CONFIG)
+        await ticker_service.bulk_upsert_ticker_items(items)
+    
+    async def ingest_steady():
+        items = await ticker_service._fetch_hacker_news(HN_CONFIG)
+        await ticker_service.bulk_upsert_ticker_items(items)
+        for item in items:
+            ticker_service._mark_item_seen(item)
+    
+    try:
+        results = [
+            await measure("hn.fetch", lambda: ticker_service._fetch_hacker_news(HN_CONFIG), rounds),
+            await measure("hn.ingest", ingest, rounds)
+        ]
+        await ticker_service.aclose()
+        ticker_service._http_client = httpx.AsyncClient(transport=hacker_news_transport(
+            story_count=HN_CONFIG["item_limit"], seed=1, repeat_ratio=0.9
+        ))
+        results.append(await measure("hn.ingest.steady", ingest_steady, rounds))
+        return results
+    finally:
+        await ticker_service.aclose()
+
+
+async def bench_fanout(rounds: int, subscribers: int) -> List[BenchmarkResult]:
+    """Broadcaster publish to many subscribers, each queue drained like its sender"""
+    broadcaster = TickerBroadcaster(queue_size=8)
+    clients = [
+        broadcaster.subscribe(SUBSCRIBER_FILTERS[index % len(SUBSCRIBER_FILTERS)])
+        for index in range(subscribers)
+    ]
+    batches: Iterator[List[TickerItem]] = iter([
+        [TickerItem.from_row({**row, "id": pg_uuid()}) for row in make_rows(10)]
+        for _ in range(rounds + 3)
+    ])
+    
+    def publish():
+        broadcaster.publish(next(batches))
+        for client in clients:
+            while not client.queue.empty():
+                client.queue.get_nowait()
+    
+    result = await measure(f"ws.fanout.{subscribers}", publish, rounds)
+    assert broadcaster.subscriber_count == subscribers, "subscribers were dropped"
+    return [result]
+
+
+async def run(args: argparse.Namespace) -> List[BenchmarkResult]:
+    db = InMemoryTickerDB()
+    user_id = uuid4()
+    db.seed(args.items, users=[user_id, uuid4(), uuid4()])
+    db.seed_engagement(user_id, 200)
+    db.preferences[user_id] = {"category_weights": {"performance": 1.5}}
+    install_pool(FakePool(db))
+    
+    groups = [
+        ("feed", lambda: bench_feed(db, args.rounds, user_id, args.only)),
+        ("relevance", lambda: bench_relevance(db, args.rounds, user_id)),
+        ("item", lambda: bench_items(args.rounds)),
+        ("hn", lambda: bench_hacker_news(args.rounds)),
+        ("ws", lambda: bench_fanout(args.rounds, args.subscribers))
+    ]
+    results: List[BenchmarkResult] = []
+    try:
+        for prefix, bench in groups:
+            if prefix.startswith(args.only) or args.only.startswith(prefix):
+                results += await bench()
+    finally:
+        install_pool(None)
+    return [result for result in results if result.name.startswith(args.only)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000, help="ticker_items to seed (default 10000)")
+    parser.add_argument("--rounds", type=int, default=200, help="timed calls per benchmark (default 200)")
+    parser.add_argument("--subscribers", type=int, default=1000, help="WebSocket clients for fan-out")
+    parser.add_argument("--only", default="", help="run benchmarks whose name starts with this prefix")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save", action="store_true", help="save this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown (0.25 = 25%%)")
+    args = parser.parse_args()
+    
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    
+    params = {"items": args.items, "rounds": args.rounds, "subscribers": args.subscribers}
+    print(f"{args.items} items, {args.rounds} rounds")
+    results = asyncio.run(run(args))
+    for result in results:
+        print(result)
+    
+    status = 0
+    baseline = load_baseline(args.baseline)
+    if baseline is not None:
+        if baseline.get("params") != params:
+            print(f"note: baseline was recorded with {baseline.get('params')}")
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            status = 1
+        else:
+            print(f"no regressions against {args.baseline}")
+    
+    if args.save:
+        save_baseline(args.baseline, results, params)
+        print(f"baseline saved to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,387 @@
+"""
+In-memory stand-ins for the ticker's data sources, for offline benchmarks
+
+``FakePool`` answers the asyncpg statements the ticker services issue from
+an ``InMemoryTickerDB``, so the service code under test runs unchanged.
+Rows are kept pre-sorted like the feed indexes, so a page costs a bisect
+plus a short scan rather than a sort of the whole table.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from bisect import bisect_right, insort
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+import asyncio
+import random
+import re
+
+import asyncpg
+import httpx
+from asyncpg.pgproto.pgproto import UUID as PgUUID
+
+import core.database
+from services import engagement_buffer as engagement_sql
+from services import ticker_service as ticker_sql
+from services import ticker_store as store_sql
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+CATEGORIES = ("general", "general", "insights", "performance")
+SOURCES = ("hacker_news", "tech_news", "insights", "google_ads_monitor")
+ACTIONS = ("view", "view", "view", "click", "share", "dismiss")
+
+
+class InMemoryTickerDB:
+    """ticker_items, ticker_engagement and ticker_preferences held in dicts"""
+    
+    def __init__(self):
+        self.items: Dict[UUID, Dict[str, Any]] = {}
+        self.by_dedupe_key: Dict[str, UUID] = {}
+        self.engagement: Dict[UUID, Dict[str, Dict[str, int]]] = {}
+        self.preferences: Dict[UUID, Dict[str, Any]] = {}
+        self._recent: Optional[List[Tuple[int, int, Dict[str, Any]]]] = None
+        self._by_priority: Optional[List[Tuple[int, int, int, Dict[str, Any]]]] = None
+    
+    def seed(
+        self,
+        count: int,
+        users: Sequence[UUID] = (),
+        personal_share: float = 0.05,
+        days: int = 14,
+        seed: int = 0
+    ):
+        """Add ``count`` items spread over the last ``days`` days"""
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc)
+        span = days * 86400
+        for i in range(count):
+            created_at = now - timedelta(seconds=rng.random() * span)
+            source = SOURCES[i % len(SOURCES)]
+            user_id = pg_uuid(rng.choice(users)) if users and rng.random() < personal_share else None
+            self.insert({
+                "id": pg_uuid(),
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "title": f"Item {i}: something worth knowing happened",
+                "description": "A longer description of the item shown under its title",
+                "icon_name": "TrendingUp",
+                "type": "info",
+                "priority": rng.randint(1, 5),
+                "source_data": {"source": source, "external_id": i, "score": rng.randint(0, 500)},
+                "is_active": True,
+                "expires_at": None if i % 3 else now + timedelta(days=rng.randint(1, 30)),
+                "user_id": user_id,
+                "created_at": created_at,
+                "updated_at": created_at,
+                "dedupe_key": f"{source}:{i}"
+            })
+    
+    def seed_engagement(self, user_id: UUID, count: int, seed: int = 0):
+        """Give ``user_id`` ``count`` engagements with recent items"""
+        rng = random.Random(seed)
+        recent = [entry[-1]["id"] for entry in self.recent()[:max(count * 4, 1)]]
+        counts = self.engagement.setdefault(user_id, {})
+        for _ in range(count):
+            item_counts = counts.setdefault(str(rng.choice(recent)), {})
+            action = rng.choice(ACTIONS)
+            item_counts[action] = item_counts.get(action, 0) + 1
+    
+    def insert(self, row: Dict[str, Any]):
+        """Add or replace a row; new rows are inserted into the sorted indexes in place"""
+        replaced = row["id"] in self.items
+        self.items[row["id"]] = row
+        if row.get("dedupe_key"):
+            self.by_dedupe_key[row["dedupe_key"]] = row["id"]
+        if replaced or self._recent is None or self._by_priority is None:
+            self._recent = self._by_priority = None
+            return
+        created_us = _micros(row["created_at"])
+        insort(self._recent, (-created_us, -row["id"].int, row))
+        insort(self._by_priority, (row["priority"], -created_us, -row["id"].int, row))
+    
+    def recent(self) -> List[Tuple[int, int, Dict[str, Any]]]:
+        """Rows keyed and sorted like ORDER BY created_at DESC, id DESC"""
+        if self._recent is None:
+            self._recent = sorted(
+                (-_micros(row["created_at"]), -row["id"].int, row) for row in self.items.values()
+            )
+        return self._recent
+    
+    def by_priority(self) -> List[Tuple[int, int, int, Dict[str, Any]]]:
+        """Rows keyed and sorted like ORDER BY priority, created_at DESC, id DESC"""
+        if self._by_priority is None:
+            self._by_priority = sorted(
+                (row["priority"], -_micros(row["created_at"]), -row["id"].int, row)
+                for row in self.items.values()
+            )
+        return self._by_priority
+
+
+class FakePool:
+    """Answers the ticker services' asyncpg statements from an InMemoryTickerDB
+    
+    Each call yields to the event loop once, plus ``latency`` seconds if
+    set, like a round trip to a pooled connection. Statements without a
+    handler raise NotImplementedError. get_ranked_ticker_items() is
+    reported as not installed, so relevance is ranked in Python.
+    """
+    
+    def __init__(self, db: InMemoryTickerDB, latency: float = 0.0):
+        self.db = db
+        self.latency = latency
+        self.calls = 0
+        self._handlers: Dict[str, Callable[..., Any]] = {
+            store_sql.SELECT_NOW_SQL: lambda: datetime.now(timezone.utc),
+            store_sql.SELECT_LIVE_ITEMS_SQL: self._live_items,
+            store_sql.SELECT_CHANGED_ITEMS_SQL: self._changed_items,
+            ticker_sql.RANKING_CANDIDATES_SQL: self._ranking_candidates,
+            ticker_sql.SELECT_ENGAGEMENT_SQL: self._engagement,
+            ticker_sql.SELECT_CUSTOM_FILTERS_SQL: lambda user_id: self.db.preferences.get(user_id),
+            ticker_sql.BULK_UPSERT_TICKER_ITEMS_SQL: self._bulk_upsert,
+            ticker_sql.INSERT_TICKER_ITEM_SQL: self._insert_item,
+            ticker_sql.UPDATE_SOURCE_FETCH_SQL: lambda *args: "UPDATE 1",
+            engagement_sql.INSERT_ENGAGEMENT_SQL: self._insert_engagement
+        }
+    
+    async def fetch(self, sql: str, *args) -> List[Dict[str, Any]]:
+        return await self._call(sql, args)
+    
+    async def fetchrow(self, sql: str, *args) -> Optional[Dict[str, Any]]:
+        rows = await self._call(sql, args)
+        return rows[0] if rows else None
+    
+    async def fetchval(self, sql: str, *args) -> Any:
+        return await self._call(sql, args)
+    
+    async def execute(self, sql: str, *args) -> str:
+        return await self._call(sql, args)
+    
+    async def close(self):
+        pass
+    
+    # Private helper methods
+    
+    async def _call(self, sql: str, args: Tuple[Any, ...]) -> Any:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        
+        handler = self._handlers.get(sql)
+        if handler is not None:
+            return handler(*args)
+        if sql == ticker_sql.RANKED_FEED_SQL:
+            raise asyncpg.UndefinedFunctionError("function get_ranked_ticker_items does not exist")
+        if "FROM public.ticker_items WHERE is_active = true" in sql:
+            return self._feed(sql, args)
+        raise NotImplementedError(f"FakePool has no handler for: {' '.join(sql.split())[:80]}")
+    
+    def _live_items(self, limit: int) -> List[Dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        rows = []
+        for *_, row in self.db.recent():
+            if row["is_active"] and _live(row, now):
+                rows.append(row)
+                if len(rows) >= limit:
+                    break
+        return rows
+    
+    def _changed_items(self, since: datetime, limit: int) -> List[Dict[str, Any]]:
+        rows = [row for row in self.db.items.values() if row["updated_at"] > since]
+        rows.sort(key=lambda row: row["updated_at"])
+        return rows[:limit]
+    
+    def _feed(self, sql: str, args: Tuple[Any, ...]) -> List[Dict[str, Any]]:
+        """Evaluate a statement built by build_feed_query"""
+        def arg(pattern: str) -> Any:
+            match = re.search(pattern, sql)
+            return args[int(match.group(1)) - 1] if match else None
+        
+        user = arg(r"user_id = \$(\d+)\)")
+        categories = arg(r"category = ANY\(\$(\d+)")
+        priority_filter = arg(r"priority <= \$(\d+)")
+        include_expired = "expires_at > NOW()" not in sql
+        limit = int(args[int(re.findall(r"LIMIT \$(\d+)", sql)[-1]) - 1])
+        
+        # Keyset cursor: (created_at, id) < ($c, $i), and for the priority
+        # sort, the rest of tier $p followed by every later tier
+        cursor_key = None
+        match = re.search(r"\(created_at, id\) < \(\$(\d+), \$(\d+)\)", sql)
+        if match:
+            created_at, item_id = args[int(match.group(1)) - 1], args[int(match.group(2)) - 1]
+            cursor_key = (-_micros(created_at), -item_id.int)
+        cursor_priority = arg(r"AND priority = \$(\d+)")
+        
+        if "ORDER BY priority" in sql:
+            index = self.db.by_priority()
+            start = bisect_right(index, (cursor_priority,) + cursor_key) if cursor_key else 0
+        else:
+            index = self.db.recent()
+            start = bisect_right(index, cursor_key) if cursor_key else 0
+        
+        now = datetime.now(timezone.utc)
+        rows = []
+        for position in range(start, len(index)):
+            row = index[position][-1]
+            if not row["is_active"] or (not include_expired and not _live(row, now)):
+                continue
+            if row["user_id"] is not None and row["user_id"] != user:
+                continue
+            if categories and row["category"] not in categories:
+                continue
+            if priority_filter and row["priority"] > priority_filter:
+                continue
+            rows.append(row)
+            if len(rows) >= limit:
+                break
+        return rows
+    
+    def _ranking_candidates(
+        self,
+        user_id: Optional[UUID],
+        categories: Optional[List[str]],
+        priority_filter: Optional[int],
+        include_expired: bool,
+        window_hours: int,
+        priority_tier: int,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        since = now - timedelta(hours=window_hours)
+        engagement = self.db.engagement.get(user_id, {}) if user_id else {}
+        rows = []
+        for *_, row in self.db.recent():
+            if not row["is_active"] or (not include_expired and not _live(row, now)):
+                continue
+            if row["user_id"] is not None and row["user_id"] != user_id:
+                continue
+            if categories and row["category"] not in categories:
+                continue
+            if priority_filter and row["priority"] > priority_filter:
+                continue
+            if row["created_at"] <= since and row["priority"] > priority_tier:
+                continue
+            counts = engagement.get(str(row["id"]), {})
+            rows.append({
+                **row,
+                "source_name": row["source_data"].get("source"),
+                "clicks": counts.get("click", 0),
+                "views": counts.get("view", 0),
+                "shares": counts.get("share", 0),
+                "dismisses": counts.get("dismiss", 0)
+            })
+            if len(rows) >= limit:
+                break
+        return rows
+    
+    def _engagement(self, user_id: UUID, item_ids: List[Any]) -> List[Dict[str, Any]]:
+        engagement = self.db.engagement.get(user_id, {})
+        records = []
+        for item_id in item_ids:
+            for action, count in engagement.get(str(item_id), {}).items():
+                records.extend({"ticker_item_id": item_id, "action": action} for _ in range(count))
+        return records
+    
+    def _insert_item(self, *values: Any) -> List[Dict[str, Any]]:
+        names = [name.strip() for name in ticker_sql.TICKER_ITEM_COLUMNS.split(",")]
+        data = dict(zip(names, values))
+        now = datetime.now(timezone.utc)
+        row = {
+            **data,
+            "id": pg_uuid(),
+            "created_at": now,
+            "updated_at": now,
+            "dedupe_key": ticker_sql.ticker_dedupe_key(data["source_data"] or {})
+        }
+        self.db.insert(row)
+        return [row]
+    
+    def _insert_engagement(
+        self,
+        user_ids: List[UUID],
+        item_ids: List[UUID],
+        actions: List[str],
+        timestamps: List[datetime],
+        metadata: List[Dict[str, Any]]
+    ) -> str:
+        written = 0
+        for user_id, item_id, action in zip(user_ids, item_ids, actions):
+            if item_id not in self.db.items:
+                continue
+            counts = self.db.engagement.setdefault(user_id, {}).setdefault(str(item_id), {})
+            counts[action] = counts.get(action, 0) + 1
+            written += 1
+        return f"INSERT 0 {written}"
+    
+    def _bulk_upsert(self, *columns: List[Any]) -> List[Dict[str, Any]]:
+        names = [name.strip() for name in ticker_sql.TICKER_ITEM_COLUMNS.split(",")]
+        tracked = ("title", "description", "icon_name", "type", "priority", "source_data", "expires_at")
+        now = datetime.now(timezone.utc)
+        rows = []
+        for values in zip(*columns):
+            data = dict(zip(names, values))
+            key = ticker_sql.ticker_dedupe_key(data["source_data"])
+            existing = self.db.items.get(self.db.by_dedupe_key.get(key)) if key else None
+            if existing is None:
+                row = {**data, "id": pg_uuid(), "created_at": now, "updated_at": now, "dedupe_key": key}
+                self.db.insert(row)
+                rows.append({**row, "inserted": True})
+            elif any(existing[name] != data[name] for name in tracked):
+                existing.update({name: data[name] for name in tracked}, updated_at=now)
+                self.db.insert(existing)
+                rows.append({**existing, "inserted": False})
+        return rows
+
+
+def install_pool(pool: Optional[FakePool]):
+    """Make ``pool`` the process-wide asyncpg pool (None restores the REST backend)"""
+    core.database._db_pool = pool
+
+
+def hacker_news_transport(
+    story_count: int = 500,
+    keywords: Sequence[str] = ("ai", "marketing"),
+    seed: int = 0,
+    repeat_ratio: float = 0.0
+) -> httpx.MockTransport:
+    """Serves topstories.json and item/<id>.json like the Hacker News API
+    
+    Each topstories request returns ``story_count`` ids, of which the first
+    ``repeat_ratio`` share were in the previous list and the rest are new,
+    so successive refreshes see mostly new stories by default.
+    """
+    rng = random.Random(seed)
+    state = {"next_id": 1}
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path.endswith("/topstories.json"):
+            fresh = story_count if state["next_id"] == 1 else story_count - int(story_count * repeat_ratio)
+            state["next_id"] += fresh
+            first = state["next_id"] - story_count
+            return httpx.Response(200, json=list(range(max(first, 1), state["next_id"])))
+        
+        story_id = int(path.rsplit("/", 1)[-1].split(".")[0])
+        keyword = keywords[story_id % len(keywords)] if story_id % 2 else "rust"
+        return httpx.Response(200, json={
+            "id": story_id,
+            "title": f"Show HN: {keyword} story number {story_id}",
+            "score": rng.randint(0, 400),
+            "descendants": rng.randint(0, 200),
+            "url": f"https://example.com/{story_id}"
+        })
+    
+    return httpx.MockTransport(handler)
+
+
+def pg_uuid(value: Optional[UUID] = None) -> UUID:
+    """A UUID of the type asyncpg returns for uuid columns (a new one by default)"""
+    return PgUUID((value or uuid4()).bytes)
+
+
+# Private helpers
+
+def _micros(value: datetime) -> int:
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _live(row: Dict[str, Any], now: datetime) -> bool:
+    return row["expires_at"] is None or row["expires_at"] > now
@@ -0,0 +1,138 @@
+"""
+Benchmark harness: timing, percentiles, and JSON baselines with regression checks
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from datetime import datetime, timezone
+from pathlib import Path
+import inspect
+import json
+import math
+import platform
+import time
+
+
+# A benchmark is flagged when its p50 is this much slower, or its ops/sec
+# this much lower, than the baseline
+DEFAULT_TOLERANCE = 0.25
+
+BenchFunction = Callable[[], Union[Any, Awaitable[Any]]]
+
+
+class BenchmarkResult:
+    """Timings for one benchmark, in microseconds per operation"""
+    
+    __slots__ = ("name", "rounds", "total_seconds", "p50_us", "p99_us", "mean_us")
+    
+    def __init__(self, name: str, samples: List[float]):
+        ordered = sorted(samples)
+        self.name = name
+        self.rounds = len(ordered)
+        self.total_seconds = sum(ordered)
+        self.p50_us = percentile(ordered, 0.50) * 1e6
+        self.p99_us = percentile(ordered, 0.99) * 1e6
+        self.mean_us = self.total_seconds / self.rounds * 1e6
+    
+    @property
+    def ops_per_sec(self) -> float:
+        return self.rounds / self.total_seconds if self.total_seconds else float("inf")
+    
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "rounds": self.rounds,
+            "ops_per_sec": round(self.ops_per_sec, 2),
+            "p50_us": round(self.p50_us, 2),
+            "p99_us": round(self.p99_us, 2),
+            "mean_us": round(self.mean_us, 2)
+        }
+    
+    def __str__(self) -> str:
+        return (
+            f"{self.name:<36} {self.ops_per_sec:12,.1f} ops/s "
+            f"{self.p50_us:11,.1f} us p50 {self.p99_us:11,.1f} us p99"
+        )
+
+
+class Regression:
+    """A benchmark that got slower than its baseline beyond the tolerance"""
+    
+    __slots__ = ("name", "metric", "baseline", "current")
+    
+    def __init__(self, name: str, metric: str, baseline: float, current: float):
+        self.name = name
+        self.metric = metric
+        self.baseline = baseline
+        self.current = current
+    
+    def __str__(self) -> str:
+        change = (self.current - self.baseline) / self.baseline * 100 if self.baseline else 0.0
+        return f"{self.name}: {self.metric} {self.baseline:,.1f} -> {self.current:,.1f} ({change:+.0f}%)"
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted samples"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered), max(1, math.ceil(q * len(ordered)))) - 1]
+
+
+async def measure(
+    name: str,
+    fn: BenchFunction,
+    rounds: int,
+    warmup: int = 3
+) -> BenchmarkResult:
+    """Time ``rounds`` calls of ``fn``; awaitable results are awaited"""
+    for _ in range(warmup):
+        result = fn()
+        if inspect.isawaitable(result):
+            await result
+    
+    samples = []
+    clock = time.perf_counter
+    for _ in range(rounds):
+        started = clock()
+        result = fn()
+        if inspect.isawaitable(result):
+            await result
+        samples.append(clock() - started)
+    return BenchmarkResult(name, samples)
+
+
+def load_baseline(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def save_baseline(path: Path, results: List[BenchmarkResult], params: Dict[str, Any]):
+    """Write results as a baseline; existing entries for other benchmarks are kept"""
+    existing = load_baseline(path) or {}
+    benchmarks = existing.get("benchmarks", {})
+    benchmarks.update({result.name: result.to_dict() for result in results})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "params": params,
+        "benchmarks": benchmarks
+    }, indent=2, sort_keys=True) + "\n")
+
+
+def compare(
+    results: List[BenchmarkResult],
+    baseline: Dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE
+) -> List[Regression]:
+    """Benchmarks whose p50 or throughput regressed beyond ``tolerance``"""
+    regressions = []
+    recorded = baseline.get("benchmarks", {})
+    for result in results:
+        previous = recorded.get(result.name)
+        if previous is None:
+            continue
+        if result.p50_us > previous["p50_us"] * (1 + tolerance):
+            regressions.append(Regression(result.name, "p50_us", previous["p50_us"], result.p50_us))
+        if result.ops_per_sec < previous["ops_per_sec"] / (1 + tolerance):
+            regressions.append(Regression(result.name, "ops_per_sec", previous["ops_per_sec"], result.ops_per_sec))
+    return regressions
@@ -0,0 +1,321 @@
+"""
+Load test: mixed ticker traffic against a running app, ramped in steps
+
+Start the app first, e.g. on the in-memory stand-in (see loadtest_app.py):
+    TICKER_WS_POLL_SECONDS=1 uvicorn tests.benchmarks.loadtest_app:app --workers 1
+
+Then run from backend/:
+    python -m tests.benchmarks.loadtest --url http://127.0.0.1:8000 \\
+        --steps 10,50,100,200 --step-seconds 20 --mix feed=70,engagement=20,items=5,ws=5
+
+Each step runs ``concurrency`` virtual users. Their share of the mix picks
+what they do: ``feed``, ``engagement`` and ``items`` users loop over
+GET /api/ticker/feed, POST /api/ticker/engagement and POST /api/ticker/items,
+while ``ws`` users hold a /api/ticker/ws connection open. For every step
+the tool reports throughput, latency percentiles and error rate per
+operation, and how long items created with POST /items took to reach the
+WebSocket clients. The first step whose throughput stops growing, or whose
+error rate or p99 exceeds its limit, is reported as the saturation point.
+"""
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+import httpx
+import websockets
+
+from tests.benchmarks.harness import percentile
+
+
+OPERATIONS = ("feed", "engagement", "items", "ws")
+
+# A step is past saturation when throughput grows less than this over the
+# previous step
+MIN_THROUGHPUT_GAIN = 0.05
+
+ITEM_TITLE_PREFIX = "loadtest"
+
+
+class StepStats:
+    """Outcomes recorded during one step"""
+    
+    def __init__(self, concurrency: int):
+        self.concurrency = concurrency
+        self.latencies: Dict[str, List[float]] = {op: [] for op in OPERATIONS}
+        self.errors: Dict[str, int] = {op: 0 for op in OPERATIONS}
+        self.ws_lag: List[float] = []
+        self.ws_connected = 0
+        self.items_created = 0
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+    
+    def record(self, op: str, latency: float, ok: bool):
+        if ok:
+            self.latencies[op].append(latency)
+        else:
+            self.errors[op] += 1
+    
+    @property
+    def requests(self) -> int:
+        return sum(len(self.latencies[op]) + self.errors[op] for op in OPERATIONS if op != "ws")
+    
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+    
+    @property
+    def error_rate(self) -> float:
+        errors = sum(count for op, count in self.errors.items() if op != "ws")
+        return errors / self.requests if self.requests else 0.0
+    
+    def p99_ms(self) -> float:
+        samples = sorted(sample for op in OPERATIONS if op != "ws" for sample in self.latencies[op])
+        return percentile(samples, 0.99) * 1e3
+    
+    def to_dict(self) -> Dict[str, Any]:
+        operations = {}
+        for op in OPERATIONS:
+            if op == "ws":
+                continue
+            samples = sorted(self.latencies[op])
+            total = len(samples) + self.errors[op]
+            if not total:
+                continue
+            operations[op] = {
+                "requests": total,
+                "errors": self.errors[op],
+                "p50_ms": round(percentile(samples, 0.50) * 1e3, 2),
+                "p95_ms": round(percentile(samples, 0.95) * 1e3, 2),
+                "p99_ms": round(percentile(samples, 0.99) * 1e3, 2)
+            }
+        lag = sorted(self.ws_lag)
+        return {
+            "concurrency": self.concurrency,
+            "seconds": round(self.elapsed, 2),
+            "requests": self.requests,
+            "throughput_rps": round(self.throughput, 1),
+            "error_rate": round(self.error_rate, 4),
+            "p99_ms": round(self.p99_ms(), 2),
+            "operations": operations,
+            "ws": {
+                "connected": self.ws_connected,
+                "connect_errors": self.errors["ws"],
+                "items_created": self.items_created,
+                "deliveries": len(lag),
+                "lag_p50_ms": round(percentile(lag, 0.50) * 1e3, 1),
+                "lag_p99_ms": round(percentile(lag, 0.99) * 1e3, 1)
+            }
+        }
+
+
+class LoadTest:
+    """Drives one ramp against ``base_url``"""
+    
+    def __init__(self, args: argparse.Namespace):
+        self.base_url = args.url.rstrip("/")
+        self.ws_url = self.base_url.replace("http", "ws", 1) + "/api/ticker/ws"
+        self.mix = args.mix
+        self.step_seconds = args.step_seconds
+        self.limit = args.limit
+        self.users = [uuid4() for _ in range(args.users)]
+        self.item_ids: List[str] = []
+        self.sent: Dict[str, float] = {}
+        self.stats: Optional[StepStats] = None
+        self.stopping = asyncio.Event()
+    
+    async def run(self, steps: List[int]) -> List[StepStats]:
+        limits = httpx.Limits(max_connections=max(steps), max_keepalive_connections=max(steps))
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=30.0) as client:
+            # Prime item ids for engagement posts
+            response = await client.get("/api/ticker/feed", params={"limit": 100})
+            response.raise_for_status()
+            self.item_ids = [item["id"] for item in response.json()["items"]]
+            
+            results = []
+            for concurrency in steps:
+                results.append(await self._run_step(client, concurrency))
+                print(format_step(results[-1]), flush=True)
+            return results
+    
+    # Private helper methods
+    
+    async def _run_step(self, client: httpx.AsyncClient, concurrency: int) -> StepStats:
+        self.stats = stats = StepStats(concurrency)
+        self.stopping = asyncio.Event()
+        roles = assign_roles(self.mix, concurrency)
+        
+        tasks = [
+            asyncio.create_task(self._listen() if role == "ws" else self._loop(client, role))
+            for role in roles
+        ]
+        await asyncio.sleep(self.step_seconds)
+        self.stopping.set()
+        
+        # Let in-flight requests and then deliveries finish
+        requests = [task for task, role in zip(tasks, roles) if role != "ws"]
+        if requests:
+            await asyncio.wait(requests, timeout=5.0)
+        stats.elapsed = time.monotonic() - stats.started
+        await asyncio.wait(tasks, timeout=5.0)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return stats
+    
+    async def _loop(self, client: httpx.AsyncClient, op: str):
+        stats = self.stats
+        while not self.stopping.is_set():
+            started = time.perf_counter()
+            try:
+                ok = await self._request(client, op)
+            except httpx.HTTPError:
+                ok = False
+            stats.record(op, time.perf_counter() - started, ok)
+    
+    async def _request(self, client: httpx.AsyncClient, op: str) -> bool:
+        if op == "feed":
+            response = await client.get("/api/ticker/feed", params={"limit": self.limit})
+            if response.status_code == 200:
+                items = response.json()["items"]
+                if items:
+                    self.item_ids = [item["id"] for item in items]
+            return response.status_code == 200
+        
+        if op == "engagement":
+            response = await client.post("/api/ticker/engagement", json={
+                "user_id": str(random.choice(self.users)),
+                "ticker_item_id": random.choice(self.item_ids),
+                "action": random.choice(("view", "view", "view", "click"))
+            })
+            return response.status_code == 202
+        
+        token = uuid4().hex
+        self.sent[token] = time.monotonic()
+        response = await client.post("/api/ticker/items", json={
+            "category": "general",
+            "title": f"{ITEM_TITLE_PREFIX} {token}",
+            "description": "Created by the load test",
+            "priority": 3
+        })
+        if response.status_code == 200:
+            self.stats.items_created += 1
+        return response.status_code == 200
+    
+    async def _listen(self):
+        """Hold a WebSocket open and record the lag of each load-test item it receives"""
+        stats = self.stats
+        try:
+            async with websockets.connect(self.ws_url, max_size=None) as socket:
+                stats.ws_connected += 1
+                while not self.stopping.is_set():
+                    try:
+                        frame = await asyncio.wait_for(socket.recv(), timeout=1.0)
+                    except asyncio.TimeoutError:
+                        continue
+                    received = time.monotonic()
+                    for item in json.loads(frame).get("items", ()):
+                        title = item["title"]
+                        if not title.startswith(ITEM_TITLE_PREFIX):
+                            continue
+                        sent = self.sent.get(title[len(ITEM_TITLE_PREFIX) + 1:])
+                        if sent is not None:
+                            stats.ws_lag.append(received - sent)
+        except (OSError, websockets.WebSocketException):
+            stats.errors["ws"] += 1
+
+
+def assign_roles(mix: Dict[str, float], concurrency: int) -> List[str]:
+    """Split ``concurrency`` users across operations in proportion to the mix"""
+    total = sum(mix.values())
+    shares = {op: concurrency * weight / total for op, weight in mix.items()}
+    counts = {op: int(share) for op, share in shares.items()}
+    # Hand out the remainder by largest fractional share
+    for op in sorted(shares, key=lambda op: shares[op] - counts[op], reverse=True):
+        if sum(counts.values()) >= concurrency:
+            break
+        counts[op] += 1
+    return [op for op, count in counts.items() for _ in range(count)]
+
+
+def find_saturation(results: List[StepStats], max_error_rate: float, max_p99_ms: float) -> Optional[StepStats]:
+    """First step past the saturation point, if any"""
+    previous = None
+    for stats in results:
+        if stats.error_rate > max_error_rate or stats.p99_ms() > max_p99_ms:
+            return stats
+        if previous is not None and stats.throughput < previous.throughput * (1 + MIN_THROUGHPUT_GAIN):
+            return stats
+        previous = stats
+    return None
+
+
+def format_step(stats: StepStats) -> str:
+    data = stats.to_dict()
+    lines = [
+        f"concurrency {data['concurrency']:>5}: {data['throughput_rps']:9,.1f} req/s  "
+        f"errors {data['error_rate']:.2%}  p99 {data['p99_ms']:,.1f} ms"
+    ]
+    for op, op_stats in data["operations"].items():
+        lines.append(
+            f"  {op:<11} {op_stats['requests']:>8} req  p50 {op_stats['p50_ms']:>8,.1f}  "
+            f"p95 {op_stats['p95_ms']:>8,.1f}  p99 {op_stats['p99_ms']:>8,.1f} ms  errors {op_stats['errors']}"
+        )
+    ws = data["ws"]
+    if ws["connected"] or ws["connect_errors"]:
+        lines.append(
+            f"  {'ws':<11} {ws['connected']:>8} open  {ws['deliveries']} deliveries (all connections) of "
+            f"{ws['items_created']} items  lag p50 {ws['lag_p50_ms']:,.1f}  p99 {ws['lag_p99_ms']:,.1f} ms"
+        )
+    return "\n".join(lines)
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        op, _, weight = part.partition("=")
+        if op not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {op!r}, expected one of {', '.join(OPERATIONS)}")
+        mix[op] = float(weight or 1)
+    return mix
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="base URL of the running app")
+    parser.add_argument("--steps", default="10,50,100,200", help="comma-separated concurrency per step")
+    parser.add_argument("--step-seconds", type=float, default=20.0, help="duration of each step")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("feed=70,engagement=20,items=5,ws=5"))
+    parser.add_argument("--limit", type=int, default=20, help="feed page size")
+    parser.add_argument("--users", type=int, default=100, help="distinct user ids for engagement")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="saturated above this error rate")
+    parser.add_argument("--max-p99-ms", type=float, default=500.0, help="saturated above this p99")
+    parser.add_argument("--json", type=str, default=None, help="also write the results to this file")
+    args = parser.parse_args()
+    
+    steps = [int(step) for step in args.steps.split(",")]
+    results = asyncio.run(LoadTest(args).run(steps))
+    
+    saturated = find_saturation(results, args.max_error_rate, args.max_p99_ms)
+    if saturated is None:
+        print("no saturation within the tested steps")
+    else:
+        print(f"saturation at concurrency {saturated.concurrency}")
+    
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({
+                "url": args.url,
+                "mix": args.mix,
+                "saturation_concurrency": saturated.concurrency if saturated else None,
+                "steps": [stats.to_dict() for stats in results]
+            }, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""
+backend/main.py's app on the in-memory database stand-in, for load tests
+
+Run from backend/:
+    LOADTEST_ITEMS=10000 TICKER_WS_POLL_SECONDS=1 \\
+        uvicorn tests.benchmarks.loadtest_app:app --workers 1
+
+Each worker process seeds its own stand-in database, so with more than one
+worker, items created through one worker are not seen by the others and
+WebSocket delivery is only measured within a worker. Point the load
+generator at an app on a real DATABASE_URL to measure delivery across
+workers. Source refreshes and insight precompute are disabled so the app
+makes no outbound calls.
+"""
+from contextlib import asynccontextmanager
+import os
+
+from fastapi import FastAPI
+
+from core.config import settings
+from tests.benchmarks.fakes import FakePool, InMemoryTickerDB, install_pool
+
+settings.database_url = None
+settings.scheduler_enabled = False
+settings.insight_precompute_enabled = False
+
+from main import app  # noqa: E402  (settings above must apply first)
+
+
+db = InMemoryTickerDB()
+db.seed(int(os.environ.get("LOADTEST_ITEMS", "10000")))
+
+_app_lifespan = app.router.lifespan_context
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    install_pool(FakePool(db, latency=float(os.environ.get("LOADTEST_DB_LATENCY", "0"))))
+    async with _app_lifespan(app):
+        yield
+
+
+app.router.lifespan_context = lifespan
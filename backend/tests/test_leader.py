@@ -0,0 +1,51 @@
+"""
+Request-time refreshes only run on the worker that does the leader's work
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api import ticker as ticker_api
+from core.config import settings
+from core.leader import LeaderElection, LeaderLock
+from services.refresh_coordinator import RefreshCoordinator
+from services.ticker_service import ticker_service
+
+
+def _client(monkeypatch, tmp_path, workers: int):
+    refreshes = []
+    
+    async def refresh_category(category):
+        refreshes.append(category)
+        return {"sources": 1, "failed_sources": 0, "inserted": 0, "updated": 0}
+    
+    async def get_ticker_feed(request, user_id=None):
+        return []
+    
+    async def get_enabled_sources():
+        return []
+    
+    monkeypatch.setattr(settings, "workers", workers)
+    monkeypatch.setattr(ticker_service, "refresh_category", refresh_category)
+    monkeypatch.setattr(ticker_service, "get_ticker_feed", get_ticker_feed)
+    monkeypatch.setattr(ticker_service, "get_enabled_sources", get_enabled_sources)
+    coordinator = RefreshCoordinator()
+    monkeypatch.setattr(ticker_api, "refresh_coordinator", coordinator)
+    monkeypatch.setattr(ticker_api, "leader_election", LeaderElection(LeaderLock(tmp_path / "leader.lock")))
+    
+    app = FastAPI()
+    app.include_router(ticker_api.router, prefix="/api/ticker")
+    return TestClient(app), coordinator, refreshes
+
+
+def test_follower_never_refreshes_on_request(monkeypatch, tmp_path):
+    client, coordinator, refreshes = _client(monkeypatch, tmp_path, workers=2)
+    for _ in range(3):
+        assert client.get("/api/ticker/general").status_code == 200
+    assert refreshes == []
+    assert coordinator.last_refreshed("general") is None
+
+
+def test_single_worker_refreshes_stale_data_on_request(monkeypatch, tmp_path):
+    client, coordinator, refreshes = _client(monkeypatch, tmp_path, workers=1)
+    assert client.get("/api/ticker/general").status_code == 200
+    assert coordinator._attempted_at.keys() == {"general"}
@@ -0,0 +1,50 @@
+"""
+Scheduled source refreshes and the per-source circuit breakers
+"""
+from datetime import datetime, timezone
+from uuid import uuid4
+import asyncio
+import time
+
+from models.ticker import SourceType, TickerSource
+from services.source_fetchers import source_fetchers
+from services.source_scheduler import ScheduledSource, SourceScheduler
+
+
+def _source() -> TickerSource:
+    now = datetime.now(timezone.utc)
+    return TickerSource(
+        id=uuid4(),
+        category="general",
+        source_name="breaker_test",
+        source_type=SourceType.API,
+        config={},
+        error_count=3,
+        fetch_count=0,
+        created_at=now,
+        updated_at=now
+    )
+
+
+def test_scheduled_refresh_is_skipped_while_the_circuit_is_open(monkeypatch):
+    calls = []
+    
+    async def fetcher(source):
+        calls.append(source.id)
+        return []
+    
+    monkeypatch.setitem(source_fetchers._fetchers, (SourceType.API.value, "breaker_test"), fetcher)
+    monkeypatch.setattr(source_fetchers, "_breakers", {})
+    source = _source()
+    breaker = source_fetchers.breaker(source)
+    breaker.opened_until = time.monotonic() + 60
+    
+    entry = ScheduledSource(source)
+    entry.running = True
+    asyncio.run(SourceScheduler()._refresh(entry))
+    
+    assert calls == []
+    assert entry.last_outcome == "skipped"
+    assert entry.running is False
+    assert source.error_count == 3
+    assert source_fetchers.circuit_state(source) == "open"
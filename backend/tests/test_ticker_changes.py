@@ -0,0 +1,133 @@
+"""
+Sequencing of ticker change delivery: the contiguous floor, out-of-order
+seqs and rolled-back holes
+"""
+from uuid import uuid4
+import asyncio
+
+from services.ticker_changes import SELECT_CHANGES_BY_SEQ_SQL, ChangeEvent, TickerChangeFeed
+
+
+def _feed(hole_grace_seconds: float = 60.0):
+    feed = TickerChangeFeed(keepalive_interval=30.0, hole_grace_seconds=hole_grace_seconds)
+    return feed, feed.subscribe()
+
+
+def _event(seq: int) -> ChangeEvent:
+    return ChangeEvent(seq, "INSERT", uuid4(), None)
+
+
+def _seqs(subscription):
+    return [event.seq for event in subscription._events]
+
+
+def test_in_order_changes_advance_the_floor():
+    feed, subscription = _feed()
+    feed._set_floor(10)
+    for seq in (11, 12, 13):
+        feed._deliver(_event(seq))
+    assert feed._floor == 13
+    assert feed._delivered == set()
+    assert feed.last_seq == 13
+    assert _seqs(subscription) == [11, 12, 13]
+
+
+def test_out_of_order_changes_wait_for_the_hole():
+    feed, subscription = _feed()
+    feed._set_floor(10)
+    feed._deliver(_event(12))
+    assert feed._floor == 10
+    assert feed._delivered == {12}
+    assert feed.last_seq == 12
+    
+    feed._deliver(_event(11))
+    assert feed._floor == 12
+    assert feed._delivered == set()
+    assert feed._hole_since is None
+    assert _seqs(subscription) == [12, 11]
+
+
+def test_duplicates_are_delivered_once():
+    feed, subscription = _feed()
+    feed._set_floor(10)
+    for seq in (12, 12, 11, 11, 12, 9):
+        feed._deliver(_event(seq))
+    assert _seqs(subscription) == [12, 11]
+
+
+def test_stale_hole_is_skipped():
+    feed, subscription = _feed(hole_grace_seconds=0.0)
+    feed._set_floor(10)
+    feed._deliver(_event(13))
+    assert feed._floor == 13
+    assert feed._delivered == set()
+    assert list(feed._skipped) == [11, 12]
+    assert _seqs(subscription) == [13]
+
+
+def test_change_committed_after_the_grace_period_is_delivered_once():
+    feed, subscription = _feed(hole_grace_seconds=0.0)
+    feed._set_floor(10)
+    feed._deliver(_event(13))
+    
+    # A long transaction holding seq 11 commits after its hole was skipped
+    feed._deliver(_event(11))
+    feed._deliver(_event(11))
+    assert feed._floor == 13
+    assert list(feed._skipped) == [12]
+    assert _seqs(subscription) == [13, 11]
+
+
+def test_catch_up_reads_back_skipped_seqs():
+    class Connection:
+        async def fetch(self, sql, *args):
+            if sql == SELECT_CHANGES_BY_SEQ_SQL:
+                return [{"seq": seq, "op": "insert", "item_id": str(uuid4()), "row": None} for seq in args[0] if seq == 12]
+            return []
+    
+    feed, subscription = _feed(hole_grace_seconds=0.0)
+    feed._set_floor(10)
+    feed._deliver(_event(13))
+    asyncio.run(feed._catch_up(Connection()))
+    assert list(feed._skipped) == [11]
+    assert _seqs(subscription) == [13, 12]
+
+
+def test_skipped_seqs_are_forgotten_after_the_retention():
+    feed = TickerChangeFeed(keepalive_interval=30.0, hole_grace_seconds=0.0, skipped_retention_seconds=0.0)
+    subscription = feed.subscribe()
+    feed._set_floor(10)
+    feed._deliver(_event(12))
+    feed._skip_stale_hole()
+    assert feed._skipped == {}
+    
+    feed._deliver(_event(11))
+    assert _seqs(subscription) == [12]
+
+
+def test_notify_while_reading_the_floor_never_moves_it_back():
+    feed, subscription = _feed(hole_grace_seconds=0.0)
+    # Delivered after LISTEN but before MAX(seq) was read
+    feed._deliver(_event(9))
+    feed._deliver(_event(10))
+    feed._set_floor(10)
+    assert feed._delivered == set()
+    
+    feed._deliver(_event(11))
+    feed._skip_stale_hole()
+    assert feed._floor == 11
+    assert feed.last_seq == 11
+    
+    feed._deliver(_event(10))
+    assert _seqs(subscription) == [9, 10, 11]
+
+
+def test_notify_above_the_floor_is_kept_while_reading_it():
+    feed, subscription = _feed()
+    feed._deliver(_event(12))
+    feed._set_floor(10)
+    assert feed._delivered == {12}
+    
+    feed._deliver(_event(11))
+    assert feed._floor == 12
+    assert _seqs(subscription) == [12, 11]
@@ -0,0 +1,50 @@
+"""
+TickerItem's trusted-row fast path on rows typed like asyncpg returns them
+"""
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import orjson
+from asyncpg.pgproto.pgproto import UUID as PgUUID
+
+from models.ticker import TickerItem, ticker_items_json
+
+
+def _row(**overrides):
+    now = datetime.now(timezone.utc)
+    row = {
+        "id": PgUUID(uuid4().bytes),
+        "category": "general",
+        "title": "Something happened",
+        "description": "A longer description",
+        "icon_name": "TrendingUp",
+        "type": "info",
+        "priority": 2,
+        "source_data": {"source": "hacker_news", "external_id": 1},
+        "is_active": True,
+        "expires_at": now + timedelta(hours=1),
+        "user_id": PgUUID(uuid4().bytes),
+        "created_at": now,
+        "updated_at": now,
+        "dedupe_key": "hacker_news:1"
+    }
+    row.update(overrides)
+    return row
+
+
+def test_asyncpg_rows_encode_like_validated_items():
+    row = _row()
+    item = TickerItem.from_row(row)
+    validated = TickerItem(**row)
+    assert orjson.loads(item.json_bytes()) == orjson.loads(validated.model_dump_json())
+    assert orjson.loads(item.json_bytes())["id"] == str(row["id"])
+
+
+def test_asyncpg_rows_skip_the_pydantic_fallback(monkeypatch):
+    class Fallback:
+        def to_json(self, *args, **kwargs):
+            raise AssertionError("orjson fast path was not used")
+    
+    item = TickerItem.from_row(_row(user_id=None))
+    monkeypatch.setattr(TickerItem, "__pydantic_serializer__", Fallback())
+    assert orjson.loads(ticker_items_json([item]))[0]["user_id"] is None
@@ -0,0 +1,47 @@
+"""
+TickerStore polling only as the fallback for the ticker change feed
+"""
+import asyncio
+import time
+
+from services.ticker_changes import ticker_changes
+from services.ticker_store import TickerStore
+
+
+def _run_store(monkeypatch, connected: bool):
+    store = TickerStore(sync_interval=0.01)
+    store._loaded = True
+    store._loaded_at = time.monotonic()
+    syncs = []
+    
+    async def sync():
+        syncs.append(time.monotonic())
+        store._synced_at = time.monotonic()
+    
+    monkeypatch.setattr(store, "sync", sync)
+    
+    async def run():
+        if connected:
+            ticker_changes._connected.set()
+        store._changes_task = asyncio.create_task(asyncio.sleep(60))
+        try:
+            await asyncio.wait_for(store._run(), timeout=0.1)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            store._changes_task.cancel()
+            ticker_changes._connected.clear()
+    
+    asyncio.run(run())
+    return store, syncs
+
+
+def test_store_does_not_poll_while_the_change_feed_is_connected(monkeypatch):
+    store, syncs = _run_store(monkeypatch, connected=True)
+    assert syncs == []
+
+
+def test_store_polls_while_the_change_feed_is_down(monkeypatch):
+    store, syncs = _run_store(monkeypatch, connected=False)
+    assert len(syncs) > 1
+    assert store.ready
@@ -0,0 +1,93 @@
+"""
+SSE replay across changes that commit out of seq order
+"""
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+import asyncio
+
+from services import ticker_stream
+from services.ticker_changes import ChangeEvent, TickerChangeFeed
+from services.ticker_stream import TickerStreamRelay, parse_event_id
+
+
+def _row(seq: int):
+    now = datetime.now(timezone.utc)
+    return {
+        "seq": seq,
+        "id": uuid4(),
+        "category": "general",
+        "title": f"Item {seq}",
+        "description": None,
+        "icon_name": "TrendingUp",
+        "type": "info",
+        "priority": 2,
+        "source_data": {},
+        "is_active": True,
+        "expires_at": now + timedelta(hours=1),
+        "user_id": None,
+        "created_at": now,
+        "updated_at": now,
+        "dedupe_key": None
+    }
+
+
+class Pool:
+    """Change log holding every committed insert"""
+    
+    def __init__(self):
+        self.rows = []
+    
+    async def fetch(self, sql, since, limit):
+        return [row for row in sorted(self.rows, key=lambda row: row["seq"]) if row["seq"] > since][:limit]
+
+
+def _setup(monkeypatch):
+    feed = TickerChangeFeed(keepalive_interval=30.0, hole_grace_seconds=60.0)
+    feed._set_floor(10)
+    pool = Pool()
+    relay = TickerStreamRelay(replay_size=1, queue_size=16)
+    monkeypatch.setattr(ticker_stream, "ticker_changes", feed)
+    monkeypatch.setattr(ticker_stream, "get_db_pool", lambda: pool)
+    
+    def commit(seq: int):
+        row = _row(seq)
+        pool.rows.append(row)
+        change = ChangeEvent(seq, "insert", row["id"], row)
+        feed._deliver(change)
+        relay.publish(relay._events([change]))
+    
+    return relay, commit
+
+
+def _replayed_seqs(relay, last_event_id: bytes):
+    async def replay():
+        return await relay._replay(*parse_event_id(last_event_id.decode()))
+    
+    events, complete = asyncio.run(replay())
+    assert complete
+    return [event.seq for event in events]
+
+
+def test_event_ids_carry_the_floor_below_a_hole(monkeypatch):
+    relay, commit = _setup(monkeypatch)
+    commit(12)
+    assert relay.buffer.last.id == b"12:10"
+    commit(11)
+    assert relay.buffer.last.id == b"11:12"
+    commit(13)
+    assert relay.buffer.last.id == b"13"
+    assert parse_event_id("13") == (13, 13)
+
+
+def test_resume_past_the_ring_buffer_includes_a_change_committed_later(monkeypatch):
+    relay, commit = _setup(monkeypatch)
+    commit(12)
+    last_event_id = relay.buffer.last.id
+    
+    # The client disconnects; seq 11 commits late and 13 pushes 12 out of the buffer
+    commit(11)
+    commit(13)
+    assert relay.buffer.after(12) is None
+    
+    replayed = _replayed_seqs(relay, last_event_id)
+    assert 11 in replayed and 13 in replayed